@@ -0,0 +1,45 @@
+"""
+Script para cerrar las citas confirmadas que ya terminaron.
+Las pasa a BARRIDO_ESTADO_DESTINO (completada por defecto) en lotes de
+BARRIDO_LOTE, y cancela las citas sin pagar cuya retención venció. Es la misma vuelta que ejecuta el backend cada
+BARRIDO_INTERVALO_SEGUNDOS cuando BARRIDO_ACTIVO=true; sirve para
+programarlo con cron en lugar del hilo del backend.
+
+Si otra instancia está barriendo (tiene el advisory lock) el script termina
+sin hacer nada.
+
+Uso:
+    python barrido_citas.py
+    python barrido_citas.py --max-lotes 10
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Agregar el directorio backend al path
+backend_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_dir))
+
+from services.barrido_service import ejecutar_barrido
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cierra las citas confirmadas vencidas")
+    parser.add_argument("--max-lotes", type=int, help="Número máximo de lotes en esta ejecución")
+    args = parser.parse_args()
+    
+    print("🧹 Barriendo citas vencidas...")
+    resultado = ejecutar_barrido(args.max_lotes)
+    
+    if not resultado["lider"]:
+        print("⚠️  Otra instancia está ejecutando el barrido; no se hizo nada")
+        return
+    
+    print(f"✅ Citas cerradas: {resultado['filas']} en {resultado['lotes']} lotes")
+    print(f"✅ Reservas sin pagar canceladas: {resultado['reservas_vencidas']}")
+    print(f"⏱️  Lag restante: {resultado['lag_segundos']} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Script para cargar los festivos nacionales de Colombia como excepciones de
+disponibilidad. Los festivos ya cargados se ignoran, así que se puede
+ejecutar varias veces (p. ej. una vez al año para el año siguiente).
+
+Solo afectan los horarios si APLICAR_FESTIVOS=true. Con el calendario
+materializado activo, se reconstruye al terminar.
+
+Uso:
+    python cargar_festivos.py
+    python cargar_festivos.py 2026 2027
+"""
+
+import sys
+import argparse
+from datetime import date
+from pathlib import Path
+
+# Agregar el directorio backend al path
+backend_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_dir))
+
+from config import settings
+from database import SessionLocal
+from repositories import ExcepcionRepository
+from services.calendario_service import reconstruir_calendario
+from utils.festivos import festivos_colombia
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga los festivos nacionales de Colombia")
+    parser.add_argument("anios", type=int, nargs="*", help="Años a cargar (por defecto, el actual y el siguiente)")
+    args = parser.parse_args()
+    
+    anio_actual = date.today().year
+    anios = args.anios or [anio_actual, anio_actual + 1]
+    
+    db = SessionLocal()
+    try:
+        for anio in anios:
+            festivos = festivos_colombia(anio)
+            creados = ExcepcionRepository.cargar_festivos(db, festivos)
+            print(f"🎉 {anio}: {len(festivos)} festivos, {creados} nuevos")
+        
+        if not settings.APLICAR_FESTIVOS:
+            print("⚠️  APLICAR_FESTIVOS está desactivado; los festivos no afectan los horarios")
+        elif settings.CALENDARIO_MATERIALIZADO:
+            print("📅 Reconstruyendo calendario materializado...")
+            resultado = reconstruir_calendario(db)
+            print(f"✅ Días escritos: {resultado['dias_escritos']}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
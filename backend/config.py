@@ -1,9 +1,15 @@
 import os
 from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from estados import EstadoCita
 
 load_dotenv()
 
-class Settings:
+class Settings(BaseModel):
+    # Los valores por defecto (leídos del entorno) también se validan
+    model_config = ConfigDict(validate_default=True)
+    
     # Configuración de la base de datos
     DATABASE_URL: str = os.getenv(
         "DATABASE_URL",
@@ -23,11 +29,63 @@ class Settings:
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api"
     
+    # Configuración de citas
+    # Duración máxima permitida para una cita. Acota la ventana que revisa la
+    # detección de conflictos sobre el índice (profesional_id, fecha_hora)
+    DURACION_MAXIMA_CITA_MINUTOS: int = int(os.getenv("DURACION_MAXIMA_CITA_MINUTOS", "480"))
+    # Número máximo de citas que se pueden crear en una serie recurrente
+    MAX_OCURRENCIAS_SERIE: int = int(os.getenv("MAX_OCURRENCIAS_SERIE", "52"))
+    # Cuántas solicitudes de la lista de espera reciben la oferta de un horario liberado
+    LISTA_ESPERA_OFERTAS: int = int(os.getenv("LISTA_ESPERA_OFERTAS", "3"))
+    
+    # Zona horaria en la que se interpretan los horarios de Disponibilidad
+    ZONA_HORARIA: str = os.getenv("ZONA_HORARIA", "America/Bogota")
+    # Horario usado cuando el profesional no ha configurado su disponibilidad
+    HORA_INICIO_POR_DEFECTO: str = os.getenv("HORA_INICIO_POR_DEFECTO", "08:00")
+    HORA_FIN_POR_DEFECTO: str = os.getenv("HORA_FIN_POR_DEFECTO", "18:00")
+    # Segundos que una plantilla semanal compilada vive en memoria. Los cambios
+    # de disponibilidad la invalidan en el proceso que los recibe; en otras
+    # instancias del backend se notan a más tardar tras este tiempo
+    PLANTILLAS_CACHE_SEGUNDOS: int = int(os.getenv("PLANTILLAS_CACHE_SEGUNDOS", "300"))
+    # Festivos nacionales de Colombia cargados con cargar_festivos.py: si está
+    # activo, ningún profesional atiende esos días salvo con un turno extra
+    APLICAR_FESTIVOS: bool = os.getenv("APLICAR_FESTIVOS", "false").lower() == "true"
+    
+    # Retenciones temporales de horarios durante la reserva y el pago
+    # RETENCIONES_BACKEND: "memoria" (un solo proceso) o "redis" (compartido, requiere REDIS_URL)
+    RETENCIONES_BACKEND: str = os.getenv("RETENCIONES_BACKEND", "memoria")
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    RETENCION_TTL_SEGUNDOS: int = int(os.getenv("RETENCION_TTL_SEGUNDOS", "600"))
+    RETENCION_GRANULARIDAD_MINUTOS: int = int(os.getenv("RETENCION_GRANULARIDAD_MINUTOS", "5"))
+    
+    # Barrido periódico de citas confirmadas que ya terminaron
+    BARRIDO_ACTIVO: bool = os.getenv("BARRIDO_ACTIVO", "false").lower() == "true"
+    BARRIDO_INTERVALO_SEGUNDOS: int = int(os.getenv("BARRIDO_INTERVALO_SEGUNDOS", "300"))
+    BARRIDO_LOTE: int = int(os.getenv("BARRIDO_LOTE", "500"))
+    # Minutos que se esperan tras el fin de la cita antes de cerrarla
+    BARRIDO_MARGEN_MINUTOS: int = int(os.getenv("BARRIDO_MARGEN_MINUTOS", "60"))
+    BARRIDO_ESTADO_DESTINO: str = os.getenv("BARRIDO_ESTADO_DESTINO", "completada")
+    
+    # Calendario materializado de horarios libres (opcional)
+    CALENDARIO_MATERIALIZADO: bool = os.getenv("CALENDARIO_MATERIALIZADO", "false").lower() == "true"
+    CALENDARIO_SEMANAS: int = int(os.getenv("CALENDARIO_SEMANAS", "8"))
+    
     # Configuración de PayPal
     # Para desarrollo, usa el sandbox de PayPal
     # Obtén tus credenciales en: https://developer.paypal.com/
     PAYPAL_MODE: str = os.getenv("PAYPAL_MODE", "sandbox")  # sandbox o live
     PAYPAL_CLIENT_ID: str = os.getenv("PAYPAL_CLIENT_ID", "")
     PAYPAL_CLIENT_SECRET: str = os.getenv("PAYPAL_CLIENT_SECRET", "")
+    
+    @field_validator("BARRIDO_ESTADO_DESTINO")
+    @classmethod
+    def validar_estado_destino(cls, valor: str) -> str:
+        """Debe ser un estado de EstadoCita (nombre sin importar mayúsculas)"""
+        if valor.upper() not in EstadoCita.__members__:
+            raise ValueError(
+                f"BARRIDO_ESTADO_DESTINO inválido: {valor!r}. "
+                f"Opciones: {[e.name.lower() for e in EstadoCita]}"
+            )
+        return valor.lower()
 
 settings = Settings()
@@ -39,6 +39,17 @@ def init_db():
     print("✅ Base de datos inicializada correctamente")
 
 
+def sincronizar_zona_horaria():
+    """
+    Vuelve a crear zona_horaria_por_defecto() con settings.ZONA_HORARIA para
+    que los triggers y resúmenes usen la misma zona que el backend.
+    """
+    from sqlalchemy import text
+    from models import ddl_zona_horaria_por_defecto
+    with engine.begin() as conn:
+        conn.execute(text(ddl_zona_horaria_por_defecto(settings.ZONA_HORARIA)))
+
+
 def drop_db():
     """
     Elimina todas las tablas de la base de datos.
@@ -0,0 +1,13 @@
+"""
+Estados de una cita. Viven fuera de models.py para que config.py pueda
+validar BARRIDO_ESTADO_DESTINO sin importar models (que importa config).
+models los re-exporta: `from models import EstadoCita` sigue funcionando.
+"""
+import enum
+
+
+class EstadoCita(str, enum.Enum):
+    PENDIENTE = "pendiente"
+    CONFIRMADA = "confirmada"
+    CANCELADA = "cancelada"
+    COMPLETADA = "completada"
@@ -1,14 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import threading
 import uvicorn
 import os
 
-from routes import auth, profesionales, citas, pagos, perfil, notificaciones
+from config import settings
+from database import sincronizar_zona_horaria
+from routes import auth, profesionales, citas, pagos, perfil, notificaciones, lista_espera, clientes
+from services.barrido_service import iniciar_barrido_periodico
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # La zona por defecto de los triggers sale de ZONA_HORARIA
+    try:
+        sincronizar_zona_horaria()
+    except Exception as e:
+        print(f"⚠️ No se pudo sincronizar zona_horaria_por_defecto(): {e}")
+    
+    # Barrido periódico de citas vencidas (solo una instancia lo ejecuta a la vez)
+    detener = threading.Event()
+    if settings.BARRIDO_ACTIVO:
+        iniciar_barrido_periodico(detener)
+    yield
+    detener.set()
+
 
 app = FastAPI(
     title="Tiiwa - API de Gestión de Citas",
     description="API para el sistema de gestión de citas médicas",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Obtener FRONTEND_URL de variable de entorno o usar localhost por defecto
@@ -46,6 +69,8 @@ app.include_router(citas.router)
 app.include_router(pagos.router)
 app.include_router(perfil.router)
 app.include_router(notificaciones.router)
+app.include_router(lista_espera.router)
+app.include_router(clientes.router)
 
 @app.get("/")
 def read_root():
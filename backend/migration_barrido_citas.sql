@@ -0,0 +1,15 @@
+-- Migración: Índice para el barrido de citas confirmadas vencidas
+-- Fecha: 2026-10-18
+
+-- El barrido recorre las citas CONFIRMADA por (fecha_hora, id) en lotes.
+-- El índice parcial solo contiene las confirmadas, así que se achica a medida
+-- que el barrido las cierra.
+CREATE INDEX IF NOT EXISTS ix_citas_confirmadas_fecha_hora
+    ON citas (fecha_hora, id)
+    WHERE estado = 'CONFIRMADA';
+
+-- Verificar que el índice se creó correctamente
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'citas'
+AND indexname = 'ix_citas_confirmadas_fecha_hora';
@@ -0,0 +1,18 @@
+-- Migración: Calendario materializado de horarios libres
+-- Fecha: 2026-10-18
+
+-- Una fila por profesional y día con los minutos libres como mapa de 1440 bits
+-- (180 bytes). Se mantiene de forma incremental al agendar, cancelar, reagendar
+-- o cambiar la disponibilidad; python reconstruir_calendario.py repara desvíos.
+CREATE TABLE IF NOT EXISTS calendario_disponible (
+    profesional_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    fecha DATE NOT NULL,
+    minutos_libres BYTEA NOT NULL,
+    actualizado_en TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (profesional_id, fecha)
+);
+
+-- Verificar que la tabla se creó correctamente
+SELECT column_name, data_type
+FROM information_schema.columns
+WHERE table_name = 'calendario_disponible';
@@ -0,0 +1,11 @@
+-- Migración: Series de citas recurrentes
+-- Fecha: 2026-10-18
+
+-- Las citas creadas juntas por POST /api/citas/agendar-serie comparten serie_id
+ALTER TABLE citas
+ADD COLUMN IF NOT EXISTS serie_id VARCHAR(36);
+
+CREATE INDEX IF NOT EXISTS ix_citas_serie_id ON citas (serie_id);
+
+-- Comentarios
+COMMENT ON COLUMN citas.serie_id IS 'Identificador de la serie recurrente a la que pertenece la cita';
@@ -0,0 +1,41 @@
+-- Migración: Disponibilidad en minutos desde la medianoche
+-- Fecha: 2026-10-18
+
+-- hora_inicio / hora_fin ("09:00") pasan a minuto_inicio / minuto_fin (540).
+-- Las plantillas semanales se compilan directamente de estos enteros.
+ALTER TABLE disponibilidad
+ADD COLUMN IF NOT EXISTS minuto_inicio INTEGER,
+ADD COLUMN IF NOT EXISTS minuto_fin INTEGER;
+
+-- Acepta "HH:MM" y "HH:MM:SS", que algunos registros antiguos guardan
+UPDATE disponibilidad
+SET minuto_inicio = split_part(hora_inicio::text, ':', 1)::int * 60 + split_part(hora_inicio::text, ':', 2)::int,
+    minuto_fin = split_part(hora_fin::text, ':', 1)::int * 60 + split_part(hora_fin::text, ':', 2)::int
+WHERE minuto_inicio IS NULL;
+
+-- Antes de continuar, revisar bloques inválidos (inicio >= fin).
+-- Si esta consulta devuelve filas, corregirlas o eliminarlas primero.
+SELECT id, profesional_id, dia_semana, hora_inicio, hora_fin
+FROM disponibilidad
+WHERE NOT (minuto_inicio >= 0 AND minuto_inicio < minuto_fin AND minuto_fin <= 1440);
+
+ALTER TABLE disponibilidad
+ALTER COLUMN minuto_inicio SET NOT NULL,
+ALTER COLUMN minuto_fin SET NOT NULL;
+
+ALTER TABLE disponibilidad
+ADD CONSTRAINT ck_disponibilidad_minutos
+    CHECK (minuto_inicio >= 0 AND minuto_inicio < minuto_fin AND minuto_fin <= 1440);
+
+ALTER TABLE disponibilidad
+DROP COLUMN IF EXISTS hora_inicio,
+DROP COLUMN IF EXISTS hora_fin;
+
+CREATE INDEX IF NOT EXISTS ix_disponibilidad_profesional_dia
+    ON disponibilidad (profesional_id, dia_semana);
+
+-- Verificar la estructura final
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'disponibilidad'
+ORDER BY ordinal_position;
@@ -0,0 +1,42 @@
+-- Migración: Excepciones de disponibilidad por fecha (bloqueos, turnos extra y festivos)
+-- Fecha: 2026-10-18
+
+-- btree_gist permite combinar profesional_id con el rango de fechas en un índice GiST
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- tipo guarda el nombre del enum: BLOQUEO, TURNO_EXTRA o FESTIVO.
+-- profesional_id NULL = festivo nacional (ver cargar_festivos.py)
+CREATE TABLE IF NOT EXISTS excepciones_disponibilidad (
+    id SERIAL PRIMARY KEY,
+    profesional_id INTEGER REFERENCES users(id),
+    tipo VARCHAR(20) NOT NULL,
+    fecha_desde DATE NOT NULL,
+    fecha_hasta DATE NOT NULL,
+    minuto_inicio INTEGER,
+    minuto_fin INTEGER,
+    motivo VARCHAR(255),
+    rango DATERANGE GENERATED ALWAYS AS (daterange(fecha_desde, fecha_hasta, '[]')) STORED,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT ck_excepciones_fechas CHECK (fecha_hasta >= fecha_desde),
+    CONSTRAINT ck_excepciones_minutos CHECK (
+        (minuto_inicio IS NULL AND minuto_fin IS NULL) OR
+        (minuto_inicio >= 0 AND minuto_inicio < minuto_fin AND minuto_fin <= 1440)
+    )
+);
+
+CREATE INDEX IF NOT EXISTS ix_excepciones_disponibilidad_id
+    ON excepciones_disponibilidad (id);
+
+-- Las excepciones de un rango de días se leen con "rango && daterange(...)"
+CREATE INDEX IF NOT EXISTS ix_excepciones_profesional_rango
+    ON excepciones_disponibilidad USING gist (profesional_id, rango);
+
+-- Un festivo por fecha: cargar_festivos.py ignora los que ya existen
+CREATE UNIQUE INDEX IF NOT EXISTS ux_excepciones_festivo_fecha
+    ON excepciones_disponibilidad (fecha_desde)
+    WHERE profesional_id IS NULL;
+
+-- Verificar
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'excepciones_disponibilidad';
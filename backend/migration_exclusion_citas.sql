@@ -0,0 +1,40 @@
+-- Migración: Restricción de exclusión para evitar citas solapadas
+-- Fecha: 2026-10-18
+
+-- btree_gist permite combinar "profesional_id WITH =" con rangos en un índice GiST
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- timestamptz + interval es STABLE en PostgreSQL porque los intervalos en días
+-- dependen de la zona horaria. Aquí solo se suman minutos, así que el resultado
+-- no depende de la zona y la función se puede declarar IMMUTABLE.
+CREATE OR REPLACE FUNCTION cita_periodo(inicio TIMESTAMPTZ, duracion INTEGER)
+RETURNS TSTZRANGE
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT tstzrange(inicio, inicio + make_interval(mins => COALESCE(duracion, 60)), '[)')
+$$;
+
+ALTER TABLE citas
+ADD COLUMN IF NOT EXISTS periodo TSTZRANGE
+    GENERATED ALWAYS AS (cita_periodo(fecha_hora, duracion_minutos)) STORED;
+
+-- Antes de crear la restricción, revisar que no existan solapamientos activos.
+-- Si esta consulta devuelve filas, cancelar o reagendar esas citas primero.
+SELECT a.id AS cita_a, b.id AS cita_b, a.profesional_id, a.fecha_hora, b.fecha_hora
+FROM citas a
+JOIN citas b
+  ON a.profesional_id = b.profesional_id
+ AND a.id < b.id
+ AND a.periodo && b.periodo
+WHERE a.estado IN ('PENDIENTE', 'CONFIRMADA')
+  AND b.estado IN ('PENDIENTE', 'CONFIRMADA');
+
+-- Solo las citas activas ocupan el horario: las canceladas y completadas no cuentan
+ALTER TABLE citas
+ADD CONSTRAINT excl_citas_profesional_periodo
+    EXCLUDE USING gist (profesional_id WITH =, periodo WITH &&)
+    WHERE (estado IN ('PENDIENTE', 'CONFIRMADA'));
+
+-- Verificar que la restricción se creó correctamente
+SELECT conname, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE conname = 'excl_citas_profesional_periodo';
@@ -0,0 +1,14 @@
+-- Migración: Índice de citas por cliente y fecha
+-- Fecha: 2026-10-18
+
+-- GET /api/citas/mis-citas lista las citas del cliente de la más reciente a
+-- la más antigua y pagina por clave (fecha_hora, id). Con este índice cada
+-- página es un recorrido acotado del historial del cliente.
+CREATE INDEX IF NOT EXISTS ix_citas_cliente_fecha_hora_id
+    ON citas (cliente_id, fecha_hora, id);
+
+-- Verificar que el índice se creó correctamente
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'citas'
+AND indexname = 'ix_citas_cliente_fecha_hora_id';
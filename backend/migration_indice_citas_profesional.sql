@@ -0,0 +1,14 @@
+-- Migración: Índice de citas por profesional y fecha para la detección de conflictos
+-- Fecha: 2026-10-18
+
+-- La verificación de solapamientos busca solo las citas que empiezan dentro de
+-- la ventana [inicio - DURACION_MAXIMA_CITA_MINUTOS, fin). Con este índice esa
+-- búsqueda es un range scan acotado en lugar de leer toda la agenda.
+CREATE INDEX IF NOT EXISTS ix_citas_profesional_fecha_hora
+    ON citas (profesional_id, fecha_hora);
+
+-- Verificar que el índice se creó correctamente
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'citas'
+AND indexname = 'ix_citas_profesional_fecha_hora';
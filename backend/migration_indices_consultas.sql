@@ -0,0 +1,45 @@
+-- Migración: Índices compuestos y parciales para las consultas frecuentes
+-- Fecha: 2026-10-18
+
+-- Ya existen (migraciones anteriores o restricciones UNIQUE):
+--   citas (profesional_id, fecha_hora)         ix_citas_profesional_fecha_hora
+--   citas (cliente_id, fecha_hora, id)         ix_citas_cliente_fecha_hora_id
+--   perfiles_profesionales (usuario_id)        índice de la restricción UNIQUE
+--   pagos (cita_id)                            índice de la restricción UNIQUE
+-- Se comprueban al final; no se duplican aquí.
+
+-- Detección de conflictos y horarios libres: solo citas activas. El índice
+-- parcial es más pequeño que el completo y la duración incluida permite
+-- responder sin leer la tabla (index-only scan).
+CREATE INDEX IF NOT EXISTS ix_citas_activas_profesional_fecha_hora
+    ON citas (profesional_id, fecha_hora)
+    INCLUDE (duracion_minutos)
+    WHERE estado IN ('PENDIENTE', 'CONFIRMADA');
+
+-- Ingresos, historial de pagos y pacientes cruzan citas con pagos filtrando
+-- por estado; con el monto incluido la suma no lee la tabla de pagos.
+CREATE INDEX IF NOT EXISTS ix_pagos_cita_estado
+    ON pagos (cita_id, estado)
+    INCLUDE (monto);
+
+-- Bandeja de notificaciones del usuario y conteo de no leídas
+CREATE INDEX IF NOT EXISTS ix_notificaciones_usuario_leida_created_at
+    ON notificaciones (usuario_id, leida, created_at);
+
+-- Favoritos de un cliente, "¿es favorito?" y popularidad de un profesional
+CREATE INDEX IF NOT EXISTS ix_favoritos_cliente_profesional
+    ON favoritos (cliente_id, profesional_id);
+CREATE INDEX IF NOT EXISTS ix_favoritos_profesional
+    ON favoritos (profesional_id);
+
+-- Estadísticas actualizadas para que el planificador use los índices nuevos
+ANALYZE citas;
+ANALYZE pagos;
+ANALYZE notificaciones;
+ANALYZE favoritos;
+
+-- Verificar que los índices existen (nuevos y previos)
+SELECT tablename, indexname, indexdef
+FROM pg_indexes
+WHERE tablename IN ('citas', 'pagos', 'notificaciones', 'favoritos', 'perfiles_profesionales')
+ORDER BY tablename, indexname;
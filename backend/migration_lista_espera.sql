@@ -0,0 +1,35 @@
+-- Migración: Lista de espera por profesional y ventana de tiempo
+-- Fecha: 2026-10-18
+
+-- El índice combina un entero con un rango en GiST: requiere btree_gist
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- estado guarda el nombre del enum: ACTIVA, ATENDIDA o CANCELADA
+CREATE TABLE IF NOT EXISTS lista_espera (
+    id SERIAL PRIMARY KEY,
+    cliente_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    profesional_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    desde TIMESTAMP WITH TIME ZONE NOT NULL,
+    hasta TIMESTAMP WITH TIME ZONE NOT NULL,
+    duracion_minutos INTEGER DEFAULT 60,
+    prioridad INTEGER DEFAULT 0,
+    estado VARCHAR(20) DEFAULT 'ACTIVA',
+    ventana TSTZRANGE GENERATED ALWAYS AS (tstzrange(desde, hasta, '[)')) STORED,
+    ultima_oferta_en TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT ck_lista_espera_ventana CHECK (hasta > desde),
+    CONSTRAINT ck_lista_espera_estado CHECK (estado IN ('ACTIVA', 'ATENDIDA', 'CANCELADA'))
+);
+
+-- Al cancelarse una cita, las solicitudes activas que cubren su horario se
+-- buscan con ventana && [inicio, fin) sobre este índice en lugar de recorrer la tabla
+CREATE INDEX IF NOT EXISTS ix_lista_espera_profesional_ventana
+    ON lista_espera USING gist (profesional_id, ventana)
+    WHERE estado = 'ACTIVA';
+
+CREATE INDEX IF NOT EXISTS ix_lista_espera_cliente ON lista_espera (cliente_id);
+
+-- Verificar que se creó correctamente
+SELECT column_name, data_type
+FROM information_schema.columns
+WHERE table_name = 'lista_espera';
@@ -0,0 +1,14 @@
+-- Migración: Índice para el listado de citas del administrador
+-- Fecha: 2026-10-18
+
+-- GET /api/citas/admin/todas pagina por clave (fecha_hora, id) de la más
+-- reciente a la más antigua. Con este índice cada página es un recorrido
+-- acotado (hacia atrás) en lugar de ordenar toda la tabla.
+CREATE INDEX IF NOT EXISTS ix_citas_fecha_hora_id
+    ON citas (fecha_hora, id);
+
+-- Verificar que el índice se creó correctamente
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'citas'
+AND indexname = 'ix_citas_fecha_hora_id';
@@ -0,0 +1,19 @@
+-- Migración: Búsqueda de pacientes por nombre o email
+-- Fecha: 2026-10-18
+
+-- GET /api/profesionales/dashboard/pacientes?busqueda=... filtra con
+-- LIKE '%texto%' sobre "nombre apellido email" en minúsculas. Un índice
+-- trigram (pg_trgm) permite resolver ese LIKE sin recorrer toda la tabla.
+-- La expresión debe ser idéntica a models.texto_busqueda_usuario
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS ix_users_busqueda_trgm
+    ON users USING gin (
+        lower(coalesce(nombre, '') || ' ' || coalesce(apellido, '') || ' ' || email) gin_trgm_ops
+    );
+
+-- Verificar que el índice se creó correctamente
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'users'
+AND indexname = 'ix_users_busqueda_trgm';
@@ -0,0 +1,21 @@
+-- Migración: Índices para la paginación por cursor
+-- Fecha: 2026-10-18
+
+-- Ya existen (migraciones anteriores):
+--   citas (fecha_hora, id)                     ix_citas_fecha_hora_id          (admin/todas)
+--   citas (cliente_id, fecha_hora, id)         ix_citas_cliente_fecha_hora_id  (mis-citas)
+--   users (id)                                 clave primaria                  (/api/auth/users)
+
+-- Listado público de profesionales: ORDER BY calificación DESC, id DESC y
+-- páginas WHERE (calificación, id) < (:calificacion, :id)
+CREATE INDEX IF NOT EXISTS ix_perfiles_calificacion_id
+    ON perfiles_profesionales ((COALESCE(calificacion_promedio, 0)), id);
+
+-- Bandeja de notificaciones sin filtro de leída, por (created_at, id)
+CREATE INDEX IF NOT EXISTS ix_notificaciones_usuario_created_at_id
+    ON notificaciones (usuario_id, created_at, id);
+
+-- Verificar
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE indexname IN ('ix_perfiles_calificacion_id', 'ix_notificaciones_usuario_created_at_id');
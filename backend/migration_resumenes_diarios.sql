@@ -0,0 +1,163 @@
+-- Migración: Resúmenes diarios de citas y pagos por profesional
+-- Fecha: 2026-10-18
+
+-- Una fila por (profesional, día local, estado) con la cantidad y la suma de
+-- montos. El dashboard lee estas filas en lugar de recorrer todo el
+-- historial de citas y pagos. estado guarda el nombre del enum
+-- (PENDIENTE, CONFIRMADA, ... / PENDIENTE, COMPLETADO, ...).
+CREATE TABLE IF NOT EXISTS resumen_citas_diario (
+    profesional_id INTEGER NOT NULL REFERENCES users(id),
+    dia DATE NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+    monto INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (profesional_id, dia, estado)
+);
+
+CREATE TABLE IF NOT EXISTS resumen_pagos_diario (
+    profesional_id INTEGER NOT NULL REFERENCES users(id),
+    dia DATE NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+    monto INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (profesional_id, dia, estado)
+);
+
+-- Suma (o resta, con valores negativos) una cita al resumen de su día
+CREATE OR REPLACE FUNCTION resumen_citas_sumar(
+    p_profesional INTEGER, p_dia DATE, p_estado TEXT, p_cantidad INTEGER, p_monto INTEGER
+)
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_dia IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO resumen_citas_diario (profesional_id, dia, estado, cantidad, monto)
+    VALUES (p_profesional, p_dia, p_estado, p_cantidad, p_monto)
+    ON CONFLICT (profesional_id, dia, estado) DO UPDATE
+    SET cantidad = resumen_citas_diario.cantidad + EXCLUDED.cantidad,
+        monto = resumen_citas_diario.monto + EXCLUDED.monto;
+END
+$$;
+
+-- Cada cambio resta la fila anterior y suma la nueva, en la misma transacción.
+-- fecha_local ya viene calculada por trg_citas_fecha_local (BEFORE)
+CREATE OR REPLACE FUNCTION cita_actualizar_resumen()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND OLD.profesional_id = NEW.profesional_id
+        AND OLD.fecha_local IS NOT DISTINCT FROM NEW.fecha_local
+        AND OLD.estado::text IS NOT DISTINCT FROM NEW.estado::text
+        AND OLD.precio IS NOT DISTINCT FROM NEW.precio THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM resumen_citas_sumar(
+            OLD.profesional_id, OLD.fecha_local, COALESCE(OLD.estado::text, 'PENDIENTE'),
+            -1, -COALESCE(OLD.precio, 0)
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM resumen_citas_sumar(
+            NEW.profesional_id, NEW.fecha_local, COALESCE(NEW.estado::text, 'PENDIENTE'),
+            1, COALESCE(NEW.precio, 0)
+        );
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_citas_resumen ON citas;
+CREATE TRIGGER trg_citas_resumen
+AFTER INSERT OR DELETE OR UPDATE OF estado, fecha_hora, profesional_id, precio ON citas
+FOR EACH ROW EXECUTE FUNCTION cita_actualizar_resumen();
+
+-- El día de un pago es su fecha (o la de la cita si no tiene) en la zona del
+-- profesional (zona_horaria_por_defecto() si no tiene, ver
+-- migration_zona_horaria_citas.sql)
+CREATE OR REPLACE FUNCTION resumen_pagos_sumar(
+    p_cita INTEGER, p_creado TIMESTAMPTZ, p_estado TEXT, p_cantidad INTEGER, p_monto INTEGER
+)
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO resumen_pagos_diario (profesional_id, dia, estado, cantidad, monto)
+    SELECT
+        c.profesional_id,
+        (COALESCE(p_creado, c.fecha_hora) AT TIME ZONE COALESCE(pp.zona_horaria, zona_horaria_por_defecto()))::date,
+        p_estado,
+        p_cantidad,
+        p_monto
+    FROM citas c
+    LEFT JOIN perfiles_profesionales pp ON pp.usuario_id = c.profesional_id
+    WHERE c.id = p_cita
+    ON CONFLICT (profesional_id, dia, estado) DO UPDATE
+    SET cantidad = resumen_pagos_diario.cantidad + EXCLUDED.cantidad,
+        monto = resumen_pagos_diario.monto + EXCLUDED.monto;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION pago_actualizar_resumen()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND OLD.cita_id = NEW.cita_id
+        AND OLD.created_at IS NOT DISTINCT FROM NEW.created_at
+        AND OLD.estado::text IS NOT DISTINCT FROM NEW.estado::text
+        AND OLD.monto = NEW.monto THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM resumen_pagos_sumar(
+            OLD.cita_id, OLD.created_at, COALESCE(OLD.estado::text, 'PENDIENTE'), -1, -OLD.monto
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM resumen_pagos_sumar(
+            NEW.cita_id, NEW.created_at, COALESCE(NEW.estado::text, 'PENDIENTE'), 1, NEW.monto
+        );
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_pagos_resumen ON pagos;
+CREATE TRIGGER trg_pagos_resumen
+AFTER INSERT OR DELETE OR UPDATE OF estado, monto, cita_id, created_at ON pagos
+FOR EACH ROW EXECUTE FUNCTION pago_actualizar_resumen();
+
+-- Carga inicial (equivale a: python reconstruir_resumenes.py)
+BEGIN;
+LOCK TABLE resumen_citas_diario, resumen_pagos_diario IN SHARE ROW EXCLUSIVE MODE;
+DELETE FROM resumen_citas_diario;
+DELETE FROM resumen_pagos_diario;
+
+INSERT INTO resumen_citas_diario (profesional_id, dia, estado, cantidad, monto)
+SELECT profesional_id, fecha_local, COALESCE(estado::text, 'PENDIENTE'), COUNT(*), COALESCE(SUM(precio), 0)
+FROM citas
+WHERE fecha_local IS NOT NULL
+GROUP BY 1, 2, 3;
+
+INSERT INTO resumen_pagos_diario (profesional_id, dia, estado, cantidad, monto)
+SELECT
+    c.profesional_id,
+    (COALESCE(p.created_at, c.fecha_hora) AT TIME ZONE COALESCE(pp.zona_horaria, zona_horaria_por_defecto()))::date,
+    COALESCE(p.estado::text, 'PENDIENTE'),
+    COUNT(*),
+    SUM(p.monto)
+FROM pagos p
+JOIN citas c ON c.id = p.cita_id
+LEFT JOIN perfiles_profesionales pp ON pp.usuario_id = c.profesional_id
+GROUP BY 1, 2, 3;
+COMMIT;
+
+-- Verificar: los totales deben coincidir con las tablas de origen
+SELECT
+    (SELECT COUNT(*) FROM citas WHERE fecha_local IS NOT NULL) AS citas,
+    (SELECT COALESCE(SUM(cantidad), 0) FROM resumen_citas_diario) AS citas_resumidas,
+    (SELECT COUNT(*) FROM pagos) AS pagos,
+    (SELECT COALESCE(SUM(cantidad), 0) FROM resumen_pagos_diario) AS pagos_resumidos;
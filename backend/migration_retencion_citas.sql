@@ -0,0 +1,25 @@
+-- Migración: Retención de las citas agendadas sin pagar
+-- Fecha: 2026-10-18
+
+-- Una cita agendada desde el flujo de reserva retiene el horario solo hasta
+-- que vence su retención (retenida_hasta). Al pagarse se limpian las dos
+-- columnas; si vence sin pago, el barrido la cancela y libera el horario.
+ALTER TABLE citas ADD COLUMN IF NOT EXISTS retencion_id VARCHAR(36);
+ALTER TABLE citas ADD COLUMN IF NOT EXISTS retenida_hasta TIMESTAMPTZ;
+
+-- El barrido busca las reservas vencidas sobre este índice parcial, que solo
+-- contiene las citas pendientes de pago
+CREATE INDEX IF NOT EXISTS ix_citas_pendientes_retenida_hasta
+    ON citas (retenida_hasta, id)
+    WHERE estado = 'PENDIENTE' AND retenida_hasta IS NOT NULL;
+
+-- Verificar que las columnas y el índice se crearon correctamente
+SELECT column_name, data_type
+FROM information_schema.columns
+WHERE table_name = 'citas'
+AND column_name IN ('retencion_id', 'retenida_hasta');
+
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'citas'
+AND indexname = 'ix_citas_pendientes_retenida_hasta';
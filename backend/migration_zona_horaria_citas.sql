@@ -0,0 +1,55 @@
+-- Migración: Zona horaria del profesional y día local de cada cita
+-- Fecha: 2026-10-18
+
+-- Zona IANA del profesional. NULL usa ZONA_HORARIA (America/Bogota)
+ALTER TABLE perfiles_profesionales
+ADD COLUMN IF NOT EXISTS zona_horaria VARCHAR(50);
+
+-- Zona de los profesionales sin zona_horaria, en un solo lugar para todos los
+-- triggers y consultas. El backend la vuelve a crear al iniciar con
+-- ZONA_HORARIA (database.sincronizar_zona_horaria), así que este valor solo
+-- rige hasta el primer arranque
+CREATE OR REPLACE FUNCTION zona_horaria_por_defecto()
+RETURNS TEXT
+LANGUAGE sql STABLE AS $$
+    SELECT 'America/Bogota'::text
+$$;
+
+-- Día de la cita en la zona del profesional. "Citas del día X" pasa a ser
+-- una igualdad sobre esta columna en lugar de calcular los límites del día
+ALTER TABLE citas
+ADD COLUMN IF NOT EXISTS fecha_local DATE;
+
+-- El trigger mantiene fecha_local en cualquier escritura (ORM, INSERT masivo
+-- de series o SQL manual)
+CREATE OR REPLACE FUNCTION cita_asignar_fecha_local()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.fecha_local := (NEW.fecha_hora AT TIME ZONE COALESCE(
+        (SELECT zona_horaria FROM perfiles_profesionales WHERE usuario_id = NEW.profesional_id),
+        zona_horaria_por_defecto()
+    ))::date;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_citas_fecha_local ON citas;
+CREATE TRIGGER trg_citas_fecha_local
+BEFORE INSERT OR UPDATE OF fecha_hora, profesional_id ON citas
+FOR EACH ROW EXECUTE FUNCTION cita_asignar_fecha_local();
+
+-- Completar las citas existentes
+UPDATE citas c
+SET fecha_local = (c.fecha_hora AT TIME ZONE COALESCE(p.zona_horaria, zona_horaria_por_defecto()))::date
+FROM citas c2
+LEFT JOIN perfiles_profesionales p ON p.usuario_id = c2.profesional_id
+WHERE c2.id = c.id;
+
+CREATE INDEX IF NOT EXISTS ix_citas_profesional_fecha_local
+    ON citas (profesional_id, fecha_local, fecha_hora);
+
+-- Verificar que no quedaron citas sin día local
+SELECT COUNT(*) AS citas_sin_fecha_local
+FROM citas
+WHERE fecha_local IS NULL;
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Text, LargeBinary, Index, CheckConstraint, Computed, DDL, FetchedValue, event, text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import DATERANGE, TSTZRANGE, ExcludeConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
 
+from config import settings
 from database import Base
+from estados import EstadoCita
 
 
 class TipoUsuario(str, enum.Enum):
@@ -13,6 +16,15 @@ class TipoUsuario(str, enum.Enum):
     ADMIN = "admin"
 
 
+def texto_busqueda_usuario(nombre, apellido, email):
+    """
+    "nombre apellido email" en minúsculas. Lo usan el índice trigram de users
+    y las búsquedas por nombre o email, que deben escribir la misma expresión
+    para que PostgreSQL use el índice
+    """
+    return func.lower(func.coalesce(nombre, "") + " " + func.coalesce(apellido, "") + " " + email)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -55,11 +67,28 @@ class User(Base):
     # Si es profesional
     perfil_profesional = relationship("PerfilProfesional", back_populates="usuario", uselist=False)
     citas_profesional = relationship("Cita", back_populates="profesional", foreign_keys="Cita.profesional_id")
-
+    
+    __table_args__ = (
+        # Búsqueda de pacientes por nombre o email (LIKE '%texto%') con pg_trgm
+        Index(
+            "ix_users_busqueda_trgm",
+            texto_busqueda_usuario(nombre, apellido, email).label("busqueda"),
+            postgresql_using="gin",
+            postgresql_ops={"busqueda": "gin_trgm_ops"}
+        ),
+    )
+    
     def __repr__(self):
         return f"<User(email='{self.email}', tipo='{self.tipo_usuario}')>"
 
 
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+
+
 class PerfilProfesional(Base):
     __tablename__ = "perfiles_profesionales"
 
@@ -77,6 +106,7 @@ class PerfilProfesional(Base):
     licencia = Column(String(100))  # Número de licencia profesional
     educacion = Column(Text)  # Formación académica
     idiomas = Column(Text)  # Idiomas separados por comas
+    zona_horaria = Column(String(50))  # Zona IANA (p. ej. "America/Bogota"); NULL usa ZONA_HORARIA
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -85,17 +115,15 @@ class PerfilProfesional(Base):
     usuario = relationship("User", back_populates="perfil_profesional")
     disponibilidad = relationship("Disponibilidad", back_populates="profesional")
     
+    __table_args__ = (
+        # Listado de profesionales por calificación, paginado por (calificación, id)
+        Index("ix_perfiles_calificacion_id", func.coalesce(calificacion_promedio, 0), id),
+    )
+    
     def __repr__(self):
         return f"<PerfilProfesional(id={self.id}, especialidad='{self.especialidad}')>"
 
 
-class EstadoCita(str, enum.Enum):
-    PENDIENTE = "pendiente"
-    CONFIRMADA = "confirmada"
-    CANCELADA = "cancelada"
-    COMPLETADA = "completada"
-
-
 class Cita(Base):
     __tablename__ = "citas"
 
@@ -108,6 +136,15 @@ class Cita(Base):
     motivo = Column(Text)
     notas = Column(Text)
     precio = Column(Integer)  # En pesos colombianos
+    serie_id = Column(String(36), index=True)  # Citas creadas juntas como serie recurrente
+    # Cita agendada sin pagar: retiene el horario hasta `retenida_hasta`; si
+    # para entonces no se pagó, el barrido la cancela. El pago la limpia
+    retencion_id = Column(String(36))
+    retenida_hasta = Column(DateTime(timezone=True))
+    # Rango [fecha_hora, fecha_hora + duracion) calculado por PostgreSQL
+    periodo = Column(TSTZRANGE, Computed("cita_periodo(fecha_hora, duracion_minutos)", persisted=True))
+    # Día de la cita en la zona horaria del profesional, lo asigna un trigger
+    fecha_local = Column(Date, server_default=FetchedValue(), server_onupdate=FetchedValue())
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -117,10 +154,126 @@ class Cita(Base):
     profesional = relationship("User", back_populates="citas_profesional", foreign_keys=[profesional_id])
     pago = relationship("Pago", back_populates="cita", uselist=False)
 
+    __table_args__ = (
+        # Índice ordenado por profesional y fecha: la detección de conflictos
+        # lo recorre como un índice de intervalos (ver CitaRepository.verificar_conflicto)
+        Index("ix_citas_profesional_fecha_hora", "profesional_id", "fecha_hora"),
+        # "Citas del día X en mi zona horaria" es un rango sobre este índice
+        Index("ix_citas_profesional_fecha_local", "profesional_id", "fecha_local", "fecha_hora"),
+        # Listado de administración: paginación por clave (fecha_hora, id)
+        Index("ix_citas_fecha_hora_id", "fecha_hora", "id"),
+        # Citas de un cliente, de la más reciente a la más antigua
+        Index("ix_citas_cliente_fecha_hora_id", "cliente_id", "fecha_hora", "id"),
+        # Recorrido por clave del barrido de citas confirmadas vencidas
+        Index(
+            "ix_citas_confirmadas_fecha_hora",
+            "fecha_hora",
+            "id",
+            postgresql_where=text("estado = 'CONFIRMADA'")
+        ),
+        # Reservas sin pagar que el barrido cancela al vencer su retención
+        Index(
+            "ix_citas_pendientes_retenida_hasta",
+            "retenida_hasta",
+            "id",
+            postgresql_where=text("estado = 'PENDIENTE' AND retenida_hasta IS NOT NULL")
+        ),
+        # Conflictos y horarios libres solo miran citas activas: índice parcial
+        # que además incluye la duración para no leer la tabla
+        Index(
+            "ix_citas_activas_profesional_fecha_hora",
+            "profesional_id",
+            "fecha_hora",
+            postgresql_include=["duracion_minutos"],
+            postgresql_where=text("estado IN ('PENDIENTE', 'CONFIRMADA')")
+        ),
+        # La base de datos rechaza dos citas activas solapadas del mismo profesional
+        ExcludeConstraint(
+            ("profesional_id", "="),
+            ("periodo", "&&"),
+            name="excl_citas_profesional_periodo",
+            using="gist",
+            where=text("estado IN ('PENDIENTE', 'CONFIRMADA')")
+        ),
+    )
+
     def __repr__(self):
         return f"<Cita(id={self.id}, estado='{self.estado}')>"
 
 
+# Extensión y función que necesita la restricción de exclusión de citas.
+# Se crean antes de la tabla al usar init_db (ver migration_exclusion_citas.sql)
+event.listen(
+    Cita.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist")
+)
+event.listen(
+    Cita.__table__,
+    "before_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION cita_periodo(inicio TIMESTAMPTZ, duracion INTEGER)
+        RETURNS TSTZRANGE
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT tstzrange(inicio, inicio + make_interval(mins => COALESCE(duracion, 60)), '[)')
+        $$
+    """)
+)
+
+
+def ddl_zona_horaria_por_defecto(zona: str) -> str:
+    """
+    Función zona_horaria_por_defecto(): la zona de los profesionales sin
+    zona_horaria en los triggers y consultas SQL. Se crea con
+    settings.ZONA_HORARIA y el backend la vuelve a crear al iniciar
+    (database.sincronizar_zona_horaria), así la base de datos no repite el
+    valor en otro lugar.
+    """
+    zona = zona.replace("'", "''")
+    return f"""
+        CREATE OR REPLACE FUNCTION zona_horaria_por_defecto()
+        RETURNS TEXT
+        LANGUAGE sql STABLE AS $$
+            SELECT '{zona}'::text
+        $$
+    """
+
+
+event.listen(
+    PerfilProfesional.__table__,
+    "before_create",
+    DDL(ddl_zona_horaria_por_defecto(settings.ZONA_HORARIA))
+)
+# fecha_local se calcula en la base de datos para que toda escritura (ORM,
+# INSERT masivo o SQL manual) la mantenga. Ver migration_zona_horaria_citas.sql
+event.listen(
+    Cita.__table__,
+    "before_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION cita_asignar_fecha_local()
+        RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.fecha_local := (NEW.fecha_hora AT TIME ZONE COALESCE(
+                (SELECT zona_horaria FROM perfiles_profesionales WHERE usuario_id = NEW.profesional_id),
+                zona_horaria_por_defecto()
+            ))::date;
+            RETURN NEW;
+        END
+        $$
+    """)
+)
+event.listen(
+    Cita.__table__,
+    "after_create",
+    DDL("""
+        CREATE TRIGGER trg_citas_fecha_local
+        BEFORE INSERT OR UPDATE OF fecha_hora, profesional_id ON citas
+        FOR EACH ROW EXECUTE FUNCTION cita_asignar_fecha_local()
+    """)
+)
+
+
 class EstadoPago(str, enum.Enum):
     PENDIENTE = "pendiente"
     COMPLETADO = "completado"
@@ -144,10 +297,187 @@ class Pago(Base):
     # Relaciones
     cita = relationship("Cita", back_populates="pago")
 
+    __table_args__ = (
+        # Ingresos e historial cruzan citas con pagos filtrando por estado;
+        # el monto incluido permite sumar sin leer la tabla
+        Index("ix_pagos_cita_estado", "cita_id", "estado", postgresql_include=["monto"]),
+    )
+
     def __repr__(self):
         return f"<Pago(id={self.id}, monto={self.monto}, estado='{self.estado}')>"
 
 
+class ResumenCitaDiario(Base):
+    """
+    Citas de un profesional por día local y estado (cantidad y suma de
+    precios). Lo mantiene el trigger trg_citas_resumen en la misma
+    transacción que cambia la cita; reconstruir_resumenes.py lo recalcula.
+    """
+    __tablename__ = "resumen_citas_diario"
+
+    profesional_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    dia = Column(Date, primary_key=True)  # fecha_local de la cita
+    estado = Column(String(20), primary_key=True)  # Nombre del EstadoCita
+    cantidad = Column(Integer, nullable=False, default=0)
+    monto = Column(Integer, nullable=False, default=0)  # Suma de precios, en pesos colombianos
+
+    def __repr__(self):
+        return f"<ResumenCitaDiario(profesional_id={self.profesional_id}, dia={self.dia}, estado='{self.estado}')>"
+
+
+class ResumenPagoDiario(Base):
+    """
+    Pagos recibidos por un profesional por día local (fecha del pago en su
+    zona horaria) y estado. Lo mantiene el trigger trg_pagos_resumen.
+    """
+    __tablename__ = "resumen_pagos_diario"
+
+    profesional_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    dia = Column(Date, primary_key=True)
+    estado = Column(String(20), primary_key=True)  # Nombre del EstadoPago
+    cantidad = Column(Integer, nullable=False, default=0)
+    monto = Column(Integer, nullable=False, default=0)  # En pesos colombianos
+
+    def __repr__(self):
+        return f"<ResumenPagoDiario(profesional_id={self.profesional_id}, dia={self.dia}, estado='{self.estado}')>"
+
+
+# Los resúmenes diarios se actualizan con triggers para que toda escritura
+# (ORM, UPDATE masivo, barrido o SQL manual) los mantenga en la misma
+# transacción. Cada cambio resta la fila anterior y suma la nueva.
+# Ver migration_resumenes_diarios.sql
+event.listen(
+    Cita.__table__,
+    "after_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION resumen_citas_sumar(
+            p_profesional INTEGER, p_dia DATE, p_estado TEXT, p_cantidad INTEGER, p_monto INTEGER
+        )
+        RETURNS void
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF p_dia IS NULL THEN
+                RETURN;
+            END IF;
+            INSERT INTO resumen_citas_diario (profesional_id, dia, estado, cantidad, monto)
+            VALUES (p_profesional, p_dia, p_estado, p_cantidad, p_monto)
+            ON CONFLICT (profesional_id, dia, estado) DO UPDATE
+            SET cantidad = resumen_citas_diario.cantidad + EXCLUDED.cantidad,
+                monto = resumen_citas_diario.monto + EXCLUDED.monto;
+        END
+        $$
+    """)
+)
+event.listen(
+    Cita.__table__,
+    "after_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION cita_actualizar_resumen()
+        RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+                AND OLD.profesional_id = NEW.profesional_id
+                AND OLD.fecha_local IS NOT DISTINCT FROM NEW.fecha_local
+                AND OLD.estado::text IS NOT DISTINCT FROM NEW.estado::text
+                AND OLD.precio IS NOT DISTINCT FROM NEW.precio THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM resumen_citas_sumar(
+                    OLD.profesional_id, OLD.fecha_local, COALESCE(OLD.estado::text, 'PENDIENTE'),
+                    -1, -COALESCE(OLD.precio, 0)
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM resumen_citas_sumar(
+                    NEW.profesional_id, NEW.fecha_local, COALESCE(NEW.estado::text, 'PENDIENTE'),
+                    1, COALESCE(NEW.precio, 0)
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+)
+event.listen(
+    Cita.__table__,
+    "after_create",
+    DDL("""
+        CREATE TRIGGER trg_citas_resumen
+        AFTER INSERT OR DELETE OR UPDATE OF estado, fecha_hora, profesional_id, precio ON citas
+        FOR EACH ROW EXECUTE FUNCTION cita_actualizar_resumen()
+    """)
+)
+# El día de un pago es su fecha (o la de la cita si no tiene) en la zona del profesional
+event.listen(
+    Pago.__table__,
+    "after_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION resumen_pagos_sumar(
+            p_cita INTEGER, p_creado TIMESTAMPTZ, p_estado TEXT, p_cantidad INTEGER, p_monto INTEGER
+        )
+        RETURNS void
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO resumen_pagos_diario (profesional_id, dia, estado, cantidad, monto)
+            SELECT
+                c.profesional_id,
+                (COALESCE(p_creado, c.fecha_hora) AT TIME ZONE COALESCE(pp.zona_horaria, zona_horaria_por_defecto()))::date,
+                p_estado,
+                p_cantidad,
+                p_monto
+            FROM citas c
+            LEFT JOIN perfiles_profesionales pp ON pp.usuario_id = c.profesional_id
+            WHERE c.id = p_cita
+            ON CONFLICT (profesional_id, dia, estado) DO UPDATE
+            SET cantidad = resumen_pagos_diario.cantidad + EXCLUDED.cantidad,
+                monto = resumen_pagos_diario.monto + EXCLUDED.monto;
+        END
+        $$
+    """)
+)
+event.listen(
+    Pago.__table__,
+    "after_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION pago_actualizar_resumen()
+        RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+                AND OLD.cita_id = NEW.cita_id
+                AND OLD.created_at IS NOT DISTINCT FROM NEW.created_at
+                AND OLD.estado::text IS NOT DISTINCT FROM NEW.estado::text
+                AND OLD.monto = NEW.monto THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM resumen_pagos_sumar(
+                    OLD.cita_id, OLD.created_at, COALESCE(OLD.estado::text, 'PENDIENTE'), -1, -OLD.monto
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM resumen_pagos_sumar(
+                    NEW.cita_id, NEW.created_at, COALESCE(NEW.estado::text, 'PENDIENTE'), 1, NEW.monto
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+)
+event.listen(
+    Pago.__table__,
+    "after_create",
+    DDL("""
+        CREATE TRIGGER trg_pagos_resumen
+        AFTER INSERT OR DELETE OR UPDATE OF estado, monto, cita_id, created_at ON pagos
+        FOR EACH ROW EXECUTE FUNCTION pago_actualizar_resumen()
+    """)
+)
+
+
 class DiaSemana(str, enum.Enum):
     LUNES = "lunes"
     MARTES = "martes"
@@ -164,18 +494,116 @@ class Disponibilidad(Base):
     id = Column(Integer, primary_key=True, index=True)
     profesional_id = Column(Integer, ForeignKey("perfiles_profesionales.id"), nullable=False)
     dia_semana = Column(SQLEnum(DiaSemana), nullable=False)
-    hora_inicio = Column(String(5), nullable=False)  # Formato: "09:00"
-    hora_fin = Column(String(5), nullable=False)  # Formato: "17:00"
+    minuto_inicio = Column(Integer, nullable=False)  # Minutos desde la medianoche: 540 = 09:00
+    minuto_fin = Column(Integer, nullable=False)  # 1440 = 24:00
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relaciones
     profesional = relationship("PerfilProfesional", back_populates="disponibilidad")
 
+    __table_args__ = (
+        CheckConstraint(
+            "minuto_inicio >= 0 AND minuto_inicio < minuto_fin AND minuto_fin <= 1440",
+            name="ck_disponibilidad_minutos"
+        ),
+        Index("ix_disponibilidad_profesional_dia", "profesional_id", "dia_semana"),
+    )
+
+    @property
+    def hora_inicio(self) -> str:
+        """Inicio en formato "HH:MM" """
+        return f"{self.minuto_inicio // 60:02d}:{self.minuto_inicio % 60:02d}"
+
+    @property
+    def hora_fin(self) -> str:
+        """Fin en formato "HH:MM" """
+        return f"{self.minuto_fin // 60:02d}:{self.minuto_fin % 60:02d}"
+
     def __repr__(self):
         return f"<Disponibilidad(dia='{self.dia_semana}', {self.hora_inicio}-{self.hora_fin})>"
 
 
+class TipoExcepcion(str, enum.Enum):
+    BLOQUEO = "bloqueo"  # Vacaciones, ausencias o un bloque del día sin atención
+    TURNO_EXTRA = "turno_extra"  # Horario adicional fuera de la plantilla semanal
+    FESTIVO = "festivo"  # Festivo nacional (profesional_id NULL)
+
+
+class ExcepcionDisponibilidad(Base):
+    """
+    Excepción de la plantilla semanal para un rango de fechas. Sin
+    minuto_inicio/minuto_fin cubre los días completos. Los festivos
+    nacionales se guardan con profesional_id NULL y aplican a todos
+    cuando APLICAR_FESTIVOS está activo (ver cargar_festivos.py)
+    """
+    __tablename__ = "excepciones_disponibilidad"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    profesional_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    tipo = Column(SQLEnum(TipoExcepcion), nullable=False)
+    fecha_desde = Column(Date, nullable=False)
+    fecha_hasta = Column(Date, nullable=False)  # Inclusive
+    minuto_inicio = Column(Integer)
+    minuto_fin = Column(Integer)
+    motivo = Column(String(255))
+    # Rango [fecha_desde, fecha_hasta] calculado por PostgreSQL para el índice GiST
+    rango = Column(DATERANGE, Computed("daterange(fecha_desde, fecha_hasta, '[]')", persisted=True))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        CheckConstraint("fecha_hasta >= fecha_desde", name="ck_excepciones_fechas"),
+        CheckConstraint(
+            "(minuto_inicio IS NULL AND minuto_fin IS NULL) OR "
+            "(minuto_inicio >= 0 AND minuto_inicio < minuto_fin AND minuto_fin <= 1440)",
+            name="ck_excepciones_minutos"
+        ),
+        # Las excepciones de un rango de días se leen con una búsqueda de
+        # rangos (rango && [desde, hasta]) sobre este índice
+        Index(
+            "ix_excepciones_profesional_rango",
+            "profesional_id",
+            "rango",
+            postgresql_using="gist"
+        ),
+        # Un festivo por fecha
+        Index(
+            "ux_excepciones_festivo_fecha",
+            "fecha_desde",
+            unique=True,
+            postgresql_where=text("profesional_id IS NULL")
+        ),
+    )
+    
+    def __repr__(self):
+        return f"<ExcepcionDisponibilidad(id={self.id}, tipo='{self.tipo}', {self.fecha_desde}..{self.fecha_hasta})>"
+
+
+event.listen(
+    ExcepcionDisponibilidad.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist")
+)
+
+
+class CalendarioDisponible(Base):
+    """
+    Calendario materializado: minutos libres de cada profesional por día,
+    para las próximas CALENDARIO_SEMANAS semanas (ver services/calendario_service.py)
+    """
+    __tablename__ = "calendario_disponible"
+
+    profesional_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    fecha = Column(Date, primary_key=True)  # Día local en la zona del profesional
+    minutos_libres = Column(LargeBinary, nullable=False)  # Mapa de 1440 bits, little-endian
+    
+    actualizado_en = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CalendarioDisponible(profesional_id={self.profesional_id}, fecha={self.fecha})>"
+
+
 class Favorito(Base):
     __tablename__ = "favoritos"
 
@@ -188,10 +616,74 @@ class Favorito(Base):
     # Relaciones
     cliente = relationship("User", back_populates="favoritos")
 
+    __table_args__ = (
+        # Favoritos de un cliente y "¿es favorito?"; clientes que marcaron a un profesional
+        Index("ix_favoritos_cliente_profesional", "cliente_id", "profesional_id"),
+        Index("ix_favoritos_profesional", "profesional_id"),
+    )
+
     def __repr__(self):
         return f"<Favorito(cliente_id={self.cliente_id}, profesional_id={self.profesional_id})>"
 
 
+class EstadoEspera(str, enum.Enum):
+    ACTIVA = "activa"
+    ATENDIDA = "atendida"
+    CANCELADA = "cancelada"
+
+
+class ListaEspera(Base):
+    """
+    Solicitud de un cliente para ser avisado si se libera un horario con un
+    profesional dentro de una ventana de tiempo
+    """
+    __tablename__ = "lista_espera"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cliente_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    profesional_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    desde = Column(DateTime(timezone=True), nullable=False)
+    hasta = Column(DateTime(timezone=True), nullable=False)
+    duracion_minutos = Column(Integer, default=60)
+    prioridad = Column(Integer, default=0)  # Mayor prioridad recibe antes la oferta
+    # VARCHAR con el nombre del enum, igual que migration_lista_espera.sql
+    estado = Column(SQLEnum(EstadoEspera, native_enum=False, length=20), default=EstadoEspera.ACTIVA)
+    # Rango [desde, hasta) calculado por PostgreSQL para el índice GiST
+    ventana = Column(TSTZRANGE, Computed("tstzrange(desde, hasta, '[)')", persisted=True))
+    ultima_oferta_en = Column(DateTime(timezone=True))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint("hasta > desde", name="ck_lista_espera_ventana"),
+        CheckConstraint(
+            "estado IN (" + ", ".join(f"'{e.name}'" for e in EstadoEspera) + ")",
+            name="ck_lista_espera_estado"
+        ),
+        # Al liberarse un horario, las solicitudes que lo cubren se encuentran
+        # con una búsqueda de rangos sobre este índice, sin recorrer la tabla
+        Index(
+            "ix_lista_espera_profesional_ventana",
+            "profesional_id",
+            "ventana",
+            postgresql_using="gist",
+            postgresql_where=text("estado = 'ACTIVA'")
+        ),
+        Index("ix_lista_espera_cliente", "cliente_id"),
+    )
+
+    def __repr__(self):
+        return f"<ListaEspera(id={self.id}, profesional_id={self.profesional_id}, estado='{self.estado}')>"
+
+
+# El índice GiST combina un entero con un rango: también necesita btree_gist
+event.listen(
+    ListaEspera.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist")
+)
+
+
 class TipoNotificacion(str, enum.Enum):
     CITA_CONFIRMADA = "CITA_CONFIRMADA"
     CITA_CANCELADA = "CITA_CANCELADA"
@@ -220,5 +712,12 @@ class Notificacion(Base):
     usuario = relationship("User", backref="notificaciones")
     cita = relationship("Cita", backref="notificaciones")
 
+    __table_args__ = (
+        # Bandeja del usuario (filtrada o no por leída) y conteo de no leídas
+        Index("ix_notificaciones_usuario_leida_created_at", "usuario_id", "leida", "created_at"),
+        # Páginas de la bandeja sin filtro de leída, por (created_at, id)
+        Index("ix_notificaciones_usuario_created_at_id", "usuario_id", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Notificacion(id={self.id}, tipo='{self.tipo}', leida={self.leida})>"
@@ -0,0 +1,48 @@
+"""
+Script para reconstruir el calendario materializado de horarios libres.
+Recalcula los próximos CALENDARIO_SEMANAS de cada profesional a partir de su
+Disponibilidad y sus citas activas, y elimina los días que ya pasaron.
+
+Ejecutarlo periódicamente (p. ej. una vez al día) repara cualquier desvío y
+mantiene el horizonte del calendario avanzando.
+
+Uso:
+    python reconstruir_calendario.py
+    python reconstruir_calendario.py --profesional 12
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Agregar el directorio backend al path
+backend_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_dir))
+
+from config import settings
+from database import SessionLocal
+from services.calendario_service import reconstruir_calendario
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye el calendario materializado")
+    parser.add_argument("--profesional", type=int, action="append", help="ID de usuario del profesional (repetible)")
+    args = parser.parse_args()
+    
+    if not settings.CALENDARIO_MATERIALIZADO:
+        print("⚠️  CALENDARIO_MATERIALIZADO está desactivado; no hay nada que reconstruir")
+        return
+    
+    db = SessionLocal()
+    try:
+        print("📅 Reconstruyendo calendario materializado...")
+        resultado = reconstruir_calendario(db, args.profesional)
+        print(f"✅ Profesionales: {resultado['profesionales']}")
+        print(f"✅ Días escritos: {resultado['dias_escritos']}")
+        print(f"🗑️  Días pasados eliminados: {resultado['dias_eliminados']}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
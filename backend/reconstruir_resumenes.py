@@ -0,0 +1,41 @@
+"""
+Script para reconstruir los resúmenes diarios de citas y pagos.
+Recalcula resumen_citas_diario y resumen_pagos_diario desde las tablas de
+citas y pagos. Los triggers los mantienen al día; este script sirve para la
+carga inicial y para reparar cualquier desvío (p. ej. tras cargar datos con
+los triggers desactivados).
+
+Uso:
+    python reconstruir_resumenes.py
+    python reconstruir_resumenes.py --profesional 12
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Agregar el directorio backend al path
+backend_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_dir))
+
+from database import SessionLocal
+from repositories import ResumenRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye los resúmenes diarios de citas y pagos")
+    parser.add_argument("--profesional", type=int, action="append", help="ID de usuario del profesional (repetible)")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        print("📊 Reconstruyendo resúmenes diarios...")
+        resultado = ResumenRepository.reconstruir(db, args.profesional)
+        print(f"✅ Filas de citas: {resultado['citas']}")
+        print(f"✅ Filas de pagos: {resultado['pagos']}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,11 @@ from .pago_repository import PagoRepository
 from .disponibilidad_repository import DisponibilidadRepository
 from .notificacion_repository import NotificacionRepository
 from .favorito_repository import FavoritoRepository
+from .calendario_repository import CalendarioRepository
+from .lista_espera_repository import ListaEsperaRepository
+from .excepcion_repository import ExcepcionRepository
+from .resumen_repository import ResumenRepository
+from .cliente_repository import ClienteRepository
 
 __all__ = [
     'UserRepository',
@@ -20,5 +25,10 @@ __all__ = [
     'PagoRepository',
     'DisponibilidadRepository',
     'NotificacionRepository',
-    'FavoritoRepository'
+    'FavoritoRepository',
+    'CalendarioRepository',
+    'ListaEsperaRepository',
+    'ExcepcionRepository',
+    'ResumenRepository',
+    'ClienteRepository'
 ]
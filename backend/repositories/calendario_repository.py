@@ -0,0 +1,119 @@
+"""
+Repositorio para el calendario materializado de horarios libres
+"""
+
+from typing import Optional, Dict, Iterable
+from datetime import date
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import array, insert
+
+from models import CalendarioDisponible
+from utils.horarios import MINUTOS_DIA
+
+BYTES_DIA = MINUTOS_DIA // 8
+
+
+class CalendarioRepository:
+    """Repositorio para gestionar el calendario materializado"""
+    
+    @staticmethod
+    def obtener_dia(
+        db: Session,
+        profesional_id: int,
+        fecha: date
+    ) -> Optional[int]:
+        """Obtiene el mapa de minutos libres de un día (lectura por clave primaria)"""
+        fila = db.query(CalendarioDisponible.minutos_libres).filter(
+            CalendarioDisponible.profesional_id == profesional_id,
+            CalendarioDisponible.fecha == fecha
+        ).first()
+        
+        if not fila:
+            return None
+        return int.from_bytes(fila[0], "little")
+    
+    @staticmethod
+    def obtener_rango(
+        db: Session,
+        profesional_id: int,
+        fecha_desde: date,
+        fecha_hasta: date
+    ) -> Dict[date, int]:
+        """Obtiene los mapas de minutos libres de un rango de días (inclusive)"""
+        filas = db.query(
+            CalendarioDisponible.fecha,
+            CalendarioDisponible.minutos_libres
+        ).filter(
+            CalendarioDisponible.profesional_id == profesional_id,
+            CalendarioDisponible.fecha >= fecha_desde,
+            CalendarioDisponible.fecha <= fecha_hasta
+        ).all()
+        
+        return {fecha: int.from_bytes(libres, "little") for fecha, libres in filas}
+    
+    @staticmethod
+    def bloquear_dias(db: Session, profesional_id: int, fechas: Iterable[date]) -> None:
+        """
+        Toma el advisory lock de transacción de cada (profesional_id, fecha),
+        en orden de fecha para que dos transacciones no se bloqueen entre sí.
+        Sirve aunque el día todavía no tenga fila. Los locks se sueltan con
+        el commit o el rollback.
+        """
+        ordinales = sorted({fecha.toordinal() for fecha in fechas})
+        if not ordinales:
+            return
+        
+        dias = select(func.unnest(array(ordinales)).label("dia")).order_by("dia").subquery()
+        db.execute(select(func.pg_advisory_xact_lock(profesional_id, dias.c.dia))).all()
+    
+    @staticmethod
+    def guardar_dias(
+        db: Session,
+        profesional_id: int,
+        dias: Dict[date, int]
+    ) -> None:
+        """
+        Inserta o reemplaza varios días en un solo INSERT ... ON CONFLICT.
+        No hace commit: se confirma en la transacción que tomó los locks de
+        esos días (bloquear_dias) antes de recalcularlos.
+        """
+        if not dias:
+            return
+        
+        stmt = insert(CalendarioDisponible).values([
+            {
+                "profesional_id": profesional_id,
+                "fecha": fecha,
+                "minutos_libres": libres.to_bytes(BYTES_DIA, "little")
+            }
+            for fecha, libres in dias.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CalendarioDisponible.profesional_id, CalendarioDisponible.fecha],
+            set_={
+                "minutos_libres": stmt.excluded.minutos_libres,
+                "actualizado_en": func.now()
+            }
+        )
+        db.execute(stmt)
+    
+    @staticmethod
+    def eliminar_dias(db: Session, profesional_id: int, fechas: Iterable[date]) -> None:
+        """
+        Borra días del calendario para que la siguiente lectura los recalcule.
+        No hace commit.
+        """
+        db.query(CalendarioDisponible).filter(
+            CalendarioDisponible.profesional_id == profesional_id,
+            CalendarioDisponible.fecha.in_(list(fechas))
+        ).delete(synchronize_session=False)
+    
+    @staticmethod
+    def eliminar_anteriores(db: Session, fecha: date) -> int:
+        """Elimina los días anteriores a la fecha (ya no se pueden reservar)"""
+        count = db.query(CalendarioDisponible).filter(
+            CalendarioDisponible.fecha < fecha
+        ).delete(synchronize_session=False)
+        db.commit()
+        return count
@@ -2,12 +2,38 @@
 Repositorio para operaciones de citas
 """
 
-from typing import Optional, List
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from typing import Optional, Dict, List, Tuple
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Row, and_, or_, func, insert, select, update, tuple_
+from sqlalchemy.exc import IntegrityError
 
-from models import Cita, EstadoCita, User
+from config import settings
+from models import Cita, EstadoCita, User, PerfilProfesional, Pago, EstadoPago, texto_busqueda_usuario
+
+
+# Estados que ocupan el horario del profesional
+ESTADOS_ACTIVOS = [EstadoCita.PENDIENTE, EstadoCita.CONFIRMADA]
+
+# Criterios de orden del listado de pacientes de un profesional
+ORDEN_PACIENTES = ("nombre", "total_citas", "ultima_cita", "ultima_visita", "proxima_visita", "total_pagado")
+
+# Cambios de estado permitidos en operaciones masivas. Reactivar una cita
+# cancelada o completada podría chocar con otra cita del mismo horario
+TRANSICIONES_PERMITIDAS = {
+    EstadoCita.PENDIENTE: {EstadoCita.CONFIRMADA, EstadoCita.CANCELADA, EstadoCita.COMPLETADA},
+    EstadoCita.CONFIRMADA: {EstadoCita.CANCELADA, EstadoCita.COMPLETADA},
+    EstadoCita.CANCELADA: set(),
+    EstadoCita.COMPLETADA: set(),
+}
+
+# SQLSTATE de PostgreSQL para violaciones de una restricción EXCLUDE
+EXCLUSION_VIOLATION = "23P01"
+
+
+def _es_conflicto_horario(error: IntegrityError) -> bool:
+    """Indica si el error viene de la restricción excl_citas_profesional_periodo"""
+    return getattr(error.orig, "pgcode", None) == EXCLUSION_VIOLATION
 
 
 class CitaRepository:
@@ -22,11 +48,388 @@ class CitaRepository:
         db.refresh(cita)
         return cita
     
+    @staticmethod
+    def crear_si_disponible(db: Session, cita_data: dict) -> Optional[Cita]:
+        """
+        Crea una cita en una sola operación atómica.
+        
+        La restricción de exclusión de la tabla citas decide si el horario está
+        libre, así que no hay ventana entre verificar e insertar. Retorna None
+        si la cita se solapa con otra activa del mismo profesional.
+        """
+        cita = Cita(**cita_data)
+        db.add(cita)
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if _es_conflicto_horario(e):
+                return None
+            raise
+        db.refresh(cita)
+        return cita
+    
+    @staticmethod
+    def crear_serie_si_disponible(db: Session, filas: List[dict]) -> Optional[List[Row]]:
+        """
+        Inserta varias citas con un único INSERT ... RETURNING en una transacción.
+        
+        Retorna filas (id, fecha_hora, duracion_minutos, estado), en el orden
+        de `filas`, en lugar de objetos Cita, que expirarían con el commit y se
+        recargarían uno a uno.
+        Si otra reserva ocupa alguno de los horarios entre la verificación y el
+        INSERT, la restricción de exclusión rechaza la serie completa y se
+        retorna None.
+        """
+        try:
+            citas = db.execute(
+                insert(Cita).returning(
+                    Cita.id, Cita.fecha_hora, Cita.duracion_minutos, Cita.estado,
+                    sort_by_parameter_order=True
+                ),
+                filas
+            ).all()
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if _es_conflicto_horario(e):
+                return None
+            raise
+        return citas
+    
+    @staticmethod
+    def reagendar_si_disponible(
+        db: Session,
+        cita: Cita,
+        nueva_fecha: datetime
+    ) -> Optional[Cita]:
+        """
+        Mueve una cita a otra fecha de forma atómica.
+        Retorna None (y deja la cita sin cambios) si el nuevo horario está ocupado.
+        """
+        cita.fecha_hora = nueva_fecha
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if _es_conflicto_horario(e):
+                return None
+            raise
+        db.refresh(cita)
+        return cita
+    
+    @staticmethod
+    def obtener_estados(
+        db: Session,
+        profesional_id: int,
+        cita_ids: List[int]
+    ) -> dict:
+        """Estado actual de las citas del profesional entre cita_ids, en una consulta"""
+        filas = db.query(Cita.id, Cita.estado).filter(
+            Cita.id.in_(cita_ids),
+            Cita.profesional_id == profesional_id
+        ).all()
+        return {cita_id: estado for cita_id, estado in filas}
+    
+    @staticmethod
+    def actualizar_estado_masivo(
+        db: Session,
+        profesional_id: int,
+        cita_ids: List[int],
+        nuevo_estado: EstadoCita
+    ) -> List[Row]:
+        """
+        Cambia el estado de varias citas con un único UPDATE ... RETURNING.
+        
+        La condición sobre el estado de origen se repite en el UPDATE para que
+        una cita modificada por otra petición entre la validación y la escritura
+        no reciba una transición no permitida. Retorna (id, cliente_id,
+        fecha_hora, duracion_minutos) de las citas actualizadas.
+        """
+        origenes = [
+            estado for estado, destinos in TRANSICIONES_PERMITIDAS.items()
+            if nuevo_estado in destinos
+        ]
+        if not cita_ids or not origenes:
+            return []
+        
+        filas = db.execute(
+            update(Cita).where(
+                Cita.id.in_(cita_ids),
+                Cita.profesional_id == profesional_id,
+                Cita.estado.in_(origenes)
+            ).values(
+                estado=nuevo_estado,
+                updated_at=func.now()
+            ).returning(
+                Cita.id, Cita.cliente_id, Cita.fecha_hora, Cita.duracion_minutos
+            ).execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return filas
+    
+    @staticmethod
+    def completar_vencidas_lote(
+        db: Session,
+        corte: datetime,
+        despues_de: Optional[Tuple[datetime, int]],
+        limite: int,
+        estado_origen: EstadoCita = EstadoCita.CONFIRMADA,
+        estado_destino: EstadoCita = EstadoCita.COMPLETADA
+    ) -> List[Row]:
+        """
+        Pasa a `estado_destino` un lote de hasta `limite` citas en
+        `estado_origen` que terminaron antes de `corte`.
+        
+        Recorre las citas por (fecha_hora, id) a partir de `despues_de`
+        (paginación por clave, sin OFFSET) sobre el índice parcial de citas
+        confirmadas. FOR UPDATE SKIP LOCKED evita esperar filas que otra
+        transacción está modificando. Retorna (id, profesional_id, fecha_hora)
+        de las citas actualizadas, en orden; no hace commit.
+        """
+        fin_cita = Cita.fecha_hora + func.make_interval(
+            0, 0, 0, 0, 0, func.coalesce(Cita.duracion_minutos, 60)
+        )
+        
+        candidatas = db.query(Cita.id).filter(
+            Cita.estado == estado_origen,
+            Cita.fecha_hora < corte,
+            fin_cita <= corte
+        )
+        if despues_de:
+            candidatas = candidatas.filter(
+                tuple_(Cita.fecha_hora, Cita.id) > tuple_(*despues_de)
+            )
+        candidatas = candidatas.order_by(
+            Cita.fecha_hora, Cita.id
+        ).limit(limite).with_for_update(skip_locked=True)
+        
+        filas = db.execute(
+            update(Cita).where(
+                Cita.id.in_(candidatas.scalar_subquery())
+            ).values(
+                estado=estado_destino,
+                updated_at=func.now()
+            ).returning(
+                Cita.id, Cita.profesional_id, Cita.fecha_hora
+            ).execution_options(synchronize_session=False)
+        ).all()
+        return sorted(filas, key=lambda fila: (fila.fecha_hora, fila.id))
+    
+    @staticmethod
+    def obtener_vencida_mas_antigua(
+        db: Session,
+        corte: datetime,
+        estado_origen: EstadoCita = EstadoCita.CONFIRMADA
+    ) -> Optional[datetime]:
+        """fecha_hora de la cita vencida más antigua que sigue en `estado_origen`"""
+        fin_cita = Cita.fecha_hora + func.make_interval(
+            0, 0, 0, 0, 0, func.coalesce(Cita.duracion_minutos, 60)
+        )
+        return db.query(func.min(Cita.fecha_hora)).filter(
+            Cita.estado == estado_origen,
+            Cita.fecha_hora < corte,
+            fin_cita <= corte
+        ).scalar()
+    
+    @staticmethod
+    def cancelar_reservas_vencidas_lote(db: Session, ahora: datetime, limite: int) -> List[Row]:
+        """
+        Cancela un lote de hasta `limite` citas PENDIENTE cuya retención
+        (retenida_hasta) venció sin que se pagaran, lo que libera su horario.
+        
+        Recorre el índice parcial de reservas sin pagar; FOR UPDATE SKIP LOCKED
+        salta las que un pago está confirmando en ese momento. Retorna
+        (id, cliente_id, profesional_id, fecha_hora, duracion_minutos, retencion_id)
+        de las citas canceladas; no hace commit.
+        """
+        candidatas = db.query(Cita.id).filter(
+            Cita.estado == EstadoCita.PENDIENTE,
+            Cita.retenida_hasta.isnot(None),
+            Cita.retenida_hasta <= ahora
+        ).order_by(
+            Cita.retenida_hasta, Cita.id
+        ).limit(limite).with_for_update(skip_locked=True)
+        
+        return db.execute(
+            update(Cita).where(
+                Cita.id.in_(candidatas.scalar_subquery())
+            ).values(
+                estado=EstadoCita.CANCELADA,
+                updated_at=func.now()
+            ).returning(
+                Cita.id, Cita.cliente_id, Cita.profesional_id, Cita.fecha_hora,
+                Cita.duracion_minutos, Cita.retencion_id
+            ).execution_options(synchronize_session=False)
+        ).all()
+    
+    @staticmethod
+    def consolidar_reserva(db: Session, cita_id: int) -> bool:
+        """
+        Quita la fecha límite de pago de una cita al pagarla. Solo lo logra si
+        la cita sigue activa y su retención no ha vencido; si el barrido ya la
+        canceló (o está por hacerlo) retorna False. No hace commit: se confirma
+        junto con el pago.
+        """
+        fila = db.execute(
+            update(Cita).where(
+                Cita.id == cita_id,
+                Cita.estado.in_(ESTADOS_ACTIVOS),
+                or_(Cita.retenida_hasta.is_(None), Cita.retenida_hasta > func.now())
+            ).values(
+                retencion_id=None,
+                retenida_hasta=None
+            ).returning(Cita.id).execution_options(synchronize_session=False)
+        ).first()
+        return fila is not None
+    
     @staticmethod
     def obtener_por_id(db: Session, cita_id: int) -> Optional[Cita]:
         """Obtiene una cita por ID"""
         return db.query(Cita).filter(Cita.id == cita_id).first()
     
+    @staticmethod
+    def _filtros_admin(
+        cliente,
+        profesional,
+        profesional_id: Optional[int] = None,
+        cliente_id: Optional[int] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        busqueda: Optional[str] = None
+    ) -> list:
+        """
+        Condiciones comunes del listado y los contadores del panel de
+        administración. `busqueda` filtra por nombre, apellido o email del
+        cliente o del profesional, o por especialidad.
+        """
+        filtros = []
+        
+        if profesional_id:
+            filtros.append(Cita.profesional_id == profesional_id)
+        
+        if cliente_id:
+            filtros.append(Cita.cliente_id == cliente_id)
+        
+        if fecha_desde:
+            filtros.append(Cita.fecha_hora >= fecha_desde)
+        
+        if fecha_hasta:
+            filtros.append(Cita.fecha_hora < fecha_hasta)
+        
+        if busqueda:
+            texto = busqueda.strip().lower()
+            filtros.append(or_(
+                texto_busqueda_usuario(cliente.nombre, cliente.apellido, cliente.email).contains(texto, autoescape=True),
+                texto_busqueda_usuario(profesional.nombre, profesional.apellido, profesional.email).contains(texto, autoescape=True),
+                func.lower(PerfilProfesional.especialidad).contains(texto, autoescape=True)
+            ))
+        
+        return filtros
+    
+    @staticmethod
+    def listar_admin(
+        db: Session,
+        limite: int,
+        antes_de: Optional[Tuple[datetime, int]] = None,
+        estado: Optional[EstadoCita] = None,
+        profesional_id: Optional[int] = None,
+        cliente_id: Optional[int] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        busqueda: Optional[str] = None
+    ) -> List[Row]:
+        """
+        Página de citas para el panel de administración, de la más reciente a
+        la más antigua, en una sola consulta.
+        
+        Trae solo las columnas que muestra el listado, con cliente,
+        profesional y especialidad unidos en la misma sentencia. Pagina por
+        clave (fecha_hora, id) a partir de `antes_de`, sin OFFSET: cada página
+        cuesta lo mismo sin importar qué tan atrás esté. fecha_hasta es
+        exclusiva. Retorna hasta `limite` filas.
+        """
+        cliente = aliased(User)
+        profesional = aliased(User)
+        
+        query = db.query(
+            Cita.id,
+            Cita.fecha_hora,
+            Cita.duracion_minutos,
+            Cita.estado,
+            Cita.motivo,
+            Cita.notas,
+            Cita.precio,
+            Cita.created_at,
+            cliente.id.label("cliente_id"),
+            cliente.nombre.label("cliente_nombre"),
+            cliente.apellido.label("cliente_apellido"),
+            cliente.email.label("cliente_email"),
+            cliente.telefono.label("cliente_telefono"),
+            profesional.id.label("profesional_id"),
+            profesional.nombre.label("profesional_nombre"),
+            profesional.apellido.label("profesional_apellido"),
+            profesional.email.label("profesional_email"),
+            profesional.telefono.label("profesional_telefono"),
+            PerfilProfesional.especialidad
+        ).outerjoin(
+            cliente, cliente.id == Cita.cliente_id
+        ).outerjoin(
+            profesional, profesional.id == Cita.profesional_id
+        ).outerjoin(
+            PerfilProfesional, PerfilProfesional.usuario_id == Cita.profesional_id
+        ).filter(*CitaRepository._filtros_admin(
+            cliente, profesional, profesional_id, cliente_id, fecha_desde, fecha_hasta, busqueda
+        ))
+        
+        if estado:
+            query = query.filter(Cita.estado == estado)
+        
+        if antes_de:
+            query = query.filter(tuple_(Cita.fecha_hora, Cita.id) < tuple_(*antes_de))
+        
+        return query.order_by(Cita.fecha_hora.desc(), Cita.id.desc()).limit(limite).all()
+    
+    @staticmethod
+    def contar_admin_por_estado(
+        db: Session,
+        profesional_id: Optional[int] = None,
+        cliente_id: Optional[int] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        busqueda: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Citas de los mismos filtros que listar_admin (sin estado ni cursor),
+        en total y por estado, con un solo COUNT(*) FILTER por estado.
+        Retorna {"total": n, "pendiente": n, "confirmada": n, ...}
+        """
+        cliente = aliased(User)
+        profesional = aliased(User)
+        
+        query = db.query(
+            func.count().label("total"),
+            *[
+                func.count().filter(Cita.estado == estado).label(estado.name.lower())
+                for estado in EstadoCita
+            ]
+        ).select_from(Cita)
+        
+        # Los nombres y la especialidad solo hacen falta para buscar
+        if busqueda:
+            query = query.outerjoin(
+                cliente, cliente.id == Cita.cliente_id
+            ).outerjoin(
+                profesional, profesional.id == Cita.profesional_id
+            ).outerjoin(
+                PerfilProfesional, PerfilProfesional.usuario_id == Cita.profesional_id
+            )
+        
+        fila = query.filter(*CitaRepository._filtros_admin(
+            cliente, profesional, profesional_id, cliente_id, fecha_desde, fecha_hasta, busqueda
+        )).one()
+        return dict(fila._mapping)
+    
     @staticmethod
     def obtener_por_cliente(
         db: Session,
@@ -49,6 +452,162 @@ class CitaRepository:
         
         return query.order_by(Cita.fecha_hora.desc()).all()
     
+    @staticmethod
+    def _con_profesional(db: Session):
+        """Citas junto con el User y el PerfilProfesional de su profesional, en la misma consulta"""
+        return db.query(Cita, User, PerfilProfesional).join(
+            User, User.id == Cita.profesional_id
+        ).outerjoin(
+            PerfilProfesional, PerfilProfesional.usuario_id == Cita.profesional_id
+        )
+    
+    @staticmethod
+    def obtener_de_cliente_con_profesional(
+        db: Session,
+        cliente_id: int,
+        estado: Optional[EstadoCita] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        antes_de: Optional[Tuple[datetime, int]] = None,
+        limite: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Citas de un cliente con su profesional y perfil (filas Cita, User,
+        PerfilProfesional), de la más reciente a la más antigua. Es una sola
+        consulta sin importar cuántas citas tenga el cliente.
+        
+        Pagina por clave (fecha_hora, id) a partir de `antes_de`; sin `limite`
+        retorna todas. fecha_hasta es exclusiva.
+        """
+        query = CitaRepository._con_profesional(db).filter(Cita.cliente_id == cliente_id)
+        
+        if estado:
+            query = query.filter(Cita.estado == estado)
+        
+        if fecha_desde:
+            query = query.filter(Cita.fecha_hora >= fecha_desde)
+        
+        if fecha_hasta:
+            query = query.filter(Cita.fecha_hora < fecha_hasta)
+        
+        if antes_de:
+            query = query.filter(tuple_(Cita.fecha_hora, Cita.id) < tuple_(*antes_de))
+        
+        query = query.order_by(Cita.fecha_hora.desc(), Cita.id.desc())
+        if limite:
+            query = query.limit(limite)
+        
+        return query.all()
+    
+    @staticmethod
+    def obtener_de_cliente_con_profesional_por_id(
+        db: Session,
+        cliente_id: int,
+        cita_id: int
+    ) -> Optional[Row]:
+        """Una cita del cliente con su profesional y perfil, en una consulta"""
+        return CitaRepository._con_profesional(db).filter(
+            Cita.id == cita_id,
+            Cita.cliente_id == cliente_id
+        ).first()
+    
+    @staticmethod
+    def obtener_pacientes_profesional(
+        db: Session,
+        profesional_id: int,
+        busqueda: Optional[str] = None,
+        orden: str = "ultima_visita",
+        descendente: bool = True,
+        skip: int = 0,
+        limit: int = 50,
+        activo: Optional[bool] = None
+    ) -> Tuple[List[Row], int]:
+        """
+        Pacientes de un profesional con sus totales, en una sola consulta:
+        un GROUP BY por cliente sobre sus citas (y pagos) calcula el número
+        de citas, la última cita, la última visita, la próxima visita y el
+        total pagado; después se une con users para los datos de contacto.
+        
+        `busqueda` filtra por nombre, apellido o email (la expresión del
+        índice trigram ix_users_busqueda_trgm) o por teléfono; `activo`, por
+        el estado de la cuenta del paciente. `orden` es una clave de
+        ORDEN_PACIENTES. Retorna (filas de la página, total de pacientes que
+        cumplen el filtro), también cuando la página queda vacía.
+        """
+        ahora = datetime.now(timezone.utc)
+        
+        totales = select(
+            Cita.cliente_id,
+            func.count(Cita.id).label("total_citas"),
+            func.max(Cita.fecha_hora).label("ultima_cita"),
+            func.max(Cita.fecha_hora).filter(
+                Cita.fecha_hora < ahora,
+                Cita.estado != EstadoCita.CANCELADA
+            ).label("ultima_visita"),
+            func.min(Cita.fecha_hora).filter(
+                Cita.fecha_hora >= ahora,
+                Cita.estado.in_(ESTADOS_ACTIVOS)
+            ).label("proxima_visita"),
+            func.coalesce(
+                func.sum(Pago.monto).filter(Pago.estado == EstadoPago.COMPLETADO), 0
+            ).label("total_pagado")
+        ).outerjoin(
+            Pago, Pago.cita_id == Cita.id
+        ).where(
+            Cita.profesional_id == profesional_id
+        ).group_by(Cita.cliente_id).subquery()
+        
+        query = db.query(
+            User.id,
+            User.nombre,
+            User.apellido,
+            User.email,
+            User.telefono,
+            User.is_active,
+            totales.c.total_citas,
+            totales.c.ultima_cita,
+            totales.c.ultima_visita,
+            totales.c.proxima_visita,
+            totales.c.total_pagado,
+            # Total de pacientes del filtro, sin otra consulta
+            func.count().over().label("total_pacientes")
+        ).join(totales, totales.c.cliente_id == User.id)
+        
+        if busqueda:
+            query = query.filter(or_(
+                texto_busqueda_usuario(User.nombre, User.apellido, User.email).contains(
+                    busqueda.strip().lower(), autoescape=True
+                ),
+                User.telefono.contains(busqueda.strip(), autoescape=True)
+            ))
+        if activo is not None:
+            query = query.filter(User.is_active == activo)
+        
+        columnas = {
+            "nombre": func.lower(func.coalesce(User.nombre, "") + " " + func.coalesce(User.apellido, "")),
+            "total_citas": totales.c.total_citas,
+            "ultima_cita": totales.c.ultima_cita,
+            "ultima_visita": totales.c.ultima_visita,
+            "proxima_visita": totales.c.proxima_visita,
+            "total_pagado": totales.c.total_pagado
+        }
+        columna = columnas[orden]
+        query = query.order_by(
+            columna.desc().nulls_last() if descendente else columna.asc().nulls_last(),
+            User.id
+        )
+        
+        filas = query.offset(skip).limit(limit).all()
+        if filas:
+            return filas, filas[0].total_pacientes
+        
+        # Una página vacía no trae el conteo de ventana: si skip pasó del
+        # final, el total sale de un conteo aparte con el mismo filtro
+        if not skip:
+            return filas, 0
+        total = query.order_by(None).with_entities(func.count(User.id)).scalar()
+        return filas, total
+    
     @staticmethod
     def obtener_por_profesional(
         db: Session,
@@ -79,7 +638,7 @@ class CitaRepository:
         limit: int = 5
     ) -> List[Cita]:
         """Obtiene próximas citas de un usuario"""
-        ahora = datetime.now()
+        ahora = datetime.now(timezone.utc)
         
         if es_profesional:
             query = db.query(Cita).filter(Cita.profesional_id == user_id)
@@ -98,16 +657,19 @@ class CitaRepository:
     def obtener_del_dia(
         db: Session,
         profesional_id: int,
-        fecha: datetime
+        dia: date
     ) -> List[Cita]:
-        """Obtiene todas las citas de un día específico"""
-        inicio_dia = fecha.replace(hour=0, minute=0, second=0, microsecond=0)
-        fin_dia = inicio_dia + timedelta(days=1)
+        """
+        Obtiene todas las citas de un día en la zona horaria del profesional.
+        fecha_local es el día local de cada cita, así que la consulta es un
+        rango sobre ix_citas_profesional_fecha_local ya ordenado por hora.
+        """
+        if isinstance(dia, datetime):
+            dia = dia.date()
         
         return db.query(Cita).filter(
             Cita.profesional_id == profesional_id,
-            Cita.fecha_hora >= inicio_dia,
-            Cita.fecha_hora < fin_dia
+            Cita.fecha_local == dia
         ).order_by(Cita.fecha_hora.asc()).all()
     
     @staticmethod
@@ -118,14 +680,25 @@ class CitaRepository:
         duracion_minutos: int,
         excluir_cita_id: Optional[int] = None
     ) -> bool:
-        """Verifica si hay conflicto de horario"""
+        """
+        Verifica si [fecha_hora, fecha_hora + duracion) se solapa con alguna
+        cita activa del profesional.
+        
+        Solo una cita que empiece antes del fin del rango y como máximo
+        DURACION_MAXIMA_CITA_MINUTOS antes de su inicio puede solaparse, así
+        que la consulta es un range scan acotado sobre el índice
+        (profesional_id, fecha_hora): O(log n) sin importar el tamaño de la agenda.
+        """
         fin_cita = fecha_hora + timedelta(minutes=duracion_minutos)
+        inicio_ventana = fecha_hora - timedelta(minutes=settings.DURACION_MAXIMA_CITA_MINUTOS)
+        fin_existente = Cita.fecha_hora + func.make_interval(0, 0, 0, 0, 0, Cita.duracion_minutos)
         
-        query = db.query(Cita).filter(
+        query = db.query(Cita.id).filter(
             Cita.profesional_id == profesional_id,
-            Cita.estado.in_([EstadoCita.CONFIRMADA, EstadoCita.PENDIENTE]),
+            Cita.fecha_hora > inicio_ventana,
             Cita.fecha_hora < fin_cita,
-            (Cita.fecha_hora + timedelta(minutes=Cita.duracion_minutos)) > fecha_hora
+            Cita.estado.in_(ESTADOS_ACTIVOS),
+            fin_existente > fecha_hora
         )
         
         if excluir_cita_id:
@@ -133,6 +706,38 @@ class CitaRepository:
         
         return query.first() is not None
     
+    @staticmethod
+    def obtener_intervalos_activos(
+        db: Session,
+        profesional_ids: List[int],
+        desde: datetime,
+        hasta: datetime
+    ) -> List[Tuple[int, datetime, int]]:
+        """
+        Obtiene (profesional_id, fecha_hora, duracion_minutos) de las citas
+        activas que ocupan algún minuto de [desde, hasta).
+        
+        Solo proyecta las columnas necesarias y usa la misma ventana acotada
+        que verificar_conflicto sobre el índice (profesional_id, fecha_hora).
+        """
+        if not profesional_ids:
+            return []
+        
+        inicio_ventana = desde - timedelta(minutes=settings.DURACION_MAXIMA_CITA_MINUTOS)
+        fin_existente = Cita.fecha_hora + func.make_interval(0, 0, 0, 0, 0, Cita.duracion_minutos)
+        
+        return db.query(
+            Cita.profesional_id,
+            Cita.fecha_hora,
+            Cita.duracion_minutos
+        ).filter(
+            Cita.profesional_id.in_(profesional_ids),
+            Cita.fecha_hora > inicio_ventana,
+            Cita.fecha_hora < hasta,
+            Cita.estado.in_(ESTADOS_ACTIVOS),
+            fin_existente > desde
+        ).order_by(Cita.profesional_id, Cita.fecha_hora).all()
+    
     @staticmethod
     def actualizar_estado(
         db: Session,
@@ -218,7 +823,7 @@ class CitaRepository:
         limit: int = 10
     ) -> List[Cita]:
         """Obtiene historial de citas pasadas de un cliente"""
-        ahora = datetime.now()
+        ahora = datetime.now(timezone.utc)
         
         return db.query(Cita).filter(
             Cita.cliente_id == cliente_id,
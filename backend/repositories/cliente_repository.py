@@ -0,0 +1,170 @@
+"""
+Repositorio para el resumen (dashboard) de un cliente
+"""
+
+from typing import Optional, Union
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import ColumnElement, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.engine import Row
+
+from models import (
+    Cita, EstadoCita, Pago, EstadoPago, User, PerfilProfesional, Notificacion, Favorito, TipoUsuario
+)
+from repositories.cita_repository import ESTADOS_ACTIVOS
+
+# Un id de cliente ya conocido o una subconsulta escalar que lo calcula
+IdCliente = Union[int, ColumnElement]
+
+
+class ClienteRepository:
+    """Repositorio para los totales y el dashboard del cliente"""
+    
+    @staticmethod
+    def _totales(cliente_id: IdCliente):
+        """
+        Totales de citas y pagos del cliente en un solo agregado. Cada cita
+        tiene a lo sumo un pago (pagos.cita_id es único), así que el
+        LEFT JOIN deja una fila por cita y las citas se cuentan sin DISTINCT.
+        """
+        return select(
+            func.count(Cita.id).label("total_citas"),
+            func.count(Cita.id).filter(
+                Cita.estado == EstadoCita.COMPLETADA
+            ).label("citas_completadas"),
+            func.count(Cita.id).filter(
+                Cita.estado.in_(ESTADOS_ACTIVOS)
+            ).label("citas_pendientes"),
+            func.count(Cita.profesional_id.distinct()).label("profesionales_visitados"),
+            func.count(Pago.id).label("total_pagos"),
+            func.count(Pago.id).filter(Pago.estado == EstadoPago.PENDIENTE).label("pagos_pendientes"),
+            func.count(Pago.id).filter(Pago.estado == EstadoPago.COMPLETADO).label("pagos_completados"),
+            func.coalesce(
+                func.sum(Pago.monto).filter(Pago.estado == EstadoPago.COMPLETADO), 0
+            ).label("total_gastado")
+        ).select_from(Cita).outerjoin(
+            Pago, Pago.cita_id == Cita.id
+        ).where(Cita.cliente_id == cliente_id)
+    
+    @staticmethod
+    def obtener_totales(db: Session, cliente_id: int) -> Row:
+        """Totales de citas y pagos del cliente (ver _totales), en una consulta"""
+        return db.execute(ClienteRepository._totales(cliente_id)).one()
+    
+    @staticmethod
+    def _lista_json(filas, *orden):
+        """Subconsulta escalar con las filas de `filas` como arreglo JSON ('[]' si no hay)"""
+        return select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(filas.table_valued(), *orden)),
+                literal_column("'[]'::json")
+            )
+        ).select_from(filas).scalar_subquery()
+    
+    @staticmethod
+    def _citas_json(cliente_id: IdCliente, condicion, descendente: bool, limite: int, nombre: str):
+        """Citas del cliente con los datos de su profesional, como arreglo JSON ordenado por (fecha_hora, id)"""
+        profesional = aliased(User)
+        direccion = "desc" if descendente else "asc"
+        filas = select(
+            Cita.id,
+            Cita.fecha_hora,
+            Cita.duracion_minutos,
+            Cita.estado,
+            Cita.motivo,
+            Cita.precio,
+            profesional.id.label("profesional_id"),
+            profesional.nombre.label("profesional_nombre"),
+            profesional.apellido.label("profesional_apellido"),
+            PerfilProfesional.especialidad.label("profesional_especialidad"),
+            PerfilProfesional.foto_url.label("profesional_foto_url")
+        ).join(
+            profesional, profesional.id == Cita.profesional_id
+        ).outerjoin(
+            PerfilProfesional, PerfilProfesional.usuario_id == Cita.profesional_id
+        ).where(
+            Cita.cliente_id == cliente_id,
+            condicion
+        ).order_by(
+            getattr(Cita.fecha_hora, direccion)(), getattr(Cita.id, direccion)()
+        ).limit(limite).subquery(nombre)
+        return ClienteRepository._lista_json(
+            filas, getattr(filas.c.fecha_hora, direccion)(), getattr(filas.c.id, direccion)()
+        )
+    
+    @staticmethod
+    def obtener_dashboard(
+        db: Session,
+        email: str,
+        limite_citas: int = 5,
+        limite_favoritos: int = 10
+    ) -> Optional[Row]:
+        """
+        Todo el dashboard del cliente en una sola sentencia (un viaje a la
+        base de datos): el id del cliente sale de una CTE por email y los
+        totales, las notificaciones no leídas, las próximas citas, las
+        citas pasadas y los favoritos son subconsultas independientes de la
+        misma sentencia. Las listas llegan como arreglos JSON.
+        
+        Retorna None si el email no es de un cliente.
+        """
+        ahora = datetime.now(timezone.utc)
+        cliente = select(User.id).where(
+            User.email == email,
+            User.tipo_usuario == TipoUsuario.CLIENTE
+        ).cte("cliente")
+        cliente_id = select(cliente.c.id).scalar_subquery()
+        
+        totales = ClienteRepository._totales(cliente_id).subquery("totales")
+        
+        no_leidas = select(func.count(Notificacion.id)).where(
+            Notificacion.usuario_id == cliente_id,
+            Notificacion.leida.is_(False)
+        ).scalar_subquery()
+        
+        proximas = ClienteRepository._citas_json(
+            cliente_id,
+            (Cita.fecha_hora >= ahora) & Cita.estado.in_(ESTADOS_ACTIVOS),
+            False,
+            limite_citas,
+            "proximas"
+        )
+        historial = ClienteRepository._citas_json(
+            cliente_id,
+            Cita.fecha_hora < ahora,
+            True,
+            limite_citas,
+            "historial"
+        )
+        
+        favoritos_filas = select(
+            User.id,
+            User.nombre,
+            User.apellido,
+            PerfilProfesional.especialidad,
+            PerfilProfesional.ciudad,
+            PerfilProfesional.precio_consulta,
+            PerfilProfesional.calificacion_promedio,
+            PerfilProfesional.numero_resenas,
+            PerfilProfesional.foto_url,
+            Favorito.created_at
+        ).select_from(Favorito).join(
+            PerfilProfesional, PerfilProfesional.id == Favorito.profesional_id
+        ).join(
+            User, User.id == PerfilProfesional.usuario_id
+        ).where(
+            Favorito.cliente_id == cliente_id
+        ).order_by(Favorito.created_at.desc()).limit(limite_favoritos).subquery("favoritos")
+        favoritos = ClienteRepository._lista_json(favoritos_filas, favoritos_filas.c.created_at.desc())
+        
+        return db.execute(
+            select(
+                cliente.c.id,
+                totales,
+                no_leidas.label("notificaciones_no_leidas"),
+                proximas.label("proximas_citas"),
+                historial.label("historial_citas"),
+                favoritos.label("favoritos")
+            ).select_from(cliente).join(totales, literal_column("true"))
+        ).first()
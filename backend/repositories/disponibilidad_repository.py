@@ -2,11 +2,13 @@
 Repositorio para operaciones de disponibilidad
 """
 
-from typing import Optional, List
+from collections import defaultdict
+from typing import Optional, List, Dict, Tuple, Any
 from datetime import datetime, date
 from sqlalchemy.orm import Session
+from sqlalchemy import Integer, Row, select, insert, update, delete, literal, values, column, or_
 
-from models import Disponibilidad
+from models import Disponibilidad, PerfilProfesional, DiaSemana, ExcepcionDisponibilidad, TipoExcepcion
 
 
 class DisponibilidadRepository:
@@ -44,6 +46,117 @@ class DisponibilidadRepository:
         
         return query.all()
     
+    @staticmethod
+    def perfil_de_usuario(usuario_id: int):
+        """
+        Subconsulta con el perfil.id de un usuario profesional. Las operaciones
+        de disponibilidad la usan dentro de su propia sentencia en lugar de
+        cargar antes el PerfilProfesional.
+        """
+        return select(PerfilProfesional.id).where(
+            PerfilProfesional.usuario_id == usuario_id
+        ).scalar_subquery()
+    
+    @staticmethod
+    def obtener_por_usuario(db: Session, usuario_id: int) -> List[Disponibilidad]:
+        """Bloques de un profesional a partir de su usuario_id, ordenados por día y hora"""
+        return db.query(Disponibilidad).filter(
+            Disponibilidad.profesional_id == DisponibilidadRepository.perfil_de_usuario(usuario_id)
+        ).order_by(
+            Disponibilidad.dia_semana,
+            Disponibilidad.minuto_inicio
+        ).all()
+    
+    @staticmethod
+    def obtener_de_usuario(db: Session, usuario_id: int, disponibilidad_id: int) -> Optional[Disponibilidad]:
+        """Obtiene un bloque solo si pertenece al usuario"""
+        return db.query(Disponibilidad).filter(
+            Disponibilidad.id == disponibilidad_id,
+            Disponibilidad.profesional_id == DisponibilidadRepository.perfil_de_usuario(usuario_id)
+        ).first()
+    
+    @staticmethod
+    def obtener_plantillas_por_usuarios(db: Session, usuario_ids: List[int]) -> List[Row]:
+        """
+        Obtiene (usuario_id, zona_horaria, dia_semana, minuto_inicio, minuto_fin)
+        de varios profesionales en una sola consulta. Los profesionales sin
+        bloques aparecen una vez con los campos del bloque en NULL.
+        """
+        if not usuario_ids:
+            return []
+        
+        return db.query(
+            PerfilProfesional.usuario_id,
+            PerfilProfesional.zona_horaria,
+            Disponibilidad.dia_semana,
+            Disponibilidad.minuto_inicio,
+            Disponibilidad.minuto_fin
+        ).outerjoin(
+            Disponibilidad,
+            Disponibilidad.profesional_id == PerfilProfesional.id
+        ).filter(
+            PerfilProfesional.usuario_id.in_(usuario_ids)
+        ).all()
+    
+    @staticmethod
+    def crear_para_usuario(
+        db: Session,
+        usuario_id: int,
+        dia_semana: DiaSemana,
+        minuto_inicio: int,
+        minuto_fin: int
+    ) -> Optional[Disponibilidad]:
+        """
+        Crea un bloque con un INSERT ... SELECT sobre el perfil del usuario.
+        Retorna None si el usuario no tiene perfil profesional.
+        """
+        sentencia = insert(Disponibilidad).from_select(
+            ["profesional_id", "dia_semana", "minuto_inicio", "minuto_fin"],
+            select(
+                PerfilProfesional.id,
+                literal(dia_semana, Disponibilidad.dia_semana.type),
+                literal(minuto_inicio),
+                literal(minuto_fin)
+            ).where(PerfilProfesional.usuario_id == usuario_id)
+        ).returning(Disponibilidad)
+        
+        disponibilidad = db.scalars(sentencia).first()
+        db.commit()
+        return disponibilidad
+    
+    @staticmethod
+    def actualizar_de_usuario(
+        db: Session,
+        usuario_id: int,
+        disponibilidad_id: int,
+        **campos
+    ) -> Optional[Disponibilidad]:
+        """Actualiza un bloque solo si pertenece al usuario, en una sentencia"""
+        sentencia = update(Disponibilidad).where(
+            Disponibilidad.id == disponibilidad_id,
+            Disponibilidad.profesional_id == DisponibilidadRepository.perfil_de_usuario(usuario_id)
+        ).values(**campos).returning(Disponibilidad)
+        
+        disponibilidad = db.scalars(
+            sentencia,
+            execution_options={"synchronize_session": False}
+        ).first()
+        db.commit()
+        return disponibilidad
+    
+    @staticmethod
+    def eliminar_de_usuario(db: Session, usuario_id: int, disponibilidad_id: int) -> bool:
+        """Elimina un bloque solo si pertenece al usuario, en una sentencia"""
+        resultado = db.execute(
+            delete(Disponibilidad).where(
+                Disponibilidad.id == disponibilidad_id,
+                Disponibilidad.profesional_id == DisponibilidadRepository.perfil_de_usuario(usuario_id)
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+        return resultado.rowcount > 0
+    
     @staticmethod
     def obtener_por_dia(
         db: Session,
@@ -60,13 +173,33 @@ class DisponibilidadRepository:
     def obtener_por_fecha(
         db: Session,
         profesional_id: int,
-        fecha: date
+        fecha: date,
+        incluir_festivos: bool = False
     ) -> List[Disponibilidad]:
-        """Obtiene disponibilidad para una fecha específica"""
+        """
+        Bloques semanales que aplican a una fecha específica: los del día de la
+        semana de la fecha, o ninguno si un bloqueo de día completo (o un
+        festivo, con incluir_festivos) cubre la fecha. Los bloqueos parciales y
+        turnos extra se combinan en services/plantilla_service.py.
+        """
+        dueno = ExcepcionDisponibilidad.profesional_id == select(PerfilProfesional.usuario_id).where(
+            PerfilProfesional.id == profesional_id
+        ).scalar_subquery()
+        if incluir_festivos:
+            dueno = or_(dueno, ExcepcionDisponibilidad.profesional_id.is_(None))
+        
+        dia_completo = select(ExcepcionDisponibilidad.id).where(
+            dueno,
+            ExcepcionDisponibilidad.tipo.in_([TipoExcepcion.BLOQUEO, TipoExcepcion.FESTIVO]),
+            ExcepcionDisponibilidad.minuto_inicio.is_(None),
+            ExcepcionDisponibilidad.rango.contains(fecha)
+        ).exists()
+        
         return db.query(Disponibilidad).filter(
             Disponibilidad.profesional_id == profesional_id,
-            Disponibilidad.fecha == fecha
-        ).all()
+            Disponibilidad.dia_semana == list(DiaSemana)[fecha.weekday()],
+            ~dia_completo
+        ).order_by(Disponibilidad.minuto_inicio).all()
     
     @staticmethod
     def actualizar(
@@ -108,43 +241,157 @@ class DisponibilidadRepository:
         return count
     
     @staticmethod
-    def actualizar_masivo(
-        db: Session,
-        profesional_id: int,
-        horarios: dict
-    ) -> bool:
-        """Actualiza horarios de forma masiva"""
-        # Primero eliminar todo
-        DisponibilidadRepository.eliminar_por_profesional(db, profesional_id)
+    def diferencias_semana(
+        actuales: Dict[DiaSemana, List[Tuple[int, int, int]]],
+        semana: Dict[DiaSemana, List[Tuple[int, int]]]
+    ) -> Tuple[List[tuple], List[tuple], List[tuple], List[int]]:
+        """
+        Cambios para pasar de los bloques `actuales` ((inicio, fin, id) por
+        día) a `semana` ((inicio, fin) por día), sin consultar la base de datos.
         
-        # Crear nuevos horarios
-        dias_validos = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
-        
-        for dia, config in horarios.items():
-            dia_normalizado = dia.lower()
-            
-            if dia_normalizado not in dias_validos:
-                continue
+        Retorna (conservados, actualizados, insertados, eliminados):
+        conservados y actualizados son (id, día, inicio, fin), insertados son
+        (día, inicio, fin) y eliminados son ids. Un bloque igual se conserva;
+        los demás ids del día se reutilizan en orden antes de crear o borrar.
+        """
+        conservados, actualizados, insertados, eliminados = [], [], [], []
+        for dia in DiaSemana:
+            deseados = sorted(set(semana.get(dia, [])))
+            existentes = sorted(actuales.get(dia, []))
             
-            if not config.get('activo', False):
-                continue
+            # Los bloques idénticos no se tocan
+            por_horario = {}
+            for inicio, fin, bloque_id in existentes:
+                por_horario.setdefault((inicio, fin), []).append(bloque_id)
+            sobrantes_deseados = []
+            for bloque in deseados:
+                if por_horario.get(bloque):
+                    conservados.append((por_horario[bloque].pop(), dia, *bloque))
+                else:
+                    sobrantes_deseados.append(bloque)
+            sobrantes_actuales = sorted(
+                bloque_id for ids in por_horario.values() for bloque_id in ids
+            )
             
-            try:
-                from datetime import datetime
-                hora_inicio = datetime.strptime(config['hora_inicio'], '%H:%M').time()
-                hora_fin = datetime.strptime(config['hora_fin'], '%H:%M').time()
-                
-                DisponibilidadRepository.crear(db, {
-                    'profesional_id': profesional_id,
-                    'dia_semana': dia_normalizado,
-                    'hora_inicio': hora_inicio,
-                    'hora_fin': hora_fin,
-                    'disponible': True
-                })
-            except (ValueError, KeyError):
-                continue
+            # Los demás se reutilizan en orden; lo que sobra se crea o se borra
+            for bloque_id, (inicio, fin) in zip(sobrantes_actuales, sobrantes_deseados):
+                actualizados.append((bloque_id, dia, inicio, fin))
+            for inicio, fin in sobrantes_deseados[len(sobrantes_actuales):]:
+                insertados.append((dia, inicio, fin))
+            eliminados.extend(sobrantes_actuales[len(sobrantes_deseados):])
         
-        return True
+        return conservados, actualizados, insertados, eliminados
+    
+    @staticmethod
+    def reemplazar_semana(
+        db: Session,
+        usuario_id: int,
+        semana: Dict[DiaSemana, List[Tuple[int, int]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Deja la disponibilidad del profesional igual a `semana` (bloques
+        (minuto_inicio, minuto_fin) por día) aplicando solo las diferencias.
+        
+        Los bloques que no cambian se conservan, los que cambian de horario se
+        actualizan con un único UPDATE ... FROM (VALUES ...), los nuevos se crean
+        con un INSERT de varias filas y los sobrantes se borran con un DELETE.
+        Todo ocurre en una transacción; el perfil queda bloqueado mientras tanto
+        para que dos reemplazos simultáneos no se mezclen.
+        
+        Retorna la semana resultante y el número de cambios sin volver a
+        consultarla, o None si el usuario no tiene perfil profesional.
+        """
+        filas = db.execute(
+            select(
+                PerfilProfesional.id.label("perfil_id"),
+                Disponibilidad.id,
+                Disponibilidad.dia_semana,
+                Disponibilidad.minuto_inicio,
+                Disponibilidad.minuto_fin
+            ).select_from(PerfilProfesional).outerjoin(
+                Disponibilidad,
+                Disponibilidad.profesional_id == PerfilProfesional.id
+            ).where(
+                PerfilProfesional.usuario_id == usuario_id
+            ).with_for_update(of=PerfilProfesional)
+        ).all()
+        
+        if not filas:
+            return None
+        
+        perfil_id = filas[0].perfil_id
+        actuales = defaultdict(list)
+        for fila in filas:
+            if fila.id is not None:
+                actuales[fila.dia_semana].append((fila.minuto_inicio, fila.minuto_fin, fila.id))
+        
+        conservados, actualizados, insertados, eliminados = DisponibilidadRepository.diferencias_semana(
+            actuales, semana
+        )
+        
+        if eliminados:
+            db.execute(
+                delete(Disponibilidad).where(Disponibilidad.id.in_(eliminados)),
+                execution_options={"synchronize_session": False}
+            )
+        
+        if actualizados:
+            nuevos = values(
+                column("id", Integer),
+                column("minuto_inicio", Integer),
+                column("minuto_fin", Integer),
+                name="nuevos"
+            ).data([(bloque_id, inicio, fin) for bloque_id, _, inicio, fin in actualizados])
+            db.execute(
+                update(Disponibilidad).where(
+                    Disponibilidad.id == nuevos.c.id
+                ).values(
+                    minuto_inicio=nuevos.c.minuto_inicio,
+                    minuto_fin=nuevos.c.minuto_fin
+                ),
+                execution_options={"synchronize_session": False}
+            )
+        
+        creados = []
+        if insertados:
+            creados = db.execute(
+                insert(Disponibilidad).values([
+                    {
+                        "profesional_id": perfil_id,
+                        "dia_semana": dia,
+                        "minuto_inicio": inicio,
+                        "minuto_fin": fin
+                    }
+                    for dia, inicio, fin in insertados
+                ]).returning(
+                    Disponibilidad.id,
+                    Disponibilidad.dia_semana,
+                    Disponibilidad.minuto_inicio,
+                    Disponibilidad.minuto_fin
+                )
+            ).all()
+        
+        db.commit()
+        
+        orden = {dia: i for i, dia in enumerate(DiaSemana)}
+        bloques = sorted(
+            conservados + actualizados + [tuple(fila) for fila in creados],
+            key=lambda bloque: (orden[bloque[1]], bloque[2])
+        )
+        return {
+            "bloques": [
+                {
+                    "id": bloque_id,
+                    "dia_semana": dia,
+                    "minuto_inicio": inicio,
+                    "minuto_fin": fin
+                }
+                for bloque_id, dia, inicio, fin in bloques
+            ],
+            "insertados": len(creados),
+            "actualizados": len(actualizados),
+            "eliminados": len(eliminados)
+        }
     
     @staticmethod
     def verificar_disponibilidad(
@@ -158,10 +405,10 @@ class DisponibilidadRepository:
             db, profesional_id, dia_semana
         )
         
-        hora_time = hora.time()
+        minuto = hora.hour * 60 + hora.minute
         
         for disp in disponibilidades:
-            if disp.hora_inicio <= hora_time <= disp.hora_fin and disp.disponible:
+            if disp.minuto_inicio <= minuto < disp.minuto_fin:
                 return True
         
         return False
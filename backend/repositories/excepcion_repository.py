@@ -0,0 +1,118 @@
+"""
+Repositorio para excepciones de disponibilidad (bloqueos, turnos extra y festivos)
+"""
+
+from typing import Optional, List, Dict
+from datetime import date
+from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from models import ExcepcionDisponibilidad, TipoExcepcion
+
+
+class ExcepcionRepository:
+    """Repositorio para gestionar excepciones de la plantilla semanal"""
+    
+    @staticmethod
+    def crear(db: Session, datos: dict) -> ExcepcionDisponibilidad:
+        """Registra una nueva excepción"""
+        excepcion = ExcepcionDisponibilidad(**datos)
+        db.add(excepcion)
+        db.commit()
+        db.refresh(excepcion)
+        return excepcion
+    
+    @staticmethod
+    def obtener_de_profesional(
+        db: Session,
+        profesional_id: int,
+        excepcion_id: int
+    ) -> Optional[ExcepcionDisponibilidad]:
+        """Obtiene una excepción solo si pertenece al profesional"""
+        return db.query(ExcepcionDisponibilidad).filter(
+            ExcepcionDisponibilidad.id == excepcion_id,
+            ExcepcionDisponibilidad.profesional_id == profesional_id
+        ).first()
+    
+    @staticmethod
+    def obtener_por_profesional(
+        db: Session,
+        profesional_id: int,
+        desde: date,
+        incluir_festivos: bool = False
+    ) -> List[ExcepcionDisponibilidad]:
+        """Excepciones del profesional (y opcionalmente festivos) que terminan en `desde` o después"""
+        dueno = ExcepcionDisponibilidad.profesional_id == profesional_id
+        if incluir_festivos:
+            dueno = or_(dueno, ExcepcionDisponibilidad.profesional_id.is_(None))
+        
+        return db.query(ExcepcionDisponibilidad).filter(
+            dueno,
+            ExcepcionDisponibilidad.fecha_hasta >= desde
+        ).order_by(
+            ExcepcionDisponibilidad.fecha_desde.asc(),
+            ExcepcionDisponibilidad.id.asc()
+        ).all()
+    
+    @staticmethod
+    def obtener_en_rango(
+        db: Session,
+        profesional_ids: List[int],
+        desde: date,
+        hasta: date,
+        incluir_festivos: bool = False
+    ) -> List[ExcepcionDisponibilidad]:
+        """
+        Excepciones de varios profesionales (y opcionalmente los festivos) que
+        tocan algún día de [desde, hasta], en una sola consulta.
+        
+        `rango && daterange(desde, hasta, '[]')` es una búsqueda de rangos
+        sobre el índice GiST (profesional_id, rango): el costo depende de las
+        excepciones encontradas, no de cuántos días tenga el rango.
+        """
+        if not profesional_ids and not incluir_festivos:
+            return []
+        
+        dueno = ExcepcionDisponibilidad.profesional_id.in_(profesional_ids)
+        if incluir_festivos:
+            dueno = or_(dueno, ExcepcionDisponibilidad.profesional_id.is_(None))
+        
+        return db.query(ExcepcionDisponibilidad).filter(
+            dueno,
+            ExcepcionDisponibilidad.rango.overlaps(func.daterange(desde, hasta, "[]"))
+        ).all()
+    
+    @staticmethod
+    def eliminar(db: Session, excepcion: ExcepcionDisponibilidad) -> None:
+        """Elimina una excepción"""
+        db.delete(excepcion)
+        db.commit()
+    
+    @staticmethod
+    def cargar_festivos(db: Session, festivos: Dict[date, str]) -> int:
+        """
+        Guarda festivos nacionales con un solo INSERT; los que ya existen
+        (índice único ux_excepciones_festivo_fecha) se ignoran.
+        Retorna cuántos se crearon.
+        """
+        if not festivos:
+            return 0
+        
+        sentencia = insert(ExcepcionDisponibilidad).values([
+            {
+                "profesional_id": None,
+                "tipo": TipoExcepcion.FESTIVO,
+                "fecha_desde": fecha,
+                "fecha_hasta": fecha,
+                "motivo": nombre
+            }
+            for fecha, nombre in festivos.items()
+        ]).on_conflict_do_nothing(
+            index_elements=["fecha_desde"],
+            index_where=ExcepcionDisponibilidad.profesional_id.is_(None)
+        )
+        
+        resultado = db.execute(sentencia)
+        db.commit()
+        return resultado.rowcount
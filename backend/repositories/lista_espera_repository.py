@@ -0,0 +1,119 @@
+"""
+Repositorio para operaciones de la lista de espera
+"""
+
+from typing import List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, or_
+
+from models import ListaEspera, EstadoEspera, User
+
+
+class ListaEsperaRepository:
+    """Repositorio para gestionar la lista de espera"""
+    
+    @staticmethod
+    def crear(db: Session, datos: dict) -> ListaEspera:
+        """Registra una nueva solicitud en la lista de espera"""
+        solicitud = ListaEspera(**datos)
+        db.add(solicitud)
+        db.commit()
+        db.refresh(solicitud)
+        return solicitud
+    
+    @staticmethod
+    def obtener_por_id(db: Session, solicitud_id: int) -> Optional[ListaEspera]:
+        """Obtiene una solicitud por ID"""
+        return db.query(ListaEspera).filter(ListaEspera.id == solicitud_id).first()
+    
+    @staticmethod
+    def obtener_por_cliente(
+        db: Session,
+        cliente_id: int,
+        solo_activas: bool = True
+    ) -> List[Tuple[ListaEspera, User]]:
+        """Obtiene las solicitudes de un cliente con el profesional"""
+        query = db.query(ListaEspera, User).join(
+            User, ListaEspera.profesional_id == User.id
+        ).filter(ListaEspera.cliente_id == cliente_id)
+        
+        if solo_activas:
+            query = query.filter(ListaEspera.estado == EstadoEspera.ACTIVA)
+        
+        return query.order_by(ListaEspera.desde.asc()).all()
+    
+    @staticmethod
+    def obtener_por_profesional(
+        db: Session,
+        profesional_id: int
+    ) -> List[Tuple[ListaEspera, User]]:
+        """Obtiene las solicitudes activas de un profesional en orden de prioridad"""
+        return db.query(ListaEspera, User).join(
+            User, ListaEspera.cliente_id == User.id
+        ).filter(
+            ListaEspera.profesional_id == profesional_id,
+            ListaEspera.estado == EstadoEspera.ACTIVA
+        ).order_by(
+            ListaEspera.prioridad.desc(),
+            ListaEspera.created_at.asc()
+        ).all()
+    
+    @staticmethod
+    def buscar_coincidencias(
+        db: Session,
+        profesional_id: int,
+        inicio: datetime,
+        fin: datetime,
+        excluir_cliente_id: Optional[int] = None,
+        limite: int = 3
+    ) -> List[ListaEspera]:
+        """
+        Solicitudes activas cuya ventana comparte con [inicio, fin) al menos
+        su duración, en orden de prioridad y antigüedad.
+        
+        El filtro `ventana && [inicio, fin)` es una búsqueda de rangos sobre el
+        índice GiST parcial (profesional_id, ventana); el resto de condiciones
+        solo se evalúa sobre las solicitudes que se solapan con el horario.
+        """
+        solapamiento = func.least(ListaEspera.hasta, fin) - func.greatest(ListaEspera.desde, inicio)
+        
+        query = db.query(ListaEspera).filter(
+            ListaEspera.profesional_id == profesional_id,
+            ListaEspera.estado == EstadoEspera.ACTIVA,
+            ListaEspera.ventana.overlaps(func.tstzrange(inicio, fin, "[)")),
+            solapamiento >= func.make_interval(0, 0, 0, 0, 0, ListaEspera.duracion_minutos)
+        )
+        
+        if excluir_cliente_id:
+            query = query.filter(ListaEspera.cliente_id != excluir_cliente_id)
+        
+        return query.order_by(
+            ListaEspera.prioridad.desc(),
+            ListaEspera.created_at.asc()
+        ).limit(limite).all()
+    
+    @staticmethod
+    def marcar_atendidas(
+        db: Session,
+        cliente_id: int,
+        profesional_id: int,
+        *fechas: datetime
+    ) -> int:
+        """
+        Cierra las solicitudes del cliente que cubren alguna de las fechas
+        recién agendadas (una cita o toda una serie), con un solo UPDATE
+        """
+        if not fechas:
+            return 0
+        cantidad = db.query(ListaEspera).filter(
+            ListaEspera.cliente_id == cliente_id,
+            ListaEspera.profesional_id == profesional_id,
+            ListaEspera.estado == EstadoEspera.ACTIVA,
+            or_(*[
+                and_(ListaEspera.desde <= fecha_hora, ListaEspera.hasta > fecha_hora)
+                for fecha_hora in fechas
+            ])
+        ).update({ListaEspera.estado: EstadoEspera.ATENDIDA}, synchronize_session=False)
+        db.commit()
+        return cantidad
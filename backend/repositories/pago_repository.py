@@ -2,12 +2,12 @@
 Repositorio para operaciones de pagos
 """
 
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import Row, func, and_, tuple_
 
-from models import Pago, EstadoPago, Cita
+from models import Pago, EstadoPago, Cita, User, PerfilProfesional
 
 
 class PagoRepository:
@@ -56,6 +56,69 @@ class PagoRepository:
         
         return query.order_by(Pago.created_at.desc()).all()
     
+    @staticmethod
+    def obtener_historial_cliente(
+        db: Session,
+        cliente_id: int,
+        estado: Optional[EstadoPago] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        antes_de: Optional[Tuple[datetime, int]] = None,
+        limite: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Historial de pagos de un cliente, del más reciente al más antiguo, en
+        una sola consulta: solo las columnas del pago, de su cita y del
+        profesional que muestra el historial.
+        
+        Pagina por clave (created_at, id) a partir de `antes_de`; sin `limite`
+        retorna todos. fecha_desde / fecha_hasta (exclusiva) filtran por la
+        fecha del pago.
+        """
+        query = db.query(
+            Pago.id,
+            Pago.cita_id,
+            Pago.monto,
+            Pago.estado,
+            Pago.metodo_pago,
+            Pago.referencia_transaccion,
+            Pago.created_at,
+            Cita.fecha_hora.label("cita_fecha_hora"),
+            Cita.motivo.label("cita_motivo"),
+            Cita.estado.label("cita_estado"),
+            Cita.duracion_minutos.label("cita_duracion_minutos"),
+            User.nombre.label("profesional_nombre"),
+            User.apellido.label("profesional_apellido"),
+            User.telefono.label("profesional_telefono"),
+            PerfilProfesional.especialidad.label("profesional_especialidad")
+        ).join(
+            Cita, Cita.id == Pago.cita_id
+        ).join(
+            User, User.id == Cita.profesional_id
+        ).outerjoin(
+            PerfilProfesional, PerfilProfesional.usuario_id == Cita.profesional_id
+        ).filter(
+            Cita.cliente_id == cliente_id
+        )
+        
+        if estado:
+            query = query.filter(Pago.estado == estado)
+        
+        if fecha_desde:
+            query = query.filter(Pago.created_at >= fecha_desde)
+        
+        if fecha_hasta:
+            query = query.filter(Pago.created_at < fecha_hasta)
+        
+        if antes_de:
+            query = query.filter(tuple_(Pago.created_at, Pago.id) < tuple_(*antes_de))
+        
+        query = query.order_by(Pago.created_at.desc(), Pago.id.desc())
+        if limite:
+            query = query.limit(limite)
+        
+        return query.all()
+    
     @staticmethod
     def obtener_por_profesional(
         db: Session,
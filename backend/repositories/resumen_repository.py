@@ -0,0 +1,174 @@
+"""
+Repositorio para los resúmenes diarios de citas y pagos por profesional
+"""
+
+from typing import Optional, List, Dict, Tuple
+from datetime import date
+from sqlalchemy.orm import Session
+from sqlalchemy import String, Date, and_, cast, delete, func, insert, literal, select, text, union_all
+from sqlalchemy.engine import Row
+
+from models import Cita, Pago, PerfilProfesional, ResumenCitaDiario, ResumenPagoDiario, EstadoCita, EstadoPago
+
+# [desde, hasta) en días locales; None deja abierto ese extremo
+Ventana = Tuple[Optional[date], Optional[date]]
+
+# (fuente, campo, estado): suma `campo` ("cantidad" o "monto") de las filas
+# de la fuente ("cita" o "pago") con ese estado (None = todos)
+Metrica = Tuple[str, str, Optional[str]]
+
+
+def _filas(profesional_id: int, desde: Optional[date] = None, hasta: Optional[date] = None):
+    """Filas de ambos resúmenes del profesional como (fuente, dia, estado, cantidad, monto)"""
+    consultas = []
+    for fuente, modelo in (("cita", ResumenCitaDiario), ("pago", ResumenPagoDiario)):
+        consulta = select(
+            literal(fuente).label("fuente"),
+            modelo.dia,
+            modelo.estado,
+            modelo.cantidad,
+            modelo.monto
+        ).where(modelo.profesional_id == profesional_id)
+        if desde is not None:
+            consulta = consulta.where(modelo.dia >= desde)
+        if hasta is not None:
+            consulta = consulta.where(modelo.dia < hasta)
+        consultas.append(consulta)
+    return union_all(*consultas).subquery("resumen")
+
+
+class ResumenRepository:
+    """Repositorio para leer y reconstruir los resúmenes diarios"""
+    
+    @staticmethod
+    def sumar(
+        db: Session,
+        profesional_id: int,
+        ventanas: Dict[str, Ventana],
+        metricas: Dict[str, Metrica]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Suma cada métrica en cada ventana con una sola consulta sobre los
+        resúmenes: SUM(...) FILTER (WHERE fuente, estado y días de la ventana).
+        """
+        resumen = _filas(profesional_id)
+        columnas, claves = [], []
+        for nombre, (desde, hasta) in ventanas.items():
+            for metrica, (fuente, campo, estado) in metricas.items():
+                condiciones = [resumen.c.fuente == fuente]
+                if estado is not None:
+                    condiciones.append(resumen.c.estado == estado)
+                if desde is not None:
+                    condiciones.append(resumen.c.dia >= desde)
+                if hasta is not None:
+                    condiciones.append(resumen.c.dia < hasta)
+                columnas.append(func.coalesce(
+                    func.sum(resumen.c[campo]).filter(and_(*condiciones)), 0
+                ).label(f"m{len(columnas)}"))
+                claves.append((nombre, metrica))
+        
+        fila = db.execute(select(*columnas).select_from(resumen)).one()
+        
+        resultado = {nombre: {} for nombre in ventanas}
+        for (nombre, metrica), valor in zip(claves, fila):
+            resultado[nombre][metrica] = int(valor)
+        return resultado
+    
+    @staticmethod
+    def obtener_serie(
+        db: Session,
+        profesional_id: int,
+        desde: date,
+        hasta: date,
+        metricas: Dict[str, Metrica],
+        unidad: str = "day"
+    ) -> List[Row]:
+        """
+        Métricas por periodo ("day", "week" o "month" de date_trunc) entre
+        desde y hasta (exclusivo), ordenadas. Solo aparecen periodos con datos.
+        """
+        filas = _filas(profesional_id, desde, hasta)
+        # El periodo se calcula en una subconsulta para agrupar por su columna
+        resumen = select(
+            filas,
+            cast(func.date_trunc(unidad, filas.c.dia), Date).label("periodo")
+        ).subquery("resumen_periodo")
+        
+        columnas = []
+        for metrica, (fuente, campo, estado) in metricas.items():
+            condiciones = [resumen.c.fuente == fuente]
+            if estado is not None:
+                condiciones.append(resumen.c.estado == estado)
+            columnas.append(func.coalesce(
+                func.sum(resumen.c[campo]).filter(and_(*condiciones)), 0
+            ).label(metrica))
+        
+        return db.execute(
+            select(resumen.c.periodo, *columnas).group_by(resumen.c.periodo).order_by(resumen.c.periodo)
+        ).all()
+    
+    @staticmethod
+    def reconstruir(db: Session, profesional_ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """
+        Recalcula los resúmenes desde las citas y pagos (de todos o de
+        algunos profesionales) en una transacción. Bloquea las escrituras de
+        los triggers mientras tanto para que ningún cambio se cuente dos
+        veces ni se pierda. Retorna cuántas filas quedaron en cada resumen.
+        """
+        db.execute(text(
+            "LOCK TABLE resumen_citas_diario, resumen_pagos_diario IN SHARE ROW EXCLUSIVE MODE"
+        ))
+        
+        # Las filas se agrupan desde subconsultas: así el GROUP BY usa sus
+        # columnas y no repite expresiones con parámetros
+        origen_citas = select(
+            Cita.profesional_id,
+            Cita.fecha_local.label("dia"),
+            func.coalesce(cast(Cita.estado, String), EstadoCita.PENDIENTE.name).label("estado"),
+            Cita.id,
+            Cita.precio.label("monto")
+        ).where(Cita.fecha_local.isnot(None))
+        
+        # Mismo día que calcula resumen_pagos_sumar en el trigger
+        origen_pagos = select(
+            Cita.profesional_id,
+            cast(func.timezone(
+                func.coalesce(PerfilProfesional.zona_horaria, func.zona_horaria_por_defecto()),
+                func.coalesce(Pago.created_at, Cita.fecha_hora)
+            ), Date).label("dia"),
+            func.coalesce(cast(Pago.estado, String), EstadoPago.PENDIENTE.name).label("estado"),
+            Pago.id,
+            Pago.monto
+        ).select_from(Pago).join(
+            Cita, Cita.id == Pago.cita_id
+        ).outerjoin(
+            PerfilProfesional, PerfilProfesional.usuario_id == Cita.profesional_id
+        )
+        
+        borrar_citas = delete(ResumenCitaDiario)
+        borrar_pagos = delete(ResumenPagoDiario)
+        if profesional_ids is not None:
+            origen_citas = origen_citas.where(Cita.profesional_id.in_(profesional_ids))
+            origen_pagos = origen_pagos.where(Cita.profesional_id.in_(profesional_ids))
+            borrar_citas = borrar_citas.where(ResumenCitaDiario.profesional_id.in_(profesional_ids))
+            borrar_pagos = borrar_pagos.where(ResumenPagoDiario.profesional_id.in_(profesional_ids))
+        
+        citas, pagos = [
+            select(
+                origen.c.profesional_id,
+                origen.c.dia,
+                origen.c.estado,
+                func.count(origen.c.id),
+                func.coalesce(func.sum(origen.c.monto), 0)
+            ).group_by(origen.c.profesional_id, origen.c.dia, origen.c.estado)
+            for origen in (origen_citas.subquery(), origen_pagos.subquery())
+        ]
+        
+        columnas = ["profesional_id", "dia", "estado", "cantidad", "monto"]
+        db.execute(borrar_citas)
+        db.execute(borrar_pagos)
+        filas_citas = db.execute(insert(ResumenCitaDiario).from_select(columnas, citas)).rowcount
+        filas_pagos = db.execute(insert(ResumenPagoDiario).from_select(columnas, pagos)).rowcount
+        db.commit()
+        
+        return {"citas": filas_citas, "pagos": filas_pagos}
@@ -1,4 +1,4 @@
 # Este archivo permite importar las rutas desde la carpeta routes
-from . import auth, profesionales, citas, pagos, perfil
+from . import auth, profesionales, citas, pagos, perfil, lista_espera, clientes
 
-__all__ = ["auth", "profesionales", "citas", "pagos", "perfil"]
+__all__ = ["auth", "profesionales", "citas", "pagos", "perfil", "lista_espera", "clientes"]
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 
 from schemas import UserLogin, UserCreate, Token, User as UserSchema
@@ -15,6 +15,7 @@ from security import (
 from database import get_db
 from models import User, TipoUsuario
 from utils.notificaciones import notificar_bienvenida_usuario
+from utils.paginacion import decodificar_cursor, recortar_pagina, publicar_cursor
 
 router = APIRouter(prefix="/api/auth", tags=["Autenticación"])
 
@@ -175,14 +176,32 @@ async def get_current_user_info(
 
 @router.get("/users", response_model=List[UserSchema])
 async def list_users(
+    response: Response,
+    limite: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Lista todos los usuarios (solo para pruebas)
     En producción, esto debería estar restringido a administradores
+    
+    - **limite**: Usuarios por página, en orden de id. Si hay más, el
+      encabezado X-Siguiente-Cursor trae el `cursor` de la siguiente página
     """
-    users = db.query(User).all()
+    despues_de = decodificar_cursor(cursor, int)
+    
+    query = db.query(User)
+    if despues_de:
+        query = query.filter(User.id > despues_de[0])
+    
+    query = query.order_by(User.id)
+    if limite:
+        # Un usuario de más indica si hay otra página
+        query = query.limit(limite + 1)
+    
+    users, siguiente = recortar_pagina(query.all(), limite, lambda usuario: (usuario.id,))
+    publicar_cursor(response, siguiente)
     return users
 
 
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 
+from config import settings
 from database import get_db
 from models import Cita, User, PerfilProfesional, EstadoCita
-from schemas import CitaCreate, CitaResponse, CitaUpdate
+from schemas import CitaCreate, CitaSerieCreate, RetencionCreate, CitaResponse, CitaUpdate
 from security import get_current_active_user
+from repositories import CitaRepository
+from services import calendario_service
+from services.plantilla_service import verificar_horario_atencion
+from services.cita_service import crear_serie_citas
+from services import lista_espera_service
+from services.barrido_service import obtener_metricas
+from utils import retenciones
+from utils.cargadores import cargadores
+from utils.horarios import obtener_zona, inicio_del_dia
+from utils.paginacion import decodificar_cursor, recortar_pagina, publicar_cursor
 from utils.notificaciones import (
     notificar_cita_creada,
     notificar_cita_cancelada,
@@ -19,12 +30,27 @@ router = APIRouter(prefix="/api/citas", tags=["citas"])
 @router.get("/admin/todas", status_code=status.HTTP_200_OK)
 def obtener_todas_citas_admin(
     estado: Optional[str] = None,
+    profesional_id: Optional[int] = None,
+    cliente_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    busqueda: Optional[str] = Query(None, max_length=100),
+    limite: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
     """
-    Endpoint para admin: obtiene TODAS las citas del sistema
+    Endpoint para admin: obtiene las citas del sistema, de la más reciente a
+    la más antigua, en páginas de hasta `limite` citas
     Requiere que el usuario actual sea admin
+    
+    - **fecha_desde** / **fecha_hasta**: Días (inclusive) en ZONA_HORARIA
+    - **busqueda**: Nombre, apellido o email del cliente o del profesional, o especialidad
+    - **cursor**: `siguiente_cursor` de la página anterior
+    
+    La primera página (sin cursor) incluye `contadores`: citas de todos los
+    estados con los demás filtros, para no contar solo las páginas cargadas
     """
     # Obtener el usuario completo de la base de datos
     user = db.query(User).filter(User.email == current_user.email).first()
@@ -38,116 +64,172 @@ def obtener_todas_citas_admin(
             detail="Solo los administradores pueden acceder a todas las citas"
         )
     
-    query = db.query(Cita)
-    
-    # Filtrar por estado si se proporciona
+    estado_enum = None
     if estado and estado != "todas":
         try:
             estado_enum = EstadoCita[estado.upper()]
-            query = query.filter(Cita.estado == estado_enum)
         except KeyError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Estado inválido. Opciones: {[e.name.lower() for e in EstadoCita]}"
             )
     
-    citas = query.order_by(Cita.fecha_hora.desc()).all()
+    antes_de = decodificar_cursor(cursor, datetime, int)
+    if fecha_desde and fecha_hasta and fecha_hasta < fecha_desde:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'fecha_hasta' no puede ser anterior a 'fecha_desde'"
+        )
     
-    # Enriquecer con información del cliente y profesional
-    citas_response = []
-    for cita in citas:
-        cliente = db.query(User).filter(User.id == cita.cliente_id).first()
-        profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-        perfil_prof = db.query(PerfilProfesional).filter(
-            PerfilProfesional.usuario_id == cita.profesional_id
-        ).first()
-        
-        cita_dict = {
-            "id": cita.id,
-            "fecha_hora": cita.fecha_hora.isoformat() if cita.fecha_hora else None,
-            "duracion_minutos": cita.duracion_minutos,
-            "estado": cita.estado.name.lower(),
-            "motivo": cita.motivo,
-            "notas": cita.notas,
-            "precio": float(cita.precio) if cita.precio else 0,
-            "created_at": cita.created_at.isoformat() if hasattr(cita, 'created_at') and cita.created_at else None,
+    zona = obtener_zona()
+    filtros = {
+        "profesional_id": profesional_id,
+        "cliente_id": cliente_id,
+        "fecha_desde": inicio_del_dia(fecha_desde, zona) if fecha_desde else None,
+        "fecha_hasta": inicio_del_dia(fecha_hasta + timedelta(days=1), zona) if fecha_hasta else None,
+        "busqueda": busqueda
+    }
+    # Una fila de más indica si hay otra página
+    filas = CitaRepository.listar_admin(
+        db,
+        limite + 1,
+        antes_de=antes_de,
+        estado=estado_enum,
+        **filtros
+    )
+    filas, siguiente_cursor = recortar_pagina(filas, limite, lambda fila: (fila.fecha_hora, fila.id))
+    
+    citas_response = [
+        {
+            "id": fila.id,
+            "fecha_hora": fila.fecha_hora.isoformat() if fila.fecha_hora else None,
+            "duracion_minutos": fila.duracion_minutos,
+            "estado": fila.estado.name.lower(),
+            "motivo": fila.motivo,
+            "notas": fila.notas,
+            "precio": float(fila.precio) if fila.precio else 0,
+            "created_at": fila.created_at.isoformat() if fila.created_at else None,
             "cliente": {
-                "id": cliente.id,
-                "nombre_completo": f"{cliente.nombre} {cliente.apellido}",
-                "email": cliente.email,
-                "telefono": cliente.telefono
-            } if cliente else None,
+                "id": fila.cliente_id,
+                "nombre_completo": f"{fila.cliente_nombre} {fila.cliente_apellido}",
+                "email": fila.cliente_email,
+                "telefono": fila.cliente_telefono
+            } if fila.cliente_id else None,
             "profesional": {
-                "id": profesional.id,
-                "nombre_completo": f"{profesional.nombre} {profesional.apellido}",
-                "email": profesional.email,
-                "especialidad": perfil_prof.especialidad if perfil_prof else "No especificada",
-                "telefono": profesional.telefono
-            } if profesional else None
+                "id": fila.profesional_id,
+                "nombre_completo": f"{fila.profesional_nombre} {fila.profesional_apellido}",
+                "email": fila.profesional_email,
+                "especialidad": fila.especialidad or "No especificada",
+                "telefono": fila.profesional_telefono
+            } if fila.profesional_id else None
         }
-        citas_response.append(cita_dict)
+        for fila in filas
+    ]
     
     return {
         "citas": citas_response,
-        "total": len(citas_response)
+        "total": len(citas_response),  # Citas en esta página
+        "limite": limite,
+        "siguiente_cursor": siguiente_cursor,
+        "contadores": CitaRepository.contar_admin_por_estado(db, **filtros) if not antes_de else None
+    }
+
+
+@router.get("/admin/barrido", status_code=status.HTTP_200_OK)
+def obtener_metricas_barrido(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Métricas del barrido de citas vencidas en esta instancia:
+    filas procesadas, duración de la última vuelta y lag (antigüedad de la
+    cita vencida más vieja que sigue sin cerrar)
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if not user or user.tipo_usuario != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden consultar el barrido"
+        )
+    
+    return obtener_metricas()
+
+
+def _cita_con_profesional(cita: Cita, profesional: User, perfil: Optional[PerfilProfesional]) -> dict:
+    return {
+        "id": cita.id,
+        "fecha_hora": cita.fecha_hora,
+        "duracion_minutos": cita.duracion_minutos,
+        "estado": cita.estado.name,
+        "motivo": cita.motivo,
+        "notas": cita.notas,
+        "precio": cita.precio,
+        "profesional": {
+            "id": profesional.id,
+            "nombre_completo": f"{profesional.nombre} {profesional.apellido}",
+            "especialidad": perfil.especialidad if perfil else None,
+            "foto_url": perfil.foto_url if perfil else None,
+            "telefono": profesional.telefono,
+            "direccion": perfil.direccion if perfil else None
+        }
     }
 
 
 @router.get("/mis-citas", response_model=List[CitaResponse])
 def obtener_mis_citas(
+    response: Response,
     estado: str = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    limite: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
     """
     Obtiene las citas del cliente actual
     Puede filtrar por estado: pendiente, confirmada, cancelada, completada
+    
+    - **fecha_desde** / **fecha_hasta**: Días (inclusive) en ZONA_HORARIA
+    - **limite**: Citas por página. Si hay más, el encabezado X-Siguiente-Cursor
+      trae el `cursor` de la siguiente página
+    
+    Siempre son dos consultas (usuario y citas con su profesional), sin
+    importar cuántas citas tenga el cliente
     """
     # Obtener el usuario completo de la base de datos
     user = db.query(User).filter(User.email == current_user.email).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
-    query = db.query(Cita).filter(Cita.cliente_id == user.id)
-    
+    estado_enum = None
     if estado:
         try:
-            estado_enum = EstadoCita[estado]
-            query = query.filter(Cita.estado == estado_enum)
+            estado_enum = EstadoCita[estado.upper()]
         except KeyError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Estado inválido. Opciones: {[e.name for e in EstadoCita]}"
             )
     
-    citas = query.order_by(Cita.fecha_hora.desc()).all()
+    antes_de = decodificar_cursor(cursor, datetime, int)
     
-    # Enriquecer con información del profesional
-    citas_response = []
-    for cita in citas:
-        profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-        perfil = db.query(PerfilProfesional).filter(
-            PerfilProfesional.usuario_id == cita.profesional_id
-        ).first()
-        
-        cita_dict = {
-            "id": cita.id,
-            "fecha_hora": cita.fecha_hora,
-            "duracion_minutos": cita.duracion_minutos,
-            "estado": cita.estado.name,
-            "motivo": cita.motivo,
-            "notas": cita.notas,
-            "precio": cita.precio,
-            "profesional": {
-                "id": profesional.id,
-                "nombre_completo": f"{profesional.nombre} {profesional.apellido}",
-                "especialidad": perfil.especialidad if perfil else None,
-                "foto_url": perfil.foto_url if perfil else None
-            }
-        }
-        citas_response.append(cita_dict)
+    zona = obtener_zona()
+    filas = CitaRepository.obtener_de_cliente_con_profesional(
+        db,
+        user.id,
+        estado=estado_enum,
+        fecha_desde=inicio_del_dia(fecha_desde, zona) if fecha_desde else None,
+        fecha_hasta=inicio_del_dia(fecha_hasta + timedelta(days=1), zona) if fecha_hasta else None,
+        antes_de=antes_de,
+        # Una fila de más indica si hay otra página
+        limite=limite + 1 if limite else None
+    )
     
-    return citas_response
+    filas, siguiente = recortar_pagina(filas, limite, lambda fila: (fila[0].fecha_hora, fila[0].id))
+    publicar_cursor(response, siguiente)
+    
+    return [_cita_con_profesional(cita, profesional, perfil) for cita, profesional, perfil in filas]
 
 
 @router.get("/cita/{cita_id}", response_model=CitaResponse)
@@ -162,41 +244,89 @@ def obtener_cita(
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
-    cita = db.query(Cita).filter(
-        Cita.id == cita_id,
-        Cita.cliente_id == user.id
-    ).first()
+    fila = CitaRepository.obtener_de_cliente_con_profesional_por_id(db, user.id, cita_id)
     
-    if not cita:
+    if not fila:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cita no encontrada"
         )
     
-    profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == cita.profesional_id
-    ).first()
+    return _cita_con_profesional(*fila)
+
+
+@router.post("/retener", status_code=status.HTTP_201_CREATED)
+def retener_horario(
+    datos: RetencionCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Retiene un horario durante RETENCION_TTL_SEGUNDOS mientras el cliente
+    completa la reserva. Se envía el retencion_id al agendar y la retención
+    sigue viva hasta que se ejecuta el pago; si no se usa, vence sola.
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    
+    fecha_hora = datos.fecha_hora
+    if fecha_hora.tzinfo is None:
+        fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+    
+    if fecha_hora <= datetime.now(timezone.utc):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha debe ser futura"
+        )
+    
+    verificar_horario_atencion(db, datos.profesional_id, fecha_hora, datos.duracion_minutos)
+    
+    if CitaRepository.verificar_conflicto(db, datos.profesional_id, fecha_hora, datos.duracion_minutos):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El profesional ya tiene una cita en ese horario"
+        )
+    
+    retencion = retenciones.retener_horario(
+        datos.profesional_id, fecha_hora, datos.duracion_minutos, user.id
+    )
+    if not retencion:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El horario está reservado temporalmente por otro cliente"
+        )
     
     return {
-        "id": cita.id,
-        "fecha_hora": cita.fecha_hora,
-        "duracion_minutos": cita.duracion_minutos,
-        "estado": cita.estado.name,
-        "motivo": cita.motivo,
-        "notas": cita.notas,
-        "precio": cita.precio,
-        "profesional": {
-            "id": profesional.id,
-            "nombre_completo": f"{profesional.nombre} {profesional.apellido}",
-            "especialidad": perfil.especialidad if perfil else None,
-            "foto_url": perfil.foto_url if perfil else None,
-            "telefono": profesional.telefono,
-            "direccion": perfil.direccion if perfil else None
-        }
+        "retencion_id": retencion.id,
+        "profesional_id": retencion.profesional_id,
+        "fecha_hora": retencion.fecha_hora,
+        "duracion_minutos": retencion.duracion_minutos,
+        "expira_en": retencion.expira_en
     }
 
 
+@router.delete("/retener/{retencion_id}")
+def liberar_retencion(
+    retencion_id: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Libera un horario retenido antes de que venza"""
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    
+    if not retenciones.retencion_propia(retencion_id, user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Retención no encontrada o vencida"
+        )
+    
+    retenciones.liberar_retencion(retencion_id)
+    return {"message": "Horario liberado"}
+
+
 @router.post("/agendar", response_model=CitaResponse)
 def agendar_cita(
     cita_data: CitaCreate,
@@ -238,47 +368,64 @@ def agendar_cita(
                 detail="La fecha debe ser futura"
             )
         
-        # Verificar disponibilidad (evitar conflictos)
-        # Obtener todas las citas del profesional en estados activos
-        fecha_fin_nueva = fecha_cita + timedelta(minutes=cita_data.duracion_minutos)
+        verificar_horario_atencion(db, profesional.id, fecha_cita, cita_data.duracion_minutos)
         
-        citas_existentes = db.query(Cita).filter(
-            Cita.profesional_id == cita_data.profesional_id,
-            Cita.estado.in_([EstadoCita.PENDIENTE, EstadoCita.CONFIRMADA])
-        ).all()
+        # Solo cuenta la retención si es del propio cliente y de este mismo horario
+        retencion = retenciones.retencion_propia(cita_data.retencion_id, user.id)
+        if retencion and (retencion.profesional_id, retencion.fecha_hora, retencion.duracion_minutos) != (
+            profesional.id, fecha_cita, cita_data.duracion_minutos
+        ):
+            retencion = None
         
-        # Verificar conflictos en Python
-        for cita_existente in citas_existentes:
-            fecha_fin_existente = cita_existente.fecha_hora + timedelta(minutes=cita_existente.duracion_minutos)
-            # Hay conflicto si las citas se solapan
-            if (fecha_cita < fecha_fin_existente and fecha_fin_nueva > cita_existente.fecha_hora):
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="El profesional ya tiene una cita en ese horario"
-                )
+        # Un horario retenido por otro cliente que está pagando no se puede tomar
+        if retenciones.horario_retenido(
+            cita_data.profesional_id,
+            fecha_cita,
+            cita_data.duracion_minutos,
+            excepto_retencion_id=retencion.id if retencion else None
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="El horario está reservado temporalmente por otro cliente"
+            )
         
-        # Crear la cita con la fecha ajustada
-        nueva_cita = Cita(
-            cliente_id=user.id,
-            profesional_id=cita_data.profesional_id,
-            fecha_hora=fecha_cita,
-            duracion_minutos=cita_data.duracion_minutos,
-            estado=EstadoCita.PENDIENTE,
-            motivo=cita_data.motivo,
-            notas=cita_data.notas,
-            precio=cita_data.precio
+        # La cita sin pagar ocupa el horario solo mientras dure la retención;
+        # sin retención previa tiene RETENCION_TTL_SEGUNDOS para pagarse
+        retenida_hasta = (
+            retencion.expira_en if retencion and retencion.expira_en
+            else fecha_actual + timedelta(seconds=settings.RETENCION_TTL_SEGUNDOS)
         )
         
-        db.add(nueva_cita)
-        db.commit()
-        db.refresh(nueva_cita)
+        # Crear la cita con la fecha ajustada. La restricción de exclusión de
+        # la tabla citas rechaza el INSERT si el horario ya está ocupado
+        nueva_cita = CitaRepository.crear_si_disponible(db, {
+            "cliente_id": user.id,
+            "profesional_id": cita_data.profesional_id,
+            "fecha_hora": fecha_cita,
+            "duracion_minutos": cita_data.duracion_minutos,
+            "estado": EstadoCita.PENDIENTE,
+            "motivo": cita_data.motivo,
+            "notas": cita_data.notas,
+            "precio": cita_data.precio,
+            "retencion_id": retencion.id if retencion else None,
+            "retenida_hasta": retenida_hasta
+        })
+        
+        if not nueva_cita:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="El profesional ya tiene una cita en ese horario"
+            )
+        
+        calendario_service.registrar_cambio_cita(db, profesional.id, nueva_cita.fecha_hora)
+        lista_espera_service.registrar_reserva(
+            db, nueva_cita.cliente_id, nueva_cita.profesional_id, nueva_cita.fecha_hora
+        )
         
         # Crear notificaciones para cliente y profesional
         notificar_cita_creada(db, nueva_cita, user, profesional)
         
-        perfil = db.query(PerfilProfesional).filter(
-            PerfilProfesional.usuario_id == profesional.id
-        ).first()
+        perfil = cargadores(db).perfiles.obtener(profesional.id)
     
         return {
             "id": nueva_cita.id,
@@ -308,6 +455,26 @@ def agendar_cita(
         )
 
 
+@router.post("/agendar-serie", status_code=status.HTTP_201_CREATED)
+def agendar_serie(
+    serie_data: CitaSerieCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Agenda una serie de citas recurrentes (semanal o quincenal)
+    
+    - Un cliente indica **profesional_id**; un profesional indica **cliente_id**
+    - **ocurrencias** o **hasta**: cuántas citas o hasta qué fecha
+    - **omitir_conflictos**: crear solo las fechas libres en lugar de rechazar la serie
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    
+    return crear_serie_citas(db, user, serie_data)
+
+
 @router.put("/cita/{cita_id}/cancelar")
 def cancelar_cita(
     cita_id: int,
@@ -338,14 +505,25 @@ def cancelar_cita(
         )
     
     # Obtener el profesional para las notificaciones
-    profesional = db.query(User).filter(User.id == cita.profesional_id).first()
+    profesional = cargadores(db).usuarios.obtener(cita.profesional_id)
     
     cita.estado = EstadoCita.CANCELADA
     db.commit()
     
+    # Si no se había pagado, su retención ya no tiene que proteger el horario
+    if cita.retencion_id:
+        retenciones.liberar_retencion(cita.retencion_id)
+    
+    calendario_service.registrar_cambio_cita(db, cita.profesional_id, cita.fecha_hora)
+    
     # Crear notificaciones de cancelación
     notificar_cita_cancelada(db, cita, user, profesional, "cliente")
     
+    # Ofrecer el horario liberado a la lista de espera
+    lista_espera_service.ofrecer_horario_liberado(
+        db, cita.profesional_id, cita.fecha_hora, cita.duracion_minutos, excluir_cliente_id=user.id
+    )
+    
     return {"message": "Cita cancelada exitosamente"}
 
 
@@ -385,36 +563,40 @@ def reagendar_cita(
             detail="La nueva fecha debe ser futura"
         )
     
-    # Verificar disponibilidad
-    fecha_fin_nueva = nueva_fecha + timedelta(minutes=cita.duracion_minutos)
+    verificar_horario_atencion(db, cita.profesional_id, fecha_reagendar, cita.duracion_minutos)
     
-    citas_existentes = db.query(Cita).filter(
-        Cita.profesional_id == cita.profesional_id,
-        Cita.id != cita_id,  # Excluir la cita actual
-        Cita.estado.in_([EstadoCita.PENDIENTE, EstadoCita.CONFIRMADA])
-    ).all()
+    if retenciones.horario_retenido(
+        cita.profesional_id,
+        fecha_reagendar,
+        cita.duracion_minutos,
+        excepto_retencion_id=cita.retencion_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El horario está reservado temporalmente por otro cliente"
+        )
     
-    # Verificar conflictos en Python
-    for cita_existente in citas_existentes:
-        fecha_fin_existente = cita_existente.fecha_hora + timedelta(minutes=cita_existente.duracion_minutos)
-        if (nueva_fecha < fecha_fin_existente and fecha_fin_nueva > cita_existente.fecha_hora):
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="El profesional ya tiene una cita en ese horario"
-            )
+    # Mover la cita; la restricción de exclusión detecta el solapamiento
+    fecha_anterior = cita.fecha_hora
+    if not CitaRepository.reagendar_si_disponible(db, cita, fecha_reagendar):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El profesional ya tiene una cita en ese horario"
+        )
     
-    cita.fecha_hora = nueva_fecha
-    db.commit()
-    db.refresh(cita)
+    calendario_service.registrar_cambio_cita(db, cita.profesional_id, fecha_anterior, cita.fecha_hora)
     
-    profesional = db.query(User).filter(User.id == cita.profesional_id).first()
+    profesional = cargadores(db).usuarios.obtener(cita.profesional_id)
     
     # Crear notificaciones de reagendamiento
     notificar_cita_reagendada(db, cita, user, profesional, nueva_fecha)
     
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == cita.profesional_id
-    ).first()
+    # El horario anterior quedó libre
+    lista_espera_service.ofrecer_horario_liberado(
+        db, cita.profesional_id, fecha_anterior, cita.duracion_minutos, excluir_cliente_id=user.id
+    )
+    
+    perfil = cargadores(db).perfiles.obtener(cita.profesional_id)
     
     return {
         "id": cita.id,
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from security import get_current_active_user
+from services.cliente_service import ClienteService
+
+router = APIRouter(prefix="/api/clientes", tags=["clientes"])
+
+
+@router.get("/dashboard", status_code=status.HTTP_200_OK)
+def obtener_dashboard_cliente(
+    limite_citas: int = Query(5, ge=1, le=20),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Resumen del dashboard del cliente en una sola respuesta:
+    
+    - **estadisticas**: Citas, pagos y total gastado (agregados en SQL)
+    - **proximas_citas** / **historial_citas**: Hasta `limite_citas` de cada una
+    - **notificaciones_no_leidas**: Cantidad
+    - **favoritos**: Profesionales favoritos, del más reciente al más antiguo
+    
+    Todo sale de una sola consulta, incluida la búsqueda del usuario
+    """
+    dashboard = ClienteService.obtener_dashboard(db, current_user.email, limite_citas=limite_citas)
+    if dashboard is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los clientes tienen dashboard de cliente"
+        )
+    
+    return dashboard
@@ -0,0 +1,124 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import User, TipoUsuario, EstadoEspera
+from schemas import ListaEsperaCreate, ListaEsperaPrioridad
+from security import get_current_active_user
+from repositories import ListaEsperaRepository
+from services.lista_espera_service import (
+    registrar_solicitud,
+    obtener_solicitudes_cliente,
+    obtener_solicitudes_profesional
+)
+
+router = APIRouter(prefix="/api/lista-espera", tags=["lista de espera"])
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+def unirse_lista_espera(
+    datos: ListaEsperaCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Registra al cliente en la lista de espera de un profesional. Si se libera
+    un horario dentro de la ventana [desde, hasta) recibirá una notificación
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    
+    return registrar_solicitud(db, user, datos)
+
+
+@router.get("/mis-solicitudes")
+def obtener_mis_solicitudes(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Obtiene las solicitudes activas del cliente en listas de espera"""
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    
+    solicitudes = obtener_solicitudes_cliente(db, user.id)
+    return {"solicitudes": solicitudes, "total": len(solicitudes)}
+
+
+@router.delete("/{solicitud_id}")
+def salir_lista_espera(
+    solicitud_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Retira una solicitud de la lista de espera"""
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    
+    solicitud = ListaEsperaRepository.obtener_por_id(db, solicitud_id)
+    if not solicitud or solicitud.cliente_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Solicitud no encontrada"
+        )
+    
+    solicitud.estado = EstadoEspera.CANCELADA
+    db.commit()
+    
+    return {"message": "Saliste de la lista de espera"}
+
+
+@router.get("/profesional")
+def obtener_lista_profesional(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Obtiene la lista de espera del profesional en el orden en que
+    recibirá las ofertas de horarios liberados
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    
+    if not user or user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden consultar su lista de espera"
+        )
+    
+    solicitudes = obtener_solicitudes_profesional(db, user.id)
+    return {"solicitudes": solicitudes, "total": len(solicitudes)}
+
+
+@router.put("/{solicitud_id}/prioridad")
+def actualizar_prioridad(
+    solicitud_id: int,
+    datos: ListaEsperaPrioridad,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Cambia la prioridad de una solicitud (mayor prioridad recibe antes la oferta)"""
+    user = db.query(User).filter(User.email == current_user.email).first()
+    
+    if not user or user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden priorizar su lista de espera"
+        )
+    
+    solicitud = ListaEsperaRepository.obtener_por_id(db, solicitud_id)
+    if not solicitud or solicitud.profesional_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Solicitud no encontrada"
+        )
+    
+    solicitud.prioridad = datos.prioridad
+    db.commit()
+    
+    return {
+        "message": "Prioridad actualizada",
+        "solicitud_id": solicitud.id,
+        "prioridad": solicitud.prioridad
+    }
@@ -1,38 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from fastapi.responses import JSONResponse
 
 from database import get_db
 from models import Notificacion, User
 from schemas import NotificacionResponse, MarcarLeidaRequest
 from security import get_current_active_user
+from utils.paginacion import decodificar_cursor, recortar_pagina, publicar_cursor
 
 router = APIRouter(prefix="/api/notificaciones", tags=["notificaciones"])
 
 
 @router.get("/mis-notificaciones")
 def obtener_mis_notificaciones(
+    response: Response,
     leidas: bool = None,
-    limite: int = 50,
+    limite: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
     """
-    Obtiene las notificaciones del usuario
+    Obtiene las notificaciones del usuario, de la más reciente a la más antigua
     Puede filtrar por leídas/no leídas
+    
+    - **limite**: Notificaciones por página. Si hay más, el encabezado
+      X-Siguiente-Cursor trae el `cursor` de la siguiente página
     """
     # Obtener el usuario completo de la base de datos
     user = db.query(User).filter(User.email == current_user.email).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
+    antes_de = decodificar_cursor(cursor, datetime, int)
+    
     query = db.query(Notificacion).filter(Notificacion.usuario_id == user.id)
     
     if leidas is not None:
         query = query.filter(Notificacion.leida == leidas)
     
-    notificaciones = query.order_by(Notificacion.created_at.desc()).limit(limite).all()
+    if antes_de:
+        query = query.filter(tuple_(Notificacion.created_at, Notificacion.id) < tuple_(*antes_de))
+    
+    # Una notificación de más indica si hay otra página
+    notificaciones = query.order_by(
+        Notificacion.created_at.desc(), Notificacion.id.desc()
+    ).limit(limite + 1).all()
+    
+    notificaciones, siguiente = recortar_pagina(notificaciones, limite, lambda n: (n.created_at, n.id))
+    publicar_cursor(response, siguiente)
     
     # Convertir a diccionario para serializar correctamente el enum
     return [
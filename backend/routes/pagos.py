@@ -1,86 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date, datetime, timedelta, timezone
 import os
 
 from database import get_db
-from models import Pago, Cita, User, PerfilProfesional, EstadoPago
+from models import Pago, Cita, User, EstadoPago
+from repositories import CitaRepository
 from schemas import PagoResponse, PagoCreate, PayPalPagoRequest
 from security import get_current_active_user
+from services.cliente_service import ClienteService
+from utils import retenciones
+from utils.cargadores import cargadores
+from utils.horarios import obtener_zona, inicio_del_dia
+from utils.paginacion import decodificar_cursor, recortar_pagina, publicar_cursor
 from utils.notificaciones import notificar_pago_exitoso, notificar_pago_fallido
 from utils.paypal_config import crear_pago_paypal, ejecutar_pago_paypal, obtener_pago_paypal
 
 router = APIRouter(prefix="/api/pagos", tags=["pagos"])
 
+RESERVA_VENCIDA = "La reserva venció antes de completar el pago. Agenda la cita de nuevo"
+
+
+def _confirmar_reserva(db: Session, cita: Cita) -> None:
+    """
+    Quita la fecha límite de pago de la cita en la transacción del pago.
+    Si la retención ya venció (o la cita se canceló) deshace todo y responde 409.
+    """
+    if not CitaRepository.consolidar_reserva(db, cita.id):
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=RESERVA_VENCIDA)
+
 
 @router.get("/mis-pagos", response_model=List[PagoResponse])
 def obtener_mis_pagos(
+    response: Response,
     estado: str = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    limite: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
     """
     Obtiene el historial de pagos del cliente
     Puede filtrar por estado: pendiente, completado, fallido, reembolsado
+    
+    - **fecha_desde** / **fecha_hasta**: Días del pago (inclusive) en ZONA_HORARIA
+    - **limite**: Pagos por página. Si hay más, el encabezado X-Siguiente-Cursor
+      trae el `cursor` de la siguiente página
+    
+    Siempre son dos consultas (usuario e historial), sin importar cuántos
+    pagos tenga el cliente
     """
     # Obtener el usuario completo de la base de datos
     user = db.query(User).filter(User.email == current_user.email).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
-    # Obtener pagos de las citas del cliente
-    query = db.query(Pago).join(Cita).filter(Cita.cliente_id == user.id)
+    if estado and estado.upper() not in EstadoPago.__members__:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estado inválido. Opciones: {[e.name for e in EstadoPago]}"
+        )
     
-    if estado:
-        try:
-            estado_enum = EstadoPago[estado]
-            query = query.filter(Pago.estado == estado_enum)
-        except KeyError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Estado inválido. Opciones: {[e.name for e in EstadoPago]}"
-            )
+    antes_de = decodificar_cursor(cursor, datetime, int)
+    
+    zona = obtener_zona()
+    pagos = ClienteService.obtener_pagos_cliente(
+        db,
+        user.id,
+        estado=estado,
+        fecha_desde=inicio_del_dia(fecha_desde, zona) if fecha_desde else None,
+        fecha_hasta=inicio_del_dia(fecha_hasta + timedelta(days=1), zona) if fecha_hasta else None,
+        antes_de=antes_de,
+        # Un pago de más indica si hay otra página
+        limite=limite + 1 if limite else None
+    )
     
-    pagos = query.order_by(Pago.created_at.desc()).all()
-    
-    # Enriquecer con información de la cita y profesional
-    pagos_response = []
-    for pago in pagos:
-        cita = db.query(Cita).filter(Cita.id == pago.cita_id).first()
-        if not cita:
-            continue
-            
-        profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-        if not profesional:
-            continue
-            
-        perfil = db.query(PerfilProfesional).filter(
-            PerfilProfesional.usuario_id == cita.profesional_id
-        ).first()
-        
-        pago_dict = {
-            "id": pago.id,
-            "cita_id": pago.cita_id,
-            "monto": pago.monto,
-            "estado": pago.estado.name,
-            "metodo_pago": pago.metodo_pago,
-            "referencia_transaccion": pago.referencia_transaccion,
-            "fecha_pago": pago.created_at,
-            "cita": {
-                "fecha_hora": cita.fecha_hora,
-                "motivo": cita.motivo,
-                "estado": cita.estado.name,
-                "duracion_minutos": cita.duracion_minutos if hasattr(cita, 'duracion_minutos') else 60
-            },
-            "profesional": {
-                "nombre_completo": f"{profesional.nombre} {profesional.apellido}",
-                "especialidad": perfil.especialidad if perfil else None,
-                "telefono": profesional.telefono if hasattr(profesional, 'telefono') else None
-            }
-        }
-        pagos_response.append(pago_dict)
+    pagos, siguiente = recortar_pagina(pagos, limite, lambda pago: (pago["fecha_pago"], pago["id"]))
+    publicar_cursor(response, siguiente)
     
-    return pagos_response
+    return pagos
 
 
 @router.get("/pago/{pago_id}", response_model=PagoResponse)
@@ -107,10 +109,8 @@ def obtener_pago(
         )
     
     cita = db.query(Cita).filter(Cita.id == pago.cita_id).first()
-    profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == cita.profesional_id
-    ).first()
+    profesional = cargadores(db).usuarios.obtener(cita.profesional_id)
+    perfil = cargadores(db).perfiles.obtener(cita.profesional_id)
     
     return {
         "id": pago.id,
@@ -179,17 +179,21 @@ def procesar_pago(
         referencia_transaccion=f"REF-{pago_data.cita_id}-{user.id}"
     )
     
+    retencion_id = cita.retencion_id
     db.add(nuevo_pago)
+    _confirmar_reserva(db, cita)
     db.commit()
     db.refresh(nuevo_pago)
     
+    # La cita pagada ya no necesita la retención del horario
+    if retencion_id:
+        retenciones.liberar_retencion(retencion_id)
+    
     # Crear notificación de pago exitoso
     notificar_pago_exitoso(db, cita, user, pago_data.monto, nuevo_pago.referencia_transaccion)
     
-    profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == cita.profesional_id
-    ).first()
+    profesional = cargadores(db).usuarios.obtener(cita.profesional_id)
+    perfil = cargadores(db).perfiles.obtener(cita.profesional_id)
     
     return {
         "id": nuevo_pago.id,
@@ -216,26 +220,19 @@ def obtener_estadisticas_pagos(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    """Obtiene estadísticas de pagos del cliente"""
+    """Obtiene estadísticas de pagos del cliente, con un solo agregado en SQL"""
     # Obtener el usuario completo de la base de datos
     user = db.query(User).filter(User.email == current_user.email).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
-    pagos = db.query(Pago).join(Cita).filter(
-        Cita.cliente_id == user.id
-    ).all()
-    
-    total_gastado = sum(p.monto for p in pagos if p.estado == EstadoPago.COMPLETADO)
-    total_pagos = len(pagos)
-    pagos_pendientes = len([p for p in pagos if p.estado == EstadoPago.PENDIENTE])
-    pagos_completados = len([p for p in pagos if p.estado == EstadoPago.COMPLETADO])
+    estadisticas = ClienteService.obtener_estadisticas_cliente(db, user.id)
     
     return {
-        "total_gastado": total_gastado,
-        "total_pagos": total_pagos,
-        "pagos_pendientes": pagos_pendientes,
-        "pagos_completados": pagos_completados
+        "total_gastado": estadisticas["total_gastado"],
+        "total_pagos": estadisticas["total_pagos"],
+        "pagos_pendientes": estadisticas["pagos_pendientes"],
+        "pagos_completados": estadisticas["pagos_completados"]
     }
 
 
@@ -284,6 +281,10 @@ def crear_pago_con_paypal(
             db.delete(pago_existente)
             db.commit()
     
+    # Una reserva cuya retención venció ya no se puede pagar
+    if cita.retenida_hasta and cita.retenida_hasta <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=RESERVA_VENCIDA)
+    
     # Verificar que la cita tenga precio
     if not cita.precio or cita.precio <= 0:
         raise HTTPException(
@@ -294,12 +295,11 @@ def crear_pago_con_paypal(
     # ==================== MODO SIMULACIÓN ====================
     # Simular creación de pago en PayPal sin hacer llamadas reales
     import uuid
-    from datetime import datetime
     
     payment_id = f"PAYID-SIMULATED-{uuid.uuid4().hex[:20].upper()}"
     monto_usd = round(float(cita.precio) / 4000, 2)  # Conversión COP a USD simulada
     
-    profesional = db.query(User).filter(User.id == cita.profesional_id).first()
+    profesional = cargadores(db).usuarios.obtener(cita.profesional_id)
     
     # Crear registro de pago pendiente
     nuevo_pago = Pago(
@@ -371,18 +371,22 @@ def ejecutar_pago_con_paypal(
     # ==================== MODO SIMULACIÓN ====================
     # Simular ejecución exitosa del pago sin llamar a PayPal real
     
-    # Actualizar estado del pago a completado
+    # Actualizar estado del pago a completado, solo si la reserva sigue vigente
+    retencion_id = cita.retencion_id
+    _confirmar_reserva(db, cita)
     pago.estado = EstadoPago.COMPLETADO
     db.commit()
     db.refresh(pago)
     
+    # La cita pagada ya no necesita la retención del horario
+    if retencion_id:
+        retenciones.liberar_retencion(retencion_id)
+    
     # Crear notificación de pago exitoso
     notificar_pago_exitoso(db, cita, user, pago.monto, payment_id)
     
-    profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == cita.profesional_id
-    ).first()
+    profesional = cargadores(db).usuarios.obtener(cita.profesional_id)
+    perfil = cargadores(db).perfiles.obtener(cita.profesional_id)
     
     return {
         "id": pago.id,
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
+from config import settings
 from database import get_db
 from models import User, PerfilProfesional, TipoUsuario, Favorito, Cita, EstadoCita, Disponibilidad, DiaSemana
+from repositories import CitaRepository
+from repositories.cita_repository import ORDEN_PACIENTES
 from security import get_current_active_user
-from schemas import TokenData
+from schemas import TokenData, CambioEstadoMasivo, ZonaHorariaUpdate, HorariosSemana, ExcepcionCreate
+from services import calendario_service, estadisticas_service, lista_espera_service
 from services.profesional_service import (
     obtener_estadisticas_profesional,
     obtener_proximas_citas,
@@ -15,30 +20,72 @@ from services.profesional_service import (
     crear_disponibilidad,
     actualizar_disponibilidad,
     eliminar_disponibilidad,
-    actualizar_estado_cita
+    actualizar_horarios_disponibilidad,
+    actualizar_estado_cita,
+    actualizar_estado_citas_masivo,
+    obtener_citas_del_dia,
+    obtener_horarios_disponibles,
+    obtener_agenda_rango,
+    buscar_primeros_horarios,
+    obtener_zona_profesional,
+    actualizar_zona_horaria,
+    obtener_excepciones_profesional,
+    registrar_excepcion,
+    eliminar_excepcion
 )
+from utils.cargadores import cargadores
+from utils.paginacion import decodificar_cursor, recortar_pagina, publicar_cursor
 
 router = APIRouter(prefix="/api/profesionales", tags=["Profesionales"])
 
+MAX_DIAS_RANGO = 62
+
+
+def _parsear_rango(fecha_desde: str, fecha_hasta: str):
+    """Valida un rango de fechas YYYY-MM-DD de hasta MAX_DIAS_RANGO días"""
+    try:
+        desde_dt = datetime.strptime(fecha_desde, "%Y-%m-%d")
+        hasta_dt = datetime.strptime(fecha_hasta, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato de fecha inválido. Use YYYY-MM-DD"
+        )
+    
+    if hasta_dt < desde_dt or (hasta_dt - desde_dt).days >= MAX_DIAS_RANGO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango debe ser de 1 a {MAX_DIAS_RANGO} días"
+        )
+    
+    return desde_dt, hasta_dt
+
 
 @router.get("/", status_code=status.HTTP_200_OK)
 async def listar_profesionales(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     especialidad: Optional[str] = None,
     ciudad: Optional[str] = None,
     busqueda: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Lista todos los profesionales con sus perfiles
+    Lista todos los profesionales con sus perfiles, de mejor a peor calificación
     
-    - **skip**: Número de registros a saltar (para paginación)
+    - **skip**: Número de registros a saltar (paginación por desplazamiento)
     - **limit**: Número máximo de registros a devolver
+    - **cursor**: `siguiente_cursor` de la página anterior. Con cursor se
+      ignora `skip` y no se calcula `total`: cada página cuesta lo mismo
+      sin importar lo profunda que sea
     - **especialidad**: Filtrar por especialidad
     - **ciudad**: Filtrar por ciudad
     - **busqueda**: Buscar por nombre o apellido
     """
+    antes_de = decodificar_cursor(cursor, int, int)
+    calificacion = func.coalesce(PerfilProfesional.calificacion_promedio, 0)
+    
     # Query base
     query = db.query(User, PerfilProfesional).join(
         PerfilProfesional,
@@ -61,14 +108,23 @@ async def listar_profesionales(
             (User.apellido.ilike(f"%{busqueda}%"))
         )
     
-    # Ordenar por calificación
-    query = query.order_by(PerfilProfesional.calificacion_promedio.desc())
-    
-    # Contar total antes de paginar
-    total = query.count()
-    
-    # Aplicar paginación
-    results = query.offset(skip).limit(limit).all()
+    # Ordenar por calificación; el id desempata para que el orden sea estable
+    query = query.order_by(calificacion.desc(), PerfilProfesional.id.desc())
+    
+    total = None
+    if antes_de:
+        query = query.filter(tuple_(calificacion, PerfilProfesional.id) < tuple_(*antes_de))
+    else:
+        # Paginación por desplazamiento: se mantiene por compatibilidad
+        total = query.count()
+        query = query.offset(skip)
+    
+    # Un registro de más indica si hay otra página
+    results, siguiente_cursor = recortar_pagina(
+        query.limit(limit + 1).all(),
+        limit,
+        lambda fila: (fila[1].calificacion_promedio or 0, fila[1].id)
+    )
     
     # Formatear respuesta
     profesionales = []
@@ -96,7 +152,62 @@ async def listar_profesionales(
         "profesionales": profesionales,
         "total": total,
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "siguiente_cursor": siguiente_cursor
+    }
+
+
+@router.get("/busqueda/primer-horario", status_code=status.HTTP_200_OK)
+async def buscar_primer_horario(
+    especialidad: Optional[str] = None,
+    ciudad: Optional[str] = None,
+    fecha_desde: Optional[str] = Query(None, description="Fecha en formato YYYY-MM-DD (por defecto hoy)"),
+    fecha_hasta: Optional[str] = Query(None, description="Fecha en formato YYYY-MM-DD (por defecto 14 días después)"),
+    duracion: int = Query(60, ge=15, le=240, description="Duración de la cita en minutos"),
+    limite: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Busca los primeros horarios disponibles entre todos los profesionales
+    de una especialidad y ciudad (por ejemplo: "el primer cardiólogo en Medellín")
+    
+    - **especialidad**: Filtrar por especialidad
+    - **ciudad**: Filtrar por ciudad
+    - **fecha_desde** / **fecha_hasta**: Ventana de búsqueda (máximo 31 días)
+    - **duracion**: Duración de la cita en minutos
+    - **limite**: Número máximo de resultados (uno por profesional)
+    """
+    try:
+        desde_dt = datetime.strptime(fecha_desde, "%Y-%m-%d") if fecha_desde else datetime.now()
+        hasta_dt = datetime.strptime(fecha_hasta, "%Y-%m-%d") if fecha_hasta else desde_dt + timedelta(days=14)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato de fecha inválido. Use YYYY-MM-DD"
+        )
+    
+    if hasta_dt < desde_dt or (hasta_dt - desde_dt).days > 31:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La ventana de búsqueda debe ser de 0 a 31 días"
+        )
+    
+    resultados = buscar_primeros_horarios(
+        db,
+        desde_dt,
+        hasta_dt,
+        duracion_minutos=duracion,
+        especialidad=especialidad,
+        ciudad=ciudad,
+        limite=limite
+    )
+    
+    return {
+        "fecha_desde": desde_dt.date().isoformat(),
+        "fecha_hasta": hasta_dt.date().isoformat(),
+        "duracion_minutos": duracion,
+        "resultados": resultados,
+        "total": len(resultados)
     }
 
 
@@ -345,6 +456,102 @@ async def crear_bloque_disponibilidad(
     }
 
 
+@router.put("/disponibilidad", status_code=status.HTTP_200_OK)
+async def reemplazar_disponibilidad_semana(
+    datos: HorariosSemana,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Reemplaza la disponibilidad semanal completa. Solo se escriben los
+    bloques que cambian
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden gestionar disponibilidad"
+        )
+    
+    horarios = {
+        dia: config.model_dump(exclude_none=True)
+        for dia, config in datos.horarios.items()
+    }
+    return actualizar_horarios_disponibilidad(db, user.id, horarios)
+
+
+@router.get("/disponibilidad/excepciones", status_code=status.HTTP_200_OK)
+async def obtener_excepciones(
+    current_user: TokenData = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Lista los bloqueos y turnos extra vigentes del profesional
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden gestionar disponibilidad"
+        )
+    
+    return {"excepciones": obtener_excepciones_profesional(db, user.id)}
+
+
+@router.post("/disponibilidad/excepciones", status_code=status.HTTP_201_CREATED)
+async def crear_excepcion(
+    datos: ExcepcionCreate,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Registra un bloqueo (vacaciones, permisos) o un turno extra por fechas.
+    Prevalece sobre la disponibilidad semanal en esas fechas
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden gestionar disponibilidad"
+        )
+    
+    return registrar_excepcion(
+        db,
+        user.id,
+        datos.tipo,
+        datos.fecha_desde,
+        datos.fecha_hasta,
+        datos.hora_inicio,
+        datos.hora_fin,
+        datos.motivo
+    )
+
+
+@router.delete("/disponibilidad/excepciones/{excepcion_id}", status_code=status.HTTP_200_OK)
+async def eliminar_excepcion_disponibilidad(
+    excepcion_id: int,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Elimina un bloqueo o turno extra
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    if user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden gestionar disponibilidad"
+        )
+    
+    if not eliminar_excepcion(db, user.id, excepcion_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Excepción no encontrada"
+        )
+    
+    return {"message": "Excepción eliminada exitosamente"}
+
+
 @router.put("/disponibilidad/{disponibilidad_id}", status_code=status.HTTP_200_OK)
 async def actualizar_bloque_disponibilidad(
     disponibilidad_id: int,
@@ -451,10 +658,99 @@ async def obtener_profesional(
         "foto_url": perfil.foto_url,
         "calificacion_promedio": perfil.calificacion_promedio,
         "numero_resenas": perfil.numero_resenas,
+        # Zona IANA en la que se muestran sus horarios
+        "zona_horaria": perfil.zona_horaria or settings.ZONA_HORARIA,
         "perfil_id": perfil.id
     }
 
 
+@router.get("/{profesional_id}/horarios-disponibles", status_code=status.HTTP_200_OK)
+async def obtener_horarios_disponibles_publico(
+    profesional_id: int,
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    duracion: int = Query(60, ge=15, le=240, description="Duración de la cita en minutos"),
+    granularidad: int = Query(30, ge=5, le=120, description="Minutos entre inicios posibles"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene los horarios en los que se puede agendar con un profesional
+    (público, para la pantalla de reserva)
+    """
+    profesional = db.query(User.id).filter(
+        User.id == profesional_id,
+        User.tipo_usuario == TipoUsuario.PROFESIONAL
+    ).first()
+    
+    if not profesional:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profesional no encontrado"
+        )
+    
+    try:
+        fecha_dt = datetime.strptime(fecha, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato de fecha inválido. Use YYYY-MM-DD"
+        )
+    
+    horarios = obtener_horarios_disponibles(db, profesional_id, fecha_dt, duracion, granularidad)
+    
+    return {
+        "profesional_id": profesional_id,
+        "fecha": fecha,
+        "duracion_minutos": duracion,
+        "horarios_disponibles": horarios,
+        "total": len(horarios)
+    }
+
+
+@router.get("/{profesional_id}/horarios-rango", status_code=status.HTTP_200_OK)
+async def obtener_horarios_rango_publico(
+    profesional_id: int,
+    fecha_desde: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    fecha_hasta: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    duracion: int = Query(60, ge=15, le=240, description="Duración de la cita en minutos"),
+    granularidad: int = Query(30, ge=5, le=120, description="Minutos entre inicios posibles"),
+    compacto: bool = Query(False, description="Devolver cada día como máscara hexadecimal"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene los horarios libres y los intervalos ocupados de cada día de un
+    rango (público, para el calendario de reserva)
+    
+    - **fecha_desde** / **fecha_hasta**: Rango de días (máximo 62)
+    - **compacto**: Cada día como `{"libres": "<hex>", "ocupados": [[inicio, fin]]}`,
+      donde el bit k de `libres` es el inicio `k * granularidad` minutos
+    """
+    profesional = db.query(User.id).filter(
+        User.id == profesional_id,
+        User.tipo_usuario == TipoUsuario.PROFESIONAL
+    ).first()
+    
+    if not profesional:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profesional no encontrado"
+        )
+    
+    desde_dt, hasta_dt = _parsear_rango(fecha_desde, fecha_hasta)
+    dias = obtener_agenda_rango(
+        db, profesional_id, desde_dt, hasta_dt, duracion, granularidad, compacto
+    )
+    
+    return {
+        "profesional_id": profesional_id,
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "duracion_minutos": duracion,
+        "granularidad_minutos": granularidad,
+        "compacto": compacto,
+        "dias": dias
+    }
+
+
 @router.get("/especialidades/listar", status_code=status.HTTP_200_OK)
 async def listar_especialidades(db: Session = Depends(get_db)):
     """
@@ -621,11 +917,15 @@ async def obtener_mis_favoritos(
 
 @router.get("/dashboard/estadisticas", status_code=status.HTTP_200_OK)
 async def obtener_estadisticas_dashboard(
+    fecha_desde: Optional[date] = Query(None, description="Inicio del periodo (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fin del periodo, inclusive (YYYY-MM-DD)"),
     current_user: TokenData = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Obtiene estadísticas del dashboard del profesional actual
+    Obtiene estadísticas del dashboard del profesional actual. Con
+    fecha_desde/fecha_hasta (días en la zona del profesional) agrega las
+    métricas de ese periodo en "periodo", en la misma consulta.
     """
     user = db.query(User).filter(User.email == current_user.email).first()
     
@@ -635,10 +935,58 @@ async def obtener_estadisticas_dashboard(
             detail="Solo los profesionales pueden acceder a estas estadísticas"
         )
     
-    estadisticas = obtener_estadisticas_profesional(db, user.id)
+    hasta = fecha_hasta + timedelta(days=1) if fecha_hasta else None
+    estadisticas = obtener_estadisticas_profesional(db, user.id, fecha_desde, hasta)
     return estadisticas
 
 
+@router.get("/dashboard/tendencia", status_code=status.HTTP_200_OK)
+async def obtener_tendencia_dashboard(
+    fecha_desde: Optional[date] = Query(None, description="Primer día (por defecto, hace 30 días)"),
+    fecha_hasta: Optional[date] = Query(None, description="Último día, inclusive (por defecto, hoy)"),
+    agrupar: str = "dia",
+    current_user: TokenData = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Serie de citas e ingresos del profesional para las gráficas del dashboard.
+    Lee solo las filas de los resúmenes diarios del rango.
+    
+    - **agrupar**: dia, semana o mes
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    
+    if user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden acceder a estas estadísticas"
+        )
+    
+    if agrupar not in estadisticas_service.UNIDADES_TENDENCIA:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Agrupación inválida. Opciones: {list(estadisticas_service.UNIDADES_TENDENCIA)}"
+        )
+    
+    hoy = datetime.now(obtener_zona_profesional(db, user.id)).date()
+    fecha_hasta = fecha_hasta or hoy
+    fecha_desde = fecha_desde or fecha_hasta - timedelta(days=29)
+    if fecha_hasta < fecha_desde:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fecha_hasta debe ser posterior a fecha_desde"
+        )
+    
+    return {
+        "fecha_desde": fecha_desde.isoformat(),
+        "fecha_hasta": fecha_hasta.isoformat(),
+        "agrupar": agrupar,
+        "serie": estadisticas_service.obtener_tendencia(
+            db, user.id, fecha_desde, fecha_hasta + timedelta(days=1), agrupar
+        )
+    }
+
+
 @router.get("/dashboard/proximas-citas", status_code=status.HTTP_200_OK)
 async def obtener_proximas_citas_dashboard(
     limit: int = Query(5, ge=1, le=20),
@@ -660,8 +1008,10 @@ async def obtener_proximas_citas_dashboard(
     
     # Formatear respuesta con información del cliente
     citas_formateadas = []
+    usuarios = cargadores(db).usuarios
+    usuarios.pedir(cita.cliente_id for cita in citas)  # Un solo IN (...) para todos los clientes
     for cita in citas:
-        cliente = db.query(User).filter(User.id == cita.cliente_id).first()
+        cliente = usuarios.obtener(cita.cliente_id)
         citas_formateadas.append({
             "id": cita.id,
             "fecha_hora": cita.fecha_hora.isoformat(),
@@ -709,8 +1059,10 @@ async def obtener_citas_dashboard(
     
     # Formatear respuesta
     citas_formateadas = []
+    usuarios = cargadores(db).usuarios
+    usuarios.pedir(cita.cliente_id for cita in citas)  # Un solo IN (...) para todos los clientes
     for cita in citas:
-        cliente = db.query(User).filter(User.id == cita.cliente_id).first()
+        cliente = usuarios.obtener(cita.cliente_id)
         citas_formateadas.append({
             "id": cita.id,
             "fecha_hora": cita.fecha_hora.isoformat(),
@@ -737,7 +1089,7 @@ async def obtener_citas_del_dia_dashboard(
     db: Session = Depends(get_db)
 ):
     """
-    Obtiene todas las citas de un día específico
+    Obtiene todas las citas de un día específico en la zona horaria del profesional
     """
     user = db.query(User).filter(User.email == current_user.email).first()
     
@@ -759,8 +1111,10 @@ async def obtener_citas_del_dia_dashboard(
     
     # Formatear respuesta
     citas_formateadas = []
+    usuarios = cargadores(db).usuarios
+    usuarios.pedir(cita.cliente_id for cita in citas)  # Un solo IN (...) para todos los clientes
     for cita in citas:
-        cliente = db.query(User).filter(User.id == cita.cliente_id).first()
+        cliente = usuarios.obtener(cita.cliente_id)
         citas_formateadas.append({
             "id": cita.id,
             "fecha_hora": cita.fecha_hora.isoformat(),
@@ -777,7 +1131,46 @@ async def obtener_citas_del_dia_dashboard(
             }
         })
     
-    return {"fecha": fecha, "citas": citas_formateadas, "total": len(citas_formateadas)}
+    return {
+        "fecha": fecha,
+        "zona_horaria": obtener_zona_profesional(db, user.id).key,
+        "citas": citas_formateadas,
+        "total": len(citas_formateadas)
+    }
+
+
+@router.put("/dashboard/citas/estado", status_code=status.HTTP_200_OK)
+async def actualizar_estado_citas_dashboard(
+    datos: CambioEstadoMasivo,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Actualiza el estado de varias citas a la vez (p. ej. confirmar la agenda del día)
+    
+    - **cita_ids**: IDs de las citas (máximo 200)
+    - **nuevo_estado**: confirmada, cancelada o completada
+    
+    Las citas que no pertenecen al profesional o no admiten la transición
+    se devuelven en `rechazadas` sin afectar a las demás
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    
+    if user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden actualizar el estado de sus citas"
+        )
+    
+    try:
+        estado_enum = EstadoCita(datos.nuevo_estado.lower())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estado inválido. Estados válidos: {', '.join([e.value for e in EstadoCita])}"
+        )
+    
+    return actualizar_estado_citas_masivo(db, user, datos.cita_ids, estado_enum)
 
 
 @router.put("/dashboard/citas/{cita_id}/estado", status_code=status.HTTP_200_OK)
@@ -815,6 +1208,13 @@ async def actualizar_estado_cita_dashboard(
             detail="Cita no encontrada o no pertenece a este profesional"
         )
     
+    calendario_service.registrar_cambio_cita(db, user.id, cita.fecha_hora)
+    
+    if cita.estado == EstadoCita.CANCELADA:
+        lista_espera_service.ofrecer_horario_liberado(
+            db, user.id, cita.fecha_hora, cita.duracion_minutos, excluir_cliente_id=cita.cliente_id
+        )
+    
     return {
         "message": "Estado de la cita actualizado correctamente",
         "cita_id": cita.id,
@@ -826,6 +1226,7 @@ async def actualizar_estado_cita_dashboard(
 async def obtener_horarios_disponibles_dashboard(
     fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
     duracion: int = Query(60, ge=15, le=240, description="Duración de la cita en minutos"),
+    granularidad: int = Query(30, ge=5, le=120, description="Minutos entre inicios posibles"),
     current_user: TokenData = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -848,7 +1249,7 @@ async def obtener_horarios_disponibles_dashboard(
             detail="Formato de fecha inválido. Use YYYY-MM-DD"
         )
     
-    horarios = obtener_horarios_disponibles(db, user.id, fecha_dt, duracion)
+    horarios = obtener_horarios_disponibles(db, user.id, fecha_dt, duracion, granularidad)
     
     return {
         "fecha": fecha,
@@ -858,13 +1259,85 @@ async def obtener_horarios_disponibles_dashboard(
     }
 
 
+@router.get("/dashboard/horarios-rango", status_code=status.HTTP_200_OK)
+async def obtener_horarios_rango_dashboard(
+    fecha_desde: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    fecha_hasta: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    duracion: int = Query(60, ge=15, le=240, description="Duración de la cita en minutos"),
+    granularidad: int = Query(30, ge=5, le=120, description="Minutos entre inicios posibles"),
+    compacto: bool = Query(False, description="Devolver cada día como máscara hexadecimal"),
+    current_user: TokenData = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene los horarios libres y los intervalos ocupados de cada día de un
+    rango, para la vista mensual de la agenda
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    
+    if user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden consultar sus horarios"
+        )
+    
+    desde_dt, hasta_dt = _parsear_rango(fecha_desde, fecha_hasta)
+    dias = obtener_agenda_rango(
+        db, user.id, desde_dt, hasta_dt, duracion, granularidad, compacto
+    )
+    
+    return {
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "duracion_minutos": duracion,
+        "granularidad_minutos": granularidad,
+        "compacto": compacto,
+        "dias": dias
+    }
+
+
+@router.put("/dashboard/zona-horaria", status_code=status.HTTP_200_OK)
+async def actualizar_zona_horaria_dashboard(
+    datos: ZonaHorariaUpdate,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cambia la zona horaria del profesional. Los horarios y las citas del día
+    se calculan en esta zona
+    """
+    user = db.query(User).filter(User.email == current_user.email).first()
+    
+    if user.tipo_usuario != TipoUsuario.PROFESIONAL:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los profesionales pueden cambiar su zona horaria"
+        )
+    
+    return actualizar_zona_horaria(db, user.id, datos.zona_horaria)
+
+
 @router.get("/dashboard/pacientes", status_code=status.HTTP_200_OK)
 async def obtener_pacientes_profesional(
+    busqueda: Optional[str] = Query(None, max_length=100),
+    activo: Optional[bool] = None,
+    orden: str = "ultima_visita",
+    direccion: str = Query("desc", pattern="^(asc|desc)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
     current_user: TokenData = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Obtiene todos los pacientes (clientes) que han tenido citas con el profesional
+    Obtiene los pacientes (clientes) que han tenido citas con el profesional
+    
+    - **busqueda**: Texto a buscar en nombre, apellido, email o teléfono
+    - **activo**: true o false para filtrar por el estado de la cuenta del paciente
+    - **orden**: nombre, total_citas, ultima_cita, ultima_visita, proxima_visita o total_pagado
+    - **direccion**: asc o desc
+    - **skip** / **limit**: Paginación
+    
+    Los totales de cada paciente salen de un solo GROUP BY sobre sus citas y pagos
     """
     user = db.query(User).filter(User.email == current_user.email).first()
     
@@ -874,57 +1347,69 @@ async def obtener_pacientes_profesional(
             detail="Solo los profesionales pueden acceder a sus pacientes"
         )
     
-    # Obtener clientes únicos que han tenido citas con este profesional
-    citas = db.query(Cita).filter(Cita.profesional_id == user.id).all()
-    
-    # Obtener IDs únicos de clientes
-    cliente_ids = list(set([cita.cliente_id for cita in citas]))
-    
-    # Obtener información de los clientes
-    pacientes = []
-    for cliente_id in cliente_ids:
-        cliente = db.query(User).filter(User.id == cliente_id).first()
-        if cliente:
-            # Contar citas del cliente con este profesional
-            total_citas = db.query(Cita).filter(
-                Cita.profesional_id == user.id,
-                Cita.cliente_id == cliente_id
-            ).count()
-            
-            # Obtener última cita
-            ultima_cita = db.query(Cita).filter(
-                Cita.profesional_id == user.id,
-                Cita.cliente_id == cliente_id
-            ).order_by(Cita.fecha_hora.desc()).first()
-            
-            pacientes.append({
-                "id": cliente.id,
-                "name": f"{cliente.nombre} {cliente.apellido}",
-                "email": cliente.email,
-                "phone": cliente.telefono,
-                "total_citas": total_citas,
-                "ultima_cita": ultima_cita.fecha_hora.isoformat() if ultima_cita else None,
-                "status": "active" if cliente.is_active else "inactive"
-            })
+    if orden not in ORDEN_PACIENTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Orden inválido. Opciones: {list(ORDEN_PACIENTES)}"
+        )
+    
+    filas, total = CitaRepository.obtener_pacientes_profesional(
+        db,
+        user.id,
+        busqueda=busqueda,
+        orden=orden,
+        descendente=direccion == "desc",
+        skip=skip,
+        limit=limit,
+        activo=activo
+    )
+    
+    pacientes = [
+        {
+            "id": fila.id,
+            "name": f"{fila.nombre} {fila.apellido}",
+            "email": fila.email,
+            "phone": fila.telefono,
+            "total_citas": fila.total_citas,
+            "ultima_cita": fila.ultima_cita.isoformat() if fila.ultima_cita else None,
+            "ultima_visita": fila.ultima_visita.isoformat() if fila.ultima_visita else None,
+            "proxima_visita": fila.proxima_visita.isoformat() if fila.proxima_visita else None,
+            "total_pagado": float(fila.total_pagado or 0),
+            "status": "active" if fila.is_active else "inactive"
+        }
+        for fila in filas
+    ]
     
-    return {"patients": pacientes}
+    return {
+        "patients": pacientes,
+        "total": total,
+        "skip": skip,
+        "limit": limit
+    }
 
 
 # ============= ENDPOINTS DE PAGOS =============
 
 @router.get("/dashboard/pagos", status_code=status.HTTP_200_OK)
 async def obtener_pagos_profesional(
+    response: Response,
     fecha_inicio: Optional[str] = Query(None),
     fecha_fin: Optional[str] = Query(None),
     estado: Optional[str] = Query(None),
+    limite: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: TokenData = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Obtiene el historial de pagos del profesional
+    Obtiene el historial de pagos del profesional, del más reciente al más antiguo
+    
+    - **limite**: Pagos por página. Si hay más, `siguiente_cursor` (y el
+      encabezado X-Siguiente-Cursor) trae el `cursor` de la siguiente página
     """
     from models import Pago, EstadoPago
-    from sqlalchemy import and_
+    
+    antes_de = decodificar_cursor(cursor, datetime, int)
     
     user = db.query(User).filter(User.email == current_user.email).first()
     if user.tipo_usuario != TipoUsuario.PROFESIONAL:
@@ -960,7 +1445,18 @@ async def obtener_pagos_profesional(
         except ValueError:
             pass
     
-    resultados = query.order_by(Pago.created_at.desc()).all()
+    if antes_de:
+        query = query.filter(tuple_(Pago.created_at, Pago.id) < tuple_(*antes_de))
+    
+    query = query.order_by(Pago.created_at.desc(), Pago.id.desc())
+    if limite:
+        # Un pago de más indica si hay otra página
+        query = query.limit(limite + 1)
+    
+    resultados, siguiente_cursor = recortar_pagina(
+        query.all(), limite, lambda fila: (fila[0].created_at, fila[0].id)
+    )
+    publicar_cursor(response, siguiente_cursor)
     
     pagos_formateados = []
     for pago, cita, cliente in resultados:
@@ -978,7 +1474,11 @@ async def obtener_pagos_profesional(
             "referencia": pago.referencia_transaccion
         })
     
-    return {"pagos": pagos_formateados, "total": len(pagos_formateados)}
+    return {
+        "pagos": pagos_formateados,
+        "total": len(pagos_formateados),  # Pagos en esta página
+        "siguiente_cursor": siguiente_cursor
+    }
 
 
 @router.get("/dashboard/pagos/estadisticas", status_code=status.HTTP_200_OK)
@@ -987,11 +1487,8 @@ async def obtener_estadisticas_pagos(
     db: Session = Depends(get_db)
 ):
     """
-    Obtiene estadísticas de pagos del profesional
+    Obtiene estadísticas de pagos del profesional con una sola consulta
     """
-    from models import Pago, EstadoPago
-    from sqlalchemy import func
-    
     user = db.query(User).filter(User.email == current_user.email).first()
     if user.tipo_usuario != TipoUsuario.PROFESIONAL:
         raise HTTPException(
@@ -999,49 +1496,14 @@ async def obtener_estadisticas_pagos(
             detail="Solo los profesionales pueden consultar estadísticas"
         )
     
-    # Total ingresos
-    total_ingresos = db.query(func.sum(Pago.monto)).join(
-        Cita, Pago.cita_id == Cita.id
-    ).filter(
-        Cita.profesional_id == user.id,
-        Pago.estado == EstadoPago.COMPLETADO
-    ).scalar() or 0
-    
-    # Pendientes
-    pendientes = db.query(func.sum(Pago.monto)).join(
-        Cita, Pago.cita_id == Cita.id
-    ).filter(
-        Cita.profesional_id == user.id,
-        Pago.estado == EstadoPago.PENDIENTE
-    ).scalar() or 0
-    
-    # Completados
-    completados = db.query(func.count(Pago.id)).join(
-        Cita, Pago.cita_id == Cita.id
-    ).filter(
-        Cita.profesional_id == user.id,
-        Pago.estado == EstadoPago.COMPLETADO
-    ).scalar() or 0
-    
-    # Fallidos
-    fallidos = db.query(func.count(Pago.id)).join(
-        Cita, Pago.cita_id == Cita.id
-    ).filter(
-        Cita.profesional_id == user.id,
-        Pago.estado == EstadoPago.FALLIDO
-    ).scalar() or 0
-    
-    # Total pagos
-    total_pagos = db.query(func.count(Pago.id)).join(
-        Cita, Pago.cita_id == Cita.id
-    ).filter(
-        Cita.profesional_id == user.id
-    ).scalar() or 0
+    pagos = estadisticas_service.calcular_estadisticas(
+        db, user.id, {"total": estadisticas_service.TODO_EL_TIEMPO}
+    )["total"]
     
     return {
-        "total": float(total_ingresos),
-        "pending": float(pendientes),
-        "completed": completados,
-        "failed": fallidos,
-        "total_count": total_pagos
+        "total": pagos["ingresos"],
+        "pending": pagos["monto_pendiente"],
+        "completed": pagos["pagos_completados"],
+        "failed": pagos["pagos_fallidos"],
+        "total_count": pagos["total_pagos"]
     }
@@ -1,6 +1,8 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Dict, List, Optional, Literal
+from datetime import datetime, date
+
+from config import settings
 
 
 class UserBase(BaseModel):
@@ -57,10 +59,47 @@ class CambiarContrasena(BaseModel):
 class CitaCreate(BaseModel):
     profesional_id: int
     fecha_hora: datetime
-    duracion_minutos: int = 60
+    duracion_minutos: int = Field(60, gt=0, le=settings.DURACION_MAXIMA_CITA_MINUTOS)
+    motivo: str
+    notas: Optional[str] = None
+    precio: float
+    retencion_id: Optional[str] = None  # Retención obtenida con POST /api/citas/retener
+
+
+class RetencionCreate(BaseModel):
+    profesional_id: int
+    fecha_hora: datetime
+    duracion_minutos: int = Field(60, gt=0, le=settings.DURACION_MAXIMA_CITA_MINUTOS)
+
+
+class CitaSerieCreate(BaseModel):
+    """
+    Serie de citas recurrentes: la primera en fecha_hora y las siguientes cada
+    semana o cada dos semanas, hasta completar `ocurrencias` o hasta la fecha `hasta`
+    """
+    profesional_id: Optional[int] = None  # Requerido si agenda un cliente
+    cliente_id: Optional[int] = None  # Requerido si agenda un profesional
+    fecha_hora: datetime
+    duracion_minutos: int = Field(60, gt=0, le=settings.DURACION_MAXIMA_CITA_MINUTOS)
+    frecuencia: Literal["semanal", "quincenal"] = "semanal"
+    ocurrencias: Optional[int] = Field(None, ge=1, le=settings.MAX_OCURRENCIAS_SERIE)
+    hasta: Optional[date] = None
+    omitir_conflictos: bool = False  # Crear las fechas libres y saltar las ocupadas
     motivo: str
     notas: Optional[str] = None
     precio: float
+    retencion_id: Optional[str] = None  # Retención obtenida con POST /api/citas/retener
+
+    @model_validator(mode="after")
+    def validar_fin(self):
+        if (self.ocurrencias is None) == (self.hasta is None):
+            raise ValueError("Indique exactamente uno de 'ocurrencias' o 'hasta'")
+        return self
+
+
+class CambioEstadoMasivo(BaseModel):
+    cita_ids: List[int] = Field(..., min_length=1, max_length=200)
+    nuevo_estado: str
 
 
 class CitaUpdate(BaseModel):
@@ -89,6 +128,25 @@ class CitaResponse(BaseModel):
     profesional: ProfesionalInfo
 
 
+# ==================== LISTA DE ESPERA ====================
+
+class ListaEsperaCreate(BaseModel):
+    profesional_id: int
+    desde: datetime
+    hasta: datetime
+    duracion_minutos: int = Field(60, gt=0, le=settings.DURACION_MAXIMA_CITA_MINUTOS)
+
+    @model_validator(mode="after")
+    def validar_ventana(self):
+        if self.hasta <= self.desde:
+            raise ValueError("'hasta' debe ser posterior a 'desde'")
+        return self
+
+
+class ListaEsperaPrioridad(BaseModel):
+    prioridad: int = Field(..., ge=0, le=100)
+
+
 # ==================== PAGOS ====================
 
 class PagoCreate(BaseModel):
@@ -138,6 +196,53 @@ class PerfilUpdate(BaseModel):
     foto_perfil: Optional[str] = None
 
 
+class BloqueHorario(BaseModel):
+    hora_inicio: str
+    hora_fin: str
+
+
+class DiaHorario(BaseModel):
+    activo: bool = False
+    hora_inicio: Optional[str] = None
+    hora_fin: Optional[str] = None
+    bloques: Optional[List[BloqueHorario]] = None  # Varios bloques en el mismo día
+
+
+class HorariosSemana(BaseModel):
+    horarios: Dict[str, DiaHorario]
+
+
+class ExcepcionCreate(BaseModel):
+    """
+    Bloqueo (vacaciones, permisos) o turno extra entre fecha_desde y
+    fecha_hasta (inclusive). Sin horas cubre el día completo
+    """
+    tipo: Literal["bloqueo", "turno_extra"] = "bloqueo"
+    fecha_desde: date
+    fecha_hasta: Optional[date] = None  # Por defecto, solo fecha_desde
+    hora_inicio: Optional[str] = None
+    hora_fin: Optional[str] = None
+    motivo: Optional[str] = Field(None, max_length=255)
+
+    @model_validator(mode="after")
+    def validar_rango(self):
+        if self.fecha_hasta is None:
+            self.fecha_hasta = self.fecha_desde
+        if self.fecha_hasta < self.fecha_desde:
+            raise ValueError("'fecha_hasta' no puede ser anterior a 'fecha_desde'")
+        if (self.fecha_hasta - self.fecha_desde).days >= 366:
+            raise ValueError("Una excepción puede cubrir como máximo un año")
+        if (self.hora_inicio is None) != (self.hora_fin is None):
+            raise ValueError("Indique 'hora_inicio' y 'hora_fin', o ninguna para el día completo")
+        if self.tipo == "turno_extra" and self.hora_inicio is None:
+            raise ValueError("Un turno extra requiere 'hora_inicio' y 'hora_fin'")
+        return self
+
+
+class ZonaHorariaUpdate(BaseModel):
+    zona_horaria: str = Field(..., max_length=50, description="Zona IANA, p. ej. America/Bogota")
+
+
 class PasswordChange(BaseModel):
     password_actual: str
     password_nuevo: str
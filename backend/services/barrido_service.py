@@ -0,0 +1,220 @@
+"""
+Servicio de barrido de citas vencidas
+
+Las citas CONFIRMADA que ya terminaron pasan a COMPLETADA (o al estado de
+BARRIDO_ESTADO_DESTINO) sin que el profesional tenga que marcarlas. Así el
+conjunto de citas activas que filtran la detección de conflictos y las
+próximas citas no crece indefinidamente.
+
+En la misma vuelta se cancelan las citas PENDIENTE agendadas sin pagar cuya
+retención (retenida_hasta) ya venció: su horario vuelve a quedar libre, se
+ofrece a la lista de espera y se avisa al cliente.
+
+El barrido avanza en lotes de BARRIDO_LOTE citas con paginación por clave
+(fecha_hora, id) y un commit por lote. Con varias instancias del backend,
+solo la que obtiene el advisory lock de PostgreSQL ejecuta el barrido; las
+demás lo omiten en esa vuelta.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import engine
+from models import EstadoCita
+from repositories import CitaRepository
+from services import calendario_service, lista_espera_service
+from utils import retenciones
+from utils.notificaciones import notificar_reservas_vencidas
+
+# Clave del advisory lock que elige al único worker que barre en cada vuelta
+BARRIDO_LOCK_ID = 724100011
+
+METRICAS = {
+    "ejecuciones": 0,
+    "ejecuciones_omitidas": 0,  # Otra instancia tenía el lock
+    "filas_procesadas_total": 0,
+    "ultima_ejecucion": None,
+    "ultima_duracion_segundos": None,
+    "ultimas_filas": 0,
+    "ultimos_lotes": 0,
+    "reservas_vencidas_total": 0,  # Citas sin pagar canceladas al vencer su retención
+    "ultimas_reservas_vencidas": 0,
+    "lag_segundos": None,  # Antigüedad de la cita vencida más vieja sin cerrar
+    "ultimo_error": None
+}
+_metricas_lock = threading.Lock()
+
+
+def _estado_destino() -> EstadoCita:
+    return EstadoCita[settings.BARRIDO_ESTADO_DESTINO.upper()]
+
+
+def _corte() -> datetime:
+    """Las citas que terminaron antes de este instante se consideran vencidas"""
+    return datetime.now(timezone.utc) - timedelta(minutes=settings.BARRIDO_MARGEN_MINUTOS)
+
+
+def _calcular_lag(db: Session, corte: datetime) -> Optional[float]:
+    mas_antigua = CitaRepository.obtener_vencida_mas_antigua(db, corte)
+    if mas_antigua is None:
+        return 0.0
+    if mas_antigua.tzinfo is None:
+        mas_antigua = mas_antigua.replace(tzinfo=timezone.utc)
+    return round((corte - mas_antigua).total_seconds(), 1)
+
+
+def _cancelar_reservas_vencidas(db: Session) -> List:
+    """
+    Cancela en lotes las citas sin pagar cuya retención venció y libera sus
+    horarios. Retorna las citas canceladas.
+    """
+    canceladas = []
+    while True:
+        lote = CitaRepository.cancelar_reservas_vencidas_lote(
+            db, datetime.now(timezone.utc), settings.BARRIDO_LOTE
+        )
+        db.commit()
+        canceladas.extend(lote)
+        if len(lote) < settings.BARRIDO_LOTE:
+            break
+    
+    if not canceladas:
+        return canceladas
+    
+    fechas_por_profesional = defaultdict(list)
+    for cita in canceladas:
+        if cita.retencion_id:
+            retenciones.liberar_retencion(cita.retencion_id)
+        fechas_por_profesional[cita.profesional_id].append(cita.fecha_hora)
+    
+    for profesional_id, fechas in fechas_por_profesional.items():
+        calendario_service.registrar_cambio_cita(db, profesional_id, *fechas)
+    
+    notificar_reservas_vencidas(db, canceladas)
+    for cita in canceladas:
+        lista_espera_service.ofrecer_horario_liberado(
+            db, cita.profesional_id, cita.fecha_hora, cita.duracion_minutos,
+            excluir_cliente_id=cita.cliente_id
+        )
+    return canceladas
+
+
+def ejecutar_barrido(max_lotes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Ejecuta una vuelta del barrido si esta instancia obtiene el lock.
+    
+    El advisory lock es de sesión: se toma en una conexión dedicada que se
+    mantiene durante toda la vuelta (los commits de cada lote no lo liberan)
+    y se suelta al terminar, aunque haya errores.
+    """
+    inicio = time.monotonic()
+    
+    with engine.connect() as conexion:
+        es_lider = conexion.execute(select(func.pg_try_advisory_lock(BARRIDO_LOCK_ID))).scalar()
+        conexion.commit()
+        
+        if not es_lider:
+            with _metricas_lock:
+                METRICAS["ejecuciones_omitidas"] += 1
+            return {"lider": False, "filas": 0, "lotes": 0, "reservas_vencidas": 0}
+        
+        db = Session(bind=conexion)
+        filas = 0
+        lotes = 0
+        vencidas = 0
+        try:
+            corte = _corte()
+            estado_destino = _estado_destino()
+            cursor = None
+            
+            while max_lotes is None or lotes < max_lotes:
+                lote = CitaRepository.completar_vencidas_lote(
+                    db, corte, cursor, settings.BARRIDO_LOTE,
+                    estado_destino=estado_destino
+                )
+                db.commit()
+                if not lote:
+                    break
+                
+                lotes += 1
+                filas += len(lote)
+                cursor = (lote[-1].fecha_hora, lote[-1].id)
+                
+                if len(lote) < settings.BARRIDO_LOTE:
+                    break
+            
+            vencidas = len(_cancelar_reservas_vencidas(db))
+            
+            lag = _calcular_lag(db, corte)
+            db.commit()
+            error = None
+        except Exception as e:
+            db.rollback()
+            lag = None
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            db.close()
+            conexion.execute(select(func.pg_advisory_unlock(BARRIDO_LOCK_ID)))
+            conexion.commit()
+            
+            with _metricas_lock:
+                METRICAS["ejecuciones"] += 1
+                METRICAS["filas_procesadas_total"] += filas
+                METRICAS["ultima_ejecucion"] = datetime.now(timezone.utc).isoformat()
+                METRICAS["ultima_duracion_segundos"] = round(time.monotonic() - inicio, 3)
+                METRICAS["ultimas_filas"] = filas
+                METRICAS["ultimos_lotes"] = lotes
+                METRICAS["reservas_vencidas_total"] += vencidas
+                METRICAS["ultimas_reservas_vencidas"] = vencidas
+                METRICAS["lag_segundos"] = lag
+                METRICAS["ultimo_error"] = error
+    
+    return {
+        "lider": True,
+        "filas": filas,
+        "lotes": lotes,
+        "reservas_vencidas": vencidas,
+        "lag_segundos": lag
+    }
+
+
+def obtener_metricas() -> Dict[str, Any]:
+    """Copia de las métricas del barrido en esta instancia"""
+    with _metricas_lock:
+        return {
+            **METRICAS,
+            "activo": settings.BARRIDO_ACTIVO,
+            "intervalo_segundos": settings.BARRIDO_INTERVALO_SEGUNDOS,
+            "lote": settings.BARRIDO_LOTE,
+            "estado_destino": settings.BARRIDO_ESTADO_DESTINO
+        }
+
+
+def iniciar_barrido_periodico(detener: threading.Event) -> threading.Thread:
+    """
+    Lanza un hilo que ejecuta el barrido cada BARRIDO_INTERVALO_SEGUNDOS
+    hasta que se active `detener`. Los errores se registran en las métricas
+    y no detienen el hilo.
+    """
+    def bucle():
+        while not detener.is_set():
+            try:
+                resultado = ejecutar_barrido()
+                if resultado["filas"]:
+                    print(f"🧹 Barrido: {resultado['filas']} citas cerradas en {resultado['lotes']} lotes")
+                if resultado["reservas_vencidas"]:
+                    print(f"🧹 Barrido: {resultado['reservas_vencidas']} reservas sin pagar canceladas")
+            except Exception as e:
+                print(f"❌ Error en el barrido de citas: {e}")
+            detener.wait(settings.BARRIDO_INTERVALO_SEGUNDOS)
+    
+    hilo = threading.Thread(target=bucle, name="barrido-citas", daemon=True)
+    hilo.start()
+    return hilo
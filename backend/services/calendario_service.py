@@ -0,0 +1,265 @@
+"""
+Servicio del calendario materializado de horarios libres
+
+Cuando CALENDARIO_MATERIALIZADO está activo, los minutos libres de cada
+profesional (plantilla de Disponibilidad menos citas activas) se guardan por
+día para las próximas CALENDARIO_SEMANAS semanas. Consultar horarios pasa a
+ser una lectura por clave primaria en lugar de recalcular en cada request.
+
+El calendario se actualiza de forma incremental: cada evento recalcula solo
+los días que toca (agendar, cancelar, reagendar o cambiar el estado de una
+cita, o modificar un bloque de Disponibilidad o una excepción por fecha).
+Cada recálculo corre en su propia transacción, después del cambio que lo
+originó, con el lock de sus días tomado antes de leer las citas: dos
+recálculos del mismo día no se intercalan y el último en escribir es el que
+leyó el estado más reciente. Si un recálculo falla, sus días se borran y la
+siguiente lectura los vuelve a calcular. reconstruir_calendario.py
+repara cualquier desvío.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import User, TipoUsuario
+from repositories import CalendarioRepository, CitaRepository
+from services import plantilla_service
+from utils.horarios import obtener_zona, inicio_del_dia, mascara_ocupada, agrupar_citas_por_dia
+
+
+def _horizonte(zona: Optional[ZoneInfo] = None) -> tuple:
+    """Primer y último día (inclusive) que cubre el calendario en la zona dada"""
+    hoy = datetime.now(zona or obtener_zona()).date()
+    return hoy, hoy + timedelta(weeks=settings.CALENDARIO_SEMANAS)
+
+
+def _a_dia(valor, zona: ZoneInfo) -> date:
+    """Convierte una fecha_hora (en UTC o con zona) al día local del profesional"""
+    if isinstance(valor, datetime):
+        if valor.tzinfo is not None:
+            return valor.astimezone(zona).date()
+        return valor.date()
+    return valor
+
+
+def _zona_profesional(db: Session, profesional_id: int) -> ZoneInfo:
+    # Import local para evitar el ciclo profesional_service -> calendario_service
+    from services.profesional_service import obtener_zona_profesional
+    return obtener_zona_profesional(db, profesional_id)
+
+
+def calcular_minutos_libres(
+    db: Session,
+    profesional_id: int,
+    dias: List[date],
+    zona: Optional[ZoneInfo] = None
+) -> Dict[date, int]:
+    """
+    Calcula plantilla & ~ocupada para cada día pedido, con una consulta de
+    plantillas, una de excepciones y una de citas para todo el rango. Los días son locales a la
+    zona del profesional (se consulta si no se pasa `zona`).
+    """
+    if not dias:
+        return {}
+    
+    zona = zona or _zona_profesional(db, profesional_id)
+    plantilla = plantilla_service.obtener_plantilla(db, profesional_id)
+    excepciones = plantilla_service.excepciones_por_dia(
+        db, [profesional_id], min(dias), max(dias)
+    )[profesional_id]
+    citas = CitaRepository.obtener_intervalos_activos(
+        db,
+        [profesional_id],
+        inicio_del_dia(min(dias), zona),
+        inicio_del_dia(max(dias) + timedelta(days=1), zona)
+    )
+    citas_por_dia = agrupar_citas_por_dia(citas, zona)
+    
+    return {
+        dia: plantilla.mascara(dia, excepciones.get(dia, ())) & ~mascara_ocupada(
+            dia, zona, citas_por_dia.get((profesional_id, dia), [])
+        )
+        for dia in dias
+    }
+
+
+def _recalcular_dias(
+    db: Session,
+    profesional_id: int,
+    dias: List[date],
+    zona: ZoneInfo
+) -> Optional[Dict[date, int]]:
+    """
+    Recalcula y guarda los días en una transacción propia, con sus locks
+    tomados antes de leer las citas. Si falla, borra esos días para que se
+    recalculen al leerlos y retorna None: el cambio que lo originó ya está
+    confirmado y no debe fallar por el calendario.
+    """
+    try:
+        CalendarioRepository.bloquear_dias(db, profesional_id, dias)
+        libres = calcular_minutos_libres(db, profesional_id, dias, zona)
+        CalendarioRepository.guardar_dias(db, profesional_id, libres)
+        db.commit()
+        return libres
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  No se pudo recalcular el calendario del profesional {profesional_id}: {e}")
+    
+    try:
+        CalendarioRepository.eliminar_dias(db, profesional_id, dias)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ No se pudieron invalidar los días del calendario del profesional {profesional_id}: {e}")
+    return None
+
+
+def obtener_minutos_libres(
+    db: Session,
+    profesional_id: int,
+    dia: date,
+    zona: Optional[ZoneInfo] = None
+) -> Optional[int]:
+    """
+    Lee los minutos libres de un día del calendario materializado.
+    Si el día está en el horizonte pero aún no existe, se calcula y se guarda.
+    Retorna None si el calendario está desactivado, el día está fuera del
+    horizonte o no se pudo calcular: quien llama lo calcula en vivo.
+    """
+    if not settings.CALENDARIO_MATERIALIZADO:
+        return None
+    
+    zona = zona or _zona_profesional(db, profesional_id)
+    primer_dia, ultimo_dia = _horizonte(zona)
+    if not primer_dia <= dia <= ultimo_dia:
+        return None
+    
+    libres = CalendarioRepository.obtener_dia(db, profesional_id, dia)
+    if libres is None:
+        calculados = _recalcular_dias(db, profesional_id, [dia], zona)
+        return calculados[dia] if calculados is not None else None
+    return libres
+
+
+def obtener_rango_minutos_libres(
+    db: Session,
+    profesional_id: int,
+    desde: date,
+    hasta: date,
+    zona: Optional[ZoneInfo] = None
+) -> Dict[date, int]:
+    """
+    Minutos libres de los días entre desde y hasta (inclusive) que cubre el
+    calendario materializado, leídos con una sola consulta; los días del
+    horizonte que aún no existen se calculan y se guardan. Los días fuera
+    del horizonte (o todos, si el calendario está desactivado) no aparecen:
+    quien llama los calcula en vivo.
+    """
+    if not settings.CALENDARIO_MATERIALIZADO:
+        return {}
+    
+    zona = zona or _zona_profesional(db, profesional_id)
+    primer_dia, ultimo_dia = _horizonte(zona)
+    desde = max(desde, primer_dia)
+    hasta = min(hasta, ultimo_dia)
+    if desde > hasta:
+        return {}
+    
+    libres = CalendarioRepository.obtener_rango(db, profesional_id, desde, hasta)
+    dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    faltantes = [dia for dia in dias if dia not in libres]
+    if faltantes:
+        libres.update(_recalcular_dias(db, profesional_id, faltantes, zona) or {})
+    return libres
+
+
+def registrar_cambio_cita(db: Session, profesional_id: int, *fechas) -> None:
+    """
+    Recalcula los días afectados por un cambio en una cita. Recibe las
+    fecha_hora involucradas (p. ej. la anterior y la nueva al reagendar).
+    """
+    if not settings.CALENDARIO_MATERIALIZADO:
+        return
+    
+    zona = _zona_profesional(db, profesional_id)
+    primer_dia, ultimo_dia = _horizonte(zona)
+    dias = set()
+    for fecha in fechas:
+        if fecha is None:
+            continue
+        dia = _a_dia(fecha, zona)
+        # Las citas que cruzan la medianoche también ocupan el día siguiente
+        for afectado in (dia, dia + timedelta(days=1)):
+            if primer_dia <= afectado <= ultimo_dia:
+                dias.add(afectado)
+    
+    if not dias:
+        return
+    
+    _recalcular_dias(db, profesional_id, sorted(dias), zona)
+
+
+def registrar_cambio_fechas(db: Session, profesional_id: int, desde: date, hasta: date) -> None:
+    """
+    Recalcula los días locales entre desde y hasta (inclusive) que caen en el
+    horizonte, p. ej. al registrar o eliminar una excepción de disponibilidad.
+    """
+    if not settings.CALENDARIO_MATERIALIZADO:
+        return
+    
+    zona = _zona_profesional(db, profesional_id)
+    primer_dia, ultimo_dia = _horizonte(zona)
+    desde = max(desde, primer_dia)
+    hasta = min(hasta, ultimo_dia)
+    if desde > hasta:
+        return
+    
+    dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    _recalcular_dias(db, profesional_id, dias, zona)
+
+
+def reconstruir_profesional(db: Session, profesional_id: int) -> int:
+    """
+    Recalcula todo el horizonte de un profesional (p. ej. al cambiar su
+    Disponibilidad). Retorna el número de días escritos.
+    """
+    if not settings.CALENDARIO_MATERIALIZADO:
+        return 0
+    
+    zona = _zona_profesional(db, profesional_id)
+    primer_dia, ultimo_dia = _horizonte(zona)
+    dias = [primer_dia + timedelta(days=i) for i in range((ultimo_dia - primer_dia).days + 1)]
+    
+    return len(dias) if _recalcular_dias(db, profesional_id, dias, zona) is not None else 0
+
+
+def reconstruir_calendario(db: Session, profesional_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+    """
+    Reconstruye el calendario completo (o el de los profesionales dados) y
+    elimina los días que ya pasaron. Se usa desde reconstruir_calendario.py.
+    """
+    if profesional_ids is None:
+        profesional_ids = [
+            user_id for (user_id,) in db.query(User.id).filter(
+                User.tipo_usuario == TipoUsuario.PROFESIONAL,
+                User.is_active == True
+            ).all()
+        ]
+    
+    # Un día de margen: en zonas al oeste de ZONA_HORARIA ayer puede seguir siendo hoy
+    primer_dia, _ = _horizonte()
+    eliminados = CalendarioRepository.eliminar_anteriores(db, primer_dia - timedelta(days=1))
+    
+    profesionales = 0
+    dias = 0
+    for profesional_id in profesional_ids:
+        dias += reconstruir_profesional(db, profesional_id)
+        profesionales += 1
+    
+    return {
+        "profesionales": profesionales,
+        "dias_escritos": dias,
+        "dias_eliminados": eliminados
+    }
@@ -0,0 +1,186 @@
+"""
+Servicio de citas - Lógica de negocio para agendar citas
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from config import settings
+from models import User, EstadoCita, TipoUsuario
+from schemas import CitaSerieCreate
+from repositories import CitaRepository
+from services import calendario_service, lista_espera_service
+from services.plantilla_service import obtener_plantilla, excepciones_por_dia
+from utils import retenciones
+from utils.horarios import fechas_recurrentes, detectar_solapamientos
+from utils.notificaciones import notificar_serie_creada
+
+INTERVALO_FRECUENCIA = {"semanal": 7, "quincenal": 14}
+
+
+def crear_serie_citas(db: Session, user: User, datos: CitaSerieCreate) -> Dict[str, Any]:
+    """
+    Agenda una serie de citas recurrentes en una sola transacción.
+    
+    Los conflictos de toda la serie se detectan con una sola consulta de las
+    citas activas del profesional en la ventana de la serie; las citas se
+    insertan con un único INSERT y se envía una notificación resumen por
+    participante. Si alguna fecha está ocupada se rechaza la serie completa,
+    salvo que `omitir_conflictos` pida crear solo las fechas libres.
+    """
+    # Un profesional agenda para un paciente; un cliente agenda con un profesional
+    if user.tipo_usuario == TipoUsuario.PROFESIONAL:
+        profesional = user
+        cliente = db.query(User).filter(
+            User.id == datos.cliente_id,
+            User.tipo_usuario == TipoUsuario.CLIENTE
+        ).first() if datos.cliente_id else None
+        if not cliente:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cliente no encontrado"
+            )
+    else:
+        cliente = user
+        profesional = db.query(User).filter(
+            User.id == datos.profesional_id,
+            User.tipo_usuario == TipoUsuario.PROFESIONAL
+        ).first() if datos.profesional_id else None
+        if not profesional:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Profesional no encontrado"
+            )
+    
+    primera = datos.fecha_hora
+    if primera.tzinfo is None:
+        primera = primera.replace(tzinfo=timezone.utc)
+    
+    if primera <= datetime.now(timezone.utc):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha debe ser futura"
+        )
+    
+    plantilla = obtener_plantilla(db, profesional.id)
+    fechas = fechas_recurrentes(
+        primera,
+        INTERVALO_FRECUENCIA[datos.frecuencia],
+        plantilla.zona,
+        ocurrencias=datos.ocurrencias,
+        hasta=datos.hasta,
+        maximo=settings.MAX_OCURRENCIAS_SERIE + 1
+    )
+    if not fechas:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha 'hasta' es anterior a la primera cita"
+        )
+    if len(fechas) > settings.MAX_OCURRENCIAS_SERIE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Una serie puede tener como máximo {settings.MAX_OCURRENCIAS_SERIE} citas"
+        )
+    
+    # Una sola consulta para toda la ventana de la serie
+    duracion = datos.duracion_minutos
+    ocupadas = CitaRepository.obtener_intervalos_activos(
+        db,
+        [profesional.id],
+        fechas[0],
+        fechas[-1] + timedelta(minutes=duracion)
+    )
+    conflictos = detectar_solapamientos(
+        [(fecha, duracion) for fecha in fechas],
+        [(fecha_hora, duracion_cita) for _, fecha_hora, duracion_cita in ocupadas]
+    )
+    
+    # Las fechas retenidas por otros clientes o fuera del horario de atención
+    # (plantilla y excepciones por fecha) también cuentan como ocupadas
+    excepciones = excepciones_por_dia(
+        db,
+        [profesional.id],
+        fechas[0].astimezone(plantilla.zona).date(),
+        (fechas[-1] + timedelta(minutes=duracion)).astimezone(plantilla.zona).date()
+    )[profesional.id]
+    # Las retenciones de toda la serie se leen de una vez; la del propio
+    # usuario no cuenta
+    retencion = retenciones.retencion_propia(datos.retencion_id, user.id)
+    retenidas = retenciones.horarios_retenidos(
+        profesional.id,
+        [(fecha, duracion) for fecha in fechas],
+        excepto_retencion_id=retencion.id if retencion else None
+    )
+    conflictos = sorted(set(conflictos) | {
+        i for i, fecha in enumerate(fechas)
+        if retenidas[i] or not plantilla.dentro_de_horario(fecha, duracion, excepciones)
+    })
+    
+    omitidas = [fechas[i] for i in conflictos]
+    if omitidas and not datos.omitir_conflictos:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "mensaje": "El profesional no está disponible en algunas fechas de la serie",
+                "conflictos": [fecha.isoformat() for fecha in omitidas]
+            }
+        )
+    
+    ocupados = set(conflictos)
+    libres = [fecha for i, fecha in enumerate(fechas) if i not in ocupados]
+    if not libres:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Todas las fechas de la serie están ocupadas"
+        )
+    
+    serie_id = str(uuid.uuid4())
+    citas = CitaRepository.crear_serie_si_disponible(db, [
+        {
+            "cliente_id": cliente.id,
+            "profesional_id": profesional.id,
+            "fecha_hora": fecha,
+            "duracion_minutos": duracion,
+            "estado": EstadoCita.PENDIENTE,
+            "motivo": datos.motivo,
+            "notas": datos.notas,
+            "precio": datos.precio,
+            "serie_id": serie_id
+        }
+        for fecha in libres
+    ])
+    
+    if citas is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Otra reserva ocupó uno de los horarios de la serie. Intente de nuevo"
+        )
+    
+    # Las citas ya protegen sus horarios en la base de datos
+    if retencion is not None:
+        retenciones.liberar_retencion(retencion.id)
+    
+    calendario_service.registrar_cambio_cita(db, profesional.id, *libres)
+    lista_espera_service.registrar_reserva(db, cliente.id, profesional.id, *libres)
+    notificar_serie_creada(db, citas, cliente, profesional, datos.frecuencia)
+    
+    return {
+        "serie_id": serie_id,
+        "frecuencia": datos.frecuencia,
+        "total": len(citas),
+        "citas": [
+            {
+                "id": cita.id,
+                "fecha_hora": cita.fecha_hora,
+                "duracion_minutos": cita.duracion_minutos,
+                "estado": cita.estado.name
+            }
+            for cita in citas
+        ],
+        "omitidas": [fecha.isoformat() for fecha in omitidas],
+        "cliente_id": cliente.id,
+        "profesional_id": profesional.id
+    }
@@ -4,11 +4,11 @@ Lógica de negocio para operaciones de clientes
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 
-from models import User, Cita, Pago, PerfilProfesional, EstadoCita, EstadoPago
+from models import Cita, Pago, EstadoCita, EstadoPago
+from repositories import PagoRepository, ClienteRepository
 from schemas import CitaResponse, PagoResponse
 
 
@@ -70,102 +70,128 @@ class ClienteService:
     def obtener_pagos_cliente(
         db: Session,
         cliente_id: int,
-        estado: Optional[str] = None
+        estado: Optional[str] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        antes_de: Optional[Tuple[datetime, int]] = None,
+        limite: Optional[int] = None
     ) -> List[dict]:
         """
-        Obtiene los pagos de un cliente con información enriquecida
+        Obtiene los pagos de un cliente con información de la cita y del
+        profesional, en una sola consulta (ver PagoRepository.obtener_historial_cliente).
+        Lo usa también GET /api/pagos/mis-pagos
         """
-        query = db.query(Pago).join(Cita).filter(Cita.cliente_id == cliente_id)
-        
+        estado_enum = None
         if estado:
             try:
                 estado_enum = EstadoPago[estado.upper()]
-                query = query.filter(Pago.estado == estado_enum)
             except KeyError:
-                pass
-        
-        pagos = query.order_by(Pago.created_at.desc()).all()
+                pass  # Si el estado no es válido, ignorar filtro
         
-        # Enriquecer con información de cita y profesional
-        pagos_response = []
-        for pago in pagos:
-            cita = db.query(Cita).filter(Cita.id == pago.cita_id).first()
-            if not cita:
-                continue
-            
-            profesional = db.query(User).filter(User.id == cita.profesional_id).first()
-            if not profesional:
-                continue
-            
-            perfil = db.query(PerfilProfesional).filter(
-                PerfilProfesional.usuario_id == cita.profesional_id
-            ).first()
-            
-            pago_dict = {
-                "id": pago.id,
-                "cita_id": pago.cita_id,
-                "monto": pago.monto,
-                "estado": pago.estado.name,
-                "metodo_pago": pago.metodo_pago,
-                "referencia_transaccion": pago.referencia_transaccion,
-                "fecha_pago": pago.created_at,
+        filas = PagoRepository.obtener_historial_cliente(
+            db,
+            cliente_id,
+            estado=estado_enum,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            antes_de=antes_de,
+            limite=limite
+        )
+        
+        return [
+            {
+                "id": fila.id,
+                "cita_id": fila.cita_id,
+                "monto": fila.monto,
+                "estado": fila.estado.name,
+                "metodo_pago": fila.metodo_pago,
+                "referencia_transaccion": fila.referencia_transaccion,
+                "fecha_pago": fila.created_at,
                 "cita": {
-                    "fecha_hora": cita.fecha_hora,
-                    "motivo": cita.motivo,
-                    "estado": cita.estado.name,
-                    "duracion_minutos": cita.duracion_minutos if hasattr(cita, 'duracion_minutos') else 60
+                    "fecha_hora": fila.cita_fecha_hora,
+                    "motivo": fila.cita_motivo,
+                    "estado": fila.cita_estado.name,
+                    "duracion_minutos": fila.cita_duracion_minutos or 60
                 },
                 "profesional": {
-                    "nombre_completo": f"{profesional.nombre} {profesional.apellido}",
-                    "especialidad": perfil.especialidad if perfil else None,
-                    "telefono": profesional.telefono if hasattr(profesional, 'telefono') else None
+                    "nombre_completo": f"{fila.profesional_nombre} {fila.profesional_apellido}",
+                    "especialidad": fila.profesional_especialidad,
+                    "telefono": fila.profesional_telefono
                 }
             }
-            pagos_response.append(pago_dict)
-        
-        return pagos_response
+            for fila in filas
+        ]
     
     @staticmethod
     def obtener_estadisticas_cliente(db: Session, cliente_id: int) -> dict:
         """
-        Obtiene estadísticas del cliente
+        Obtiene estadísticas del cliente (citas y pagos) con un solo
+        agregado en SQL (ver ClienteRepository.obtener_totales)
         """
-        # Total de citas
-        total_citas = db.query(func.count(Cita.id)).filter(
-            Cita.cliente_id == cliente_id
-        ).scalar()
-        
-        # Citas completadas
-        citas_completadas = db.query(func.count(Cita.id)).filter(
-            Cita.cliente_id == cliente_id,
-            Cita.estado == EstadoCita.COMPLETADA
-        ).scalar()
-        
-        # Citas pendientes
-        citas_pendientes = db.query(func.count(Cita.id)).filter(
-            Cita.cliente_id == cliente_id,
-            Cita.estado.in_([EstadoCita.PENDIENTE, EstadoCita.CONFIRMADA])
-        ).scalar()
-        
-        # Total gastado
-        pagos = db.query(Pago).join(Cita).filter(
-            Cita.cliente_id == cliente_id,
-            Pago.estado == EstadoPago.COMPLETADO
-        ).all()
-        
-        total_gastado = sum(p.monto for p in pagos)
-        
-        # Profesionales únicos visitados
-        profesionales_unicos = db.query(func.count(func.distinct(Cita.profesional_id))).filter(
-            Cita.cliente_id == cliente_id
-        ).scalar()
+        return ClienteService._formatear_estadisticas(ClienteRepository.obtener_totales(db, cliente_id))
+    
+    @staticmethod
+    def _formatear_estadisticas(fila) -> dict:
+        return {
+            "total_citas": fila.total_citas,
+            "citas_completadas": fila.citas_completadas,
+            "citas_pendientes": fila.citas_pendientes,
+            "total_gastado": float(fila.total_gastado),
+            "profesionales_visitados": fila.profesionales_visitados,
+            "total_pagos": fila.total_pagos,
+            "pagos_pendientes": fila.pagos_pendientes,
+            "pagos_completados": fila.pagos_completados
+        }
+    
+    @staticmethod
+    def _formatear_cita(cita: dict) -> dict:
+        """Cita leída del JSON del dashboard, con la forma de GET /api/citas/mis-citas"""
+        return {
+            "id": cita["id"],
+            "fecha_hora": datetime.fromisoformat(cita["fecha_hora"]),
+            "duracion_minutos": cita["duracion_minutos"],
+            "estado": cita["estado"],
+            "motivo": cita["motivo"],
+            "precio": cita["precio"],
+            "profesional": {
+                "id": cita["profesional_id"],
+                "nombre_completo": f"{cita['profesional_nombre']} {cita['profesional_apellido']}",
+                "especialidad": cita["profesional_especialidad"],
+                "foto_url": cita["profesional_foto_url"]
+            }
+        }
+    
+    @staticmethod
+    def obtener_dashboard(db: Session, email: str, limite_citas: int = 5) -> Optional[dict]:
+        """
+        Dashboard del cliente: estadísticas, próximas citas, historial
+        reciente, notificaciones no leídas y favoritos. Es una sola
+        sentencia SQL (ver ClienteRepository.obtener_dashboard), incluida la
+        búsqueda del usuario por email. Retorna None si el email no es de un
+        cliente.
+        """
+        fila = ClienteRepository.obtener_dashboard(db, email, limite_citas=limite_citas)
+        if not fila:
+            return None
         
         return {
-            "total_citas": total_citas or 0,
-            "citas_completadas": citas_completadas or 0,
-            "citas_pendientes": citas_pendientes or 0,
-            "total_gastado": float(total_gastado) if total_gastado else 0.0,
-            "profesionales_visitados": profesionales_unicos or 0
+            "estadisticas": ClienteService._formatear_estadisticas(fila),
+            "notificaciones_no_leidas": fila.notificaciones_no_leidas,
+            "proximas_citas": [ClienteService._formatear_cita(cita) for cita in fila.proximas_citas],
+            "historial_citas": [ClienteService._formatear_cita(cita) for cita in fila.historial_citas],
+            "favoritos": [
+                {
+                    "id": favorito["id"],
+                    "nombre_completo": f"{favorito['nombre']} {favorito['apellido']}",
+                    "especialidad": favorito["especialidad"],
+                    "ciudad": favorito["ciudad"],
+                    "precio_consulta": favorito["precio_consulta"],
+                    "calificacion_promedio": favorito["calificacion_promedio"],
+                    "numero_resenas": favorito["numero_resenas"],
+                    "foto_url": favorito["foto_url"]
+                }
+                for favorito in fila.favoritos
+            ]
         }
     
     @staticmethod
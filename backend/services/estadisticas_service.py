@@ -0,0 +1,98 @@
+"""
+Estadísticas del profesional desde los resúmenes diarios
+
+Las métricas de citas y pagos se leen de resumen_citas_diario y
+resumen_pagos_diario (una fila por profesional, día local y estado), que los
+triggers mantienen al día en la misma transacción que cambia cada cita o
+pago. Así el costo depende de cuántos días con actividad se leen, no de
+cuántas citas tiene el historial.
+
+Cada métrica es un agregado condicional (SUM(...) FILTER (WHERE ...)) y
+pedir varias ventanas de fechas solo agrega columnas a la misma sentencia.
+Las ventanas son días locales [desde, hasta); un extremo en None deja la
+ventana abierta de ese lado. Las citas cuentan en su día local y los pagos
+en el día local de su fecha de pago.
+"""
+
+from datetime import date
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from models import EstadoCita, EstadoPago
+from repositories.resumen_repository import ResumenRepository, Ventana
+
+TODO_EL_TIEMPO: Ventana = (None, None)
+
+# metrica: (fuente, campo sumado, estado; None = todos)
+METRICAS = {
+    "total_citas": ("cita", "cantidad", None),
+    "citas_pendientes": ("cita", "cantidad", EstadoCita.PENDIENTE.name),
+    "citas_confirmadas": ("cita", "cantidad", EstadoCita.CONFIRMADA.name),
+    "citas_completadas": ("cita", "cantidad", EstadoCita.COMPLETADA.name),
+    "citas_canceladas": ("cita", "cantidad", EstadoCita.CANCELADA.name),
+    "ingresos": ("pago", "monto", EstadoPago.COMPLETADO.name),
+    "monto_pendiente": ("pago", "monto", EstadoPago.PENDIENTE.name),
+    "pagos_completados": ("pago", "cantidad", EstadoPago.COMPLETADO.name),
+    "pagos_pendientes": ("pago", "cantidad", EstadoPago.PENDIENTE.name),
+    "pagos_fallidos": ("pago", "cantidad", EstadoPago.FALLIDO.name),
+    "total_pagos": ("pago", "cantidad", None),
+}
+
+# Métricas de las series de tendencia
+METRICAS_TENDENCIA = ("total_citas", "citas_completadas", "citas_canceladas", "ingresos")
+
+UNIDADES_TENDENCIA = {"dia": "day", "semana": "week", "mes": "month"}
+
+
+def _formatear(metrica: str, valor: int) -> float:
+    """Los montos se devuelven como float y los conteos como int"""
+    return float(valor) if METRICAS[metrica][1] == "monto" else int(valor)
+
+
+def calcular_estadisticas(
+    db: Session,
+    profesional_id: int,
+    ventanas: Dict[str, Ventana]
+) -> Dict[str, Dict[str, float]]:
+    """
+    Métricas de citas y pagos del profesional para cada ventana de días,
+    con una sola consulta sobre los resúmenes:
+    
+        calcular_estadisticas(db, 7, {"total": TODO_EL_TIEMPO, "mes": (inicio_mes, None)})
+        # {"total": {"total_citas": ..., "ingresos": ...}, "mes": {...}}
+    """
+    sumas = ResumenRepository.sumar(db, profesional_id, ventanas, METRICAS)
+    return {
+        nombre: {metrica: _formatear(metrica, valor) for metrica, valor in metricas.items()}
+        for nombre, metricas in sumas.items()
+    }
+
+
+def obtener_tendencia(
+    db: Session,
+    profesional_id: int,
+    desde: date,
+    hasta: date,
+    agrupar: str = "dia"
+) -> List[Dict]:
+    """
+    Serie de citas e ingresos por día, semana o mes entre desde y hasta
+    (exclusivo), para las gráficas del dashboard. Solo incluye los periodos
+    con actividad.
+    """
+    filas = ResumenRepository.obtener_serie(
+        db,
+        profesional_id,
+        desde,
+        hasta,
+        {metrica: METRICAS[metrica] for metrica in METRICAS_TENDENCIA},
+        unidad=UNIDADES_TENDENCIA[agrupar]
+    )
+    return [
+        {
+            "periodo": fila.periodo.isoformat(),
+            **{metrica: _formatear(metrica, getattr(fila, metrica)) for metrica in METRICAS_TENDENCIA}
+        }
+        for fila in filas
+    ]
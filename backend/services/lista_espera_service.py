@@ -0,0 +1,142 @@
+"""
+Servicio de lista de espera - Ofrece los horarios que se liberan
+
+Cuando una cita se cancela (o se reagenda) su horario vuelve a quedar libre.
+Las solicitudes activas del profesional cuya ventana lo cubre se encuentran
+con una búsqueda de rangos sobre el índice GiST de lista_espera y reciben la
+oferta en orden de prioridad y antigüedad.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from config import settings
+from models import User, ListaEspera, EstadoEspera, TipoUsuario
+from schemas import ListaEsperaCreate
+from repositories import ListaEsperaRepository
+from utils.notificaciones import notificar_horario_liberado
+
+
+def _formatear(solicitud: ListaEspera, persona: User) -> Dict[str, Any]:
+    """Solicitud con el nombre del profesional (para el cliente) o del cliente (para el profesional)"""
+    return {
+        "id": solicitud.id,
+        "desde": solicitud.desde,
+        "hasta": solicitud.hasta,
+        "duracion_minutos": solicitud.duracion_minutos,
+        "prioridad": solicitud.prioridad,
+        "estado": solicitud.estado.value,
+        "ultima_oferta_en": solicitud.ultima_oferta_en,
+        "created_at": solicitud.created_at,
+        "usuario": {
+            "id": persona.id,
+            "nombre_completo": f"{persona.nombre} {persona.apellido}"
+        }
+    }
+
+
+def registrar_solicitud(db: Session, cliente: User, datos: ListaEsperaCreate) -> Dict[str, Any]:
+    """Registra al cliente en la lista de espera de un profesional"""
+    profesional = db.query(User).filter(
+        User.id == datos.profesional_id,
+        User.tipo_usuario == TipoUsuario.PROFESIONAL
+    ).first()
+    
+    if not profesional:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profesional no encontrado"
+        )
+    
+    desde = datos.desde if datos.desde.tzinfo else datos.desde.replace(tzinfo=timezone.utc)
+    hasta = datos.hasta if datos.hasta.tzinfo else datos.hasta.replace(tzinfo=timezone.utc)
+    
+    if hasta <= datetime.now(timezone.utc):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La ventana de espera debe terminar en el futuro"
+        )
+    
+    if hasta - desde < timedelta(minutes=datos.duracion_minutos):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La ventana de espera es más corta que la duración de la cita"
+        )
+    
+    solicitud = ListaEsperaRepository.crear(db, {
+        "cliente_id": cliente.id,
+        "profesional_id": profesional.id,
+        "desde": desde,
+        "hasta": hasta,
+        "duracion_minutos": datos.duracion_minutos,
+        "estado": EstadoEspera.ACTIVA
+    })
+    
+    return _formatear(solicitud, profesional)
+
+
+def obtener_solicitudes_cliente(db: Session, cliente_id: int) -> List[Dict[str, Any]]:
+    """Solicitudes activas del cliente"""
+    return [
+        _formatear(solicitud, profesional)
+        for solicitud, profesional in ListaEsperaRepository.obtener_por_cliente(db, cliente_id)
+    ]
+
+
+def obtener_solicitudes_profesional(db: Session, profesional_id: int) -> List[Dict[str, Any]]:
+    """Solicitudes activas del profesional en el orden en que recibirán ofertas"""
+    return [
+        _formatear(solicitud, cliente)
+        for solicitud, cliente in ListaEsperaRepository.obtener_por_profesional(db, profesional_id)
+    ]
+
+
+def ofrecer_horario_liberado(
+    db: Session,
+    profesional_id: int,
+    fecha_hora: datetime,
+    duracion_minutos: Optional[int],
+    excluir_cliente_id: Optional[int] = None
+) -> int:
+    """
+    Ofrece [fecha_hora, fecha_hora + duracion) a las primeras
+    LISTA_ESPERA_OFERTAS solicitudes que lo cubren. Retorna cuántas se notificaron.
+    
+    excluir_cliente_id evita ofrecerle el horario a quien acaba de liberarlo.
+    """
+    if fecha_hora.tzinfo is None:
+        fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+    
+    if fecha_hora <= datetime.now(timezone.utc):
+        return 0
+    
+    solicitudes = ListaEsperaRepository.buscar_coincidencias(
+        db,
+        profesional_id,
+        fecha_hora,
+        fecha_hora + timedelta(minutes=duracion_minutos or 60),
+        excluir_cliente_id=excluir_cliente_id,
+        limite=settings.LISTA_ESPERA_OFERTAS
+    )
+    
+    if not solicitudes:
+        return 0
+    
+    ahora = datetime.now(timezone.utc)
+    for solicitud in solicitudes:
+        solicitud.ultima_oferta_en = ahora
+    
+    profesional = db.query(User).filter(User.id == profesional_id).first()
+    notificar_horario_liberado(db, solicitudes, profesional, fecha_hora)
+    
+    return len(solicitudes)
+
+
+def registrar_reserva(db: Session, cliente_id: int, profesional_id: int, *fechas: datetime) -> None:
+    """
+    Cierra las solicitudes del cliente que quedan cubiertas por las citas
+    agendadas con el profesional (una sola o las de una serie)
+    """
+    ListaEsperaRepository.marcar_atendidas(db, cliente_id, profesional_id, *fechas)
@@ -0,0 +1,243 @@
+"""
+Plantillas semanales compiladas y excepciones por fecha
+
+La Disponibilidad de un profesional se compila una sola vez en una
+PlantillaSemanal: para cada día de la semana (índice 0 = lunes) la lista de
+intervalos [inicio, fin) en minutos y su mapa de bits, junto con la zona
+horaria del profesional. Las plantillas se guardan en memoria del proceso.
+
+crear_disponibilidad, actualizar_disponibilidad y eliminar_disponibilidad
+invalidan la plantilla del profesional. Otras instancias del backend ven el
+cambio a más tardar tras PLANTILLAS_CACHE_SEGUNDOS.
+
+Las excepciones (bloqueos, turnos extra y festivos) no se guardan en memoria:
+para cualquier rango de fechas se leen con una sola consulta de rangos y se
+aplican sobre el mapa de bits de cada día con mascara().
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from config import settings
+from models import DiaSemana, TipoExcepcion
+from repositories import DisponibilidadRepository, ExcepcionRepository
+from utils.horarios import MINUTOS_DIA, obtener_zona, hora_a_minutos, mascara_bloques, mascara_rango
+
+DIAS = list(DiaSemana)
+
+Intervalos = Tuple[Tuple[int, int], ...]
+
+# (tipo, minuto_inicio, minuto_fin) de cada excepción que toca un día
+ExcepcionesDia = List[Tuple[TipoExcepcion, int, int]]
+
+# Los bloqueos y festivos apagan minutos; un turno extra explícito los vuelve a encender
+ORDEN_EXCEPCIONES = {TipoExcepcion.FESTIVO: 0, TipoExcepcion.BLOQUEO: 1, TipoExcepcion.TURNO_EXTRA: 2}
+
+
+@dataclass(frozen=True)
+class PlantillaSemanal:
+    zona: ZoneInfo
+    intervalos: Tuple[Intervalos, ...]  # 7 días, intervalos ordenados y sin solapes
+    mascaras: Tuple[int, ...]  # Los mismos intervalos como mapas de bits de 1440 minutos
+    configurada: bool  # False si se usa el horario por defecto
+    
+    def mascara(self, dia: date, excepciones: ExcepcionesDia = ()) -> int:
+        """Mapa de bits del horario de atención de una fecha, con sus excepciones"""
+        mascara = self.mascaras[dia.weekday()]
+        for tipo, inicio, fin in sorted(excepciones, key=lambda e: ORDEN_EXCEPCIONES[e[0]]):
+            if tipo == TipoExcepcion.TURNO_EXTRA:
+                mascara |= mascara_rango(inicio, fin)
+            else:
+                mascara &= ~mascara_rango(inicio, fin)
+        return mascara
+    
+    def dentro_de_horario(
+        self,
+        fecha_hora: datetime,
+        duracion_minutos: int,
+        excepciones: Optional[Dict[date, ExcepcionesDia]] = None
+    ) -> bool:
+        """
+        Indica si [fecha_hora, fecha_hora + duración) cae completo dentro del
+        horario de atención. Una cita que cruza la medianoche debe estar
+        cubierta también al inicio del día siguiente. `excepciones` son las
+        del profesional por fecha local (ver excepciones_por_dia).
+        """
+        excepciones = excepciones or {}
+        if fecha_hora.tzinfo is None:
+            fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+        local = fecha_hora.astimezone(self.zona)
+        dia = local.date()
+        inicio = local.hour * 60 + local.minute
+        fin = inicio + (duracion_minutos or 60)
+        
+        if mascara_rango(inicio, fin) & ~self.mascara(dia, excepciones.get(dia, ())):
+            return False
+        if fin > MINUTOS_DIA:
+            siguiente = dia + timedelta(days=1)
+            return not mascara_rango(0, fin - MINUTOS_DIA) & ~self.mascara(
+                siguiente, excepciones.get(siguiente, ())
+            )
+        return True
+
+
+def _unir(bloques: Iterable[Tuple[int, int]]) -> Intervalos:
+    """Ordena y une bloques solapados o contiguos"""
+    unidos: List[List[int]] = []
+    for inicio, fin in sorted(bloques):
+        if unidos and inicio <= unidos[-1][1]:
+            unidos[-1][1] = max(unidos[-1][1], fin)
+        else:
+            unidos.append([inicio, fin])
+    return tuple((inicio, fin) for inicio, fin in unidos)
+
+
+def compilar_plantilla(zona: ZoneInfo, bloques_por_dia: Dict[int, List[Tuple[int, int]]]) -> PlantillaSemanal:
+    """
+    Compila los bloques (inicio, fin) de cada día. Sin ningún bloque se usa
+    el horario por defecto (HORA_INICIO_POR_DEFECTO - HORA_FIN_POR_DEFECTO)
+    todos los días.
+    """
+    configurada = any(bloques_por_dia.values())
+    if configurada:
+        intervalos = tuple(_unir(bloques_por_dia.get(dia, [])) for dia in range(7))
+    else:
+        por_defecto = ((
+            hora_a_minutos(settings.HORA_INICIO_POR_DEFECTO),
+            hora_a_minutos(settings.HORA_FIN_POR_DEFECTO)
+        ),)
+        intervalos = (por_defecto,) * 7
+    
+    return PlantillaSemanal(
+        zona=zona,
+        intervalos=intervalos,
+        mascaras=tuple(mascara_bloques(dia) for dia in intervalos),
+        configurada=configurada
+    )
+
+
+_cache: Dict[int, Tuple[float, PlantillaSemanal]] = {}
+# Cada invalidación sube la versión: una carga que empezó antes no se guarda
+_versiones: Dict[int, int] = {}
+_cache_lock = threading.Lock()
+
+
+def obtener_plantillas(db: Session, usuario_ids: Iterable[int]) -> Dict[int, PlantillaSemanal]:
+    """
+    Plantilla compilada de cada profesional. Las que no están en memoria (o
+    vencieron) se cargan juntas con una sola consulta.
+    """
+    usuario_ids = list(dict.fromkeys(usuario_ids))
+    ahora = time.monotonic()
+    plantillas = {}
+    
+    with _cache_lock:
+        for usuario_id in usuario_ids:
+            guardada = _cache.get(usuario_id)
+            if guardada and guardada[0] > ahora:
+                plantillas[usuario_id] = guardada[1]
+        faltantes = [usuario_id for usuario_id in usuario_ids if usuario_id not in plantillas]
+        versiones = {usuario_id: _versiones.get(usuario_id, 0) for usuario_id in faltantes}
+    
+    if not faltantes:
+        return plantillas
+    
+    zonas = {}
+    bloques = {usuario_id: {} for usuario_id in faltantes}
+    for fila in DisponibilidadRepository.obtener_plantillas_por_usuarios(db, faltantes):
+        zonas[fila.usuario_id] = fila.zona_horaria
+        if fila.dia_semana is not None:
+            bloques[fila.usuario_id].setdefault(DIAS.index(fila.dia_semana), []).append(
+                (fila.minuto_inicio, fila.minuto_fin)
+            )
+    
+    expira = ahora + settings.PLANTILLAS_CACHE_SEGUNDOS
+    with _cache_lock:
+        for usuario_id in faltantes:
+            plantilla = compilar_plantilla(obtener_zona(zonas.get(usuario_id)), bloques[usuario_id])
+            if _versiones.get(usuario_id, 0) == versiones[usuario_id]:
+                _cache[usuario_id] = (expira, plantilla)
+            plantillas[usuario_id] = plantilla
+    
+    return plantillas
+
+
+def obtener_plantilla(db: Session, usuario_id: int) -> PlantillaSemanal:
+    """Plantilla compilada de un profesional"""
+    return obtener_plantillas(db, [usuario_id])[usuario_id]
+
+
+def invalidar_plantilla(usuario_id: int) -> None:
+    """Descarta la plantilla de un profesional tras cambiar su disponibilidad o zona"""
+    with _cache_lock:
+        _cache.pop(usuario_id, None)
+        _versiones[usuario_id] = _versiones.get(usuario_id, 0) + 1
+
+
+def excepciones_por_dia(
+    db: Session,
+    profesional_ids: List[int],
+    desde: date,
+    hasta: date
+) -> Dict[int, Dict[date, ExcepcionesDia]]:
+    """
+    Excepciones de cada profesional por fecha local entre desde y hasta
+    (inclusive), con una sola consulta. Los festivos se incluyen para todos
+    cuando APLICAR_FESTIVOS está activo. Una excepción sin minutos cubre el
+    día completo.
+    """
+    por_dia = {profesional_id: defaultdict(list) for profesional_id in profesional_ids}
+    
+    for excepcion in ExcepcionRepository.obtener_en_rango(
+        db, profesional_ids, desde, hasta, incluir_festivos=settings.APLICAR_FESTIVOS
+    ):
+        duenos = [excepcion.profesional_id] if excepcion.profesional_id else profesional_ids
+        if excepcion.minuto_inicio is None:
+            bloque = (excepcion.tipo, 0, MINUTOS_DIA)
+        else:
+            bloque = (excepcion.tipo, excepcion.minuto_inicio, excepcion.minuto_fin)
+        
+        dia = max(excepcion.fecha_desde, desde)
+        ultimo = min(excepcion.fecha_hasta, hasta)
+        while dia <= ultimo:
+            for profesional_id in duenos:
+                por_dia[profesional_id][dia].append(bloque)
+            dia += timedelta(days=1)
+    
+    return por_dia
+
+
+def verificar_horario_atencion(
+    db: Session,
+    profesional_id: int,
+    fecha_hora: datetime,
+    duracion_minutos: int
+) -> None:
+    """
+    Rechaza con 400 una cita fuera del horario de atención del profesional:
+    la plantilla sale de memoria y las excepciones de los días que toca la
+    cita se leen con una consulta sobre el índice de rangos.
+    """
+    plantilla = obtener_plantilla(db, profesional_id)
+    
+    if fecha_hora.tzinfo is None:
+        fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+    inicio_local = fecha_hora.astimezone(plantilla.zona)
+    fin_local = inicio_local + timedelta(minutes=(duracion_minutos or 60) - 1)
+    excepciones = excepciones_por_dia(
+        db, [profesional_id], inicio_local.date(), fin_local.date()
+    )[profesional_id]
+    
+    if not plantilla.dentro_de_horario(fecha_hora, duracion_minutos, excepciones):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El horario está fuera del horario de atención del profesional"
+        )
@@ -9,71 +9,61 @@ Este servicio encapsula toda la lógica de negocio relacionada con:
 - Configuración de privacidad y notificaciones
 """
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from typing import List, Dict, Optional, Any
 from fastapi import HTTPException, status
 
+from config import settings
 from models import (
-    Cita, EstadoCita, User, Pago, EstadoPago, 
+    Cita, EstadoCita, User,
     PerfilProfesional, Disponibilidad, DiaSemana,
-    TipoUsuario, Favorito
+    TipoUsuario, Favorito, ExcepcionDisponibilidad, TipoExcepcion
+)
+from repositories import CitaRepository, DisponibilidadRepository, ExcepcionRepository, ResumenRepository
+from repositories.cita_repository import TRANSICIONES_PERMITIDAS
+from services import calendario_service, estadisticas_service, lista_espera_service, plantilla_service
+from utils.notificaciones import notificar_cambios_estado
+from utils.horarios import (
+    MINUTOS_DIA, obtener_zona, zona_valida, inicio_del_dia, hora_a_minutos, minutos_a_hora,
+    mascara_ocupada, calcular_inicios_libres, agrupar_citas_por_dia,
+    rangos_encendidos, codificar_inicios
 )
 
-def obtener_estadisticas_profesional(db: Session, profesional_id: int) -> Dict:
+def obtener_estadisticas_profesional(
+    db: Session,
+    profesional_id: int,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None
+) -> Dict:
     """
-    Obtiene las estadísticas del profesional
+    Obtiene las estadísticas del profesional con una sola consulta sobre los
+    resúmenes diarios (ver estadisticas_service). Con fecha_desde o
+    fecha_hasta (días locales, hasta exclusivo) agrega las métricas de ese
+    periodo en "periodo".
     """
-    # Citas totales
-    total_citas = db.query(Cita).filter(
-        Cita.profesional_id == profesional_id
-    ).count()
-    
-    # Citas completadas
-    citas_completadas = db.query(Cita).filter(
-        Cita.profesional_id == profesional_id,
-        Cita.estado == EstadoCita.COMPLETADA
-    ).count()
-    
-    # Citas pendientes
-    citas_pendientes = db.query(Cita).filter(
-        Cita.profesional_id == profesional_id,
-        Cita.estado == EstadoCita.PENDIENTE
-    ).count()
-    
-    # Citas confirmadas
-    citas_confirmadas = db.query(Cita).filter(
-        Cita.profesional_id == profesional_id,
-        Cita.estado == EstadoCita.CONFIRMADA
-    ).count()
-    
-    # Ingresos totales (citas completadas con pagos completados)
-    ingresos = db.query(func.sum(Pago.monto)).join(
-        Cita, Pago.cita_id == Cita.id
-    ).filter(
-        Cita.profesional_id == profesional_id,
-        Pago.estado == EstadoPago.COMPLETADO
-    ).scalar() or 0
-    
-    # Ingresos del mes actual
-    inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    ingresos_mes = db.query(func.sum(Pago.monto)).join(
-        Cita, Pago.cita_id == Cita.id
-    ).filter(
-        Cita.profesional_id == profesional_id,
-        Pago.estado == EstadoPago.COMPLETADO,
-        Pago.created_at >= inicio_mes
-    ).scalar() or 0
-    
-    return {
-        "total_citas": total_citas,
-        "citas_completadas": citas_completadas,
-        "citas_pendientes": citas_pendientes,
-        "citas_confirmadas": citas_confirmadas,
-        "ingresos_totales": float(ingresos),
-        "ingresos_mes_actual": float(ingresos_mes)
+    inicio_mes = datetime.now(plantilla_service.obtener_plantilla(db, profesional_id).zona).date().replace(day=1)
+    ventanas = {"total": estadisticas_service.TODO_EL_TIEMPO, "mes": (inicio_mes, None)}
+    if fecha_desde or fecha_hasta:
+        ventanas["periodo"] = (fecha_desde, fecha_hasta)
+    
+    metricas = estadisticas_service.calcular_estadisticas(db, profesional_id, ventanas)
+    total = metricas["total"]
+    
+    estadisticas = {
+        "total_citas": total["total_citas"],
+        "citas_completadas": total["citas_completadas"],
+        "citas_pendientes": total["citas_pendientes"],
+        "citas_confirmadas": total["citas_confirmadas"],
+        "ingresos_totales": total["ingresos"],
+        "ingresos_mes_actual": metricas["mes"]["ingresos"]
     }
+    if "periodo" in metricas:
+        estadisticas["periodo"] = metricas["periodo"]
+    return estadisticas
 
 
 def obtener_citas_profesional(
@@ -104,7 +94,7 @@ def obtener_proximas_citas(db: Session, profesional_id: int, limit: int = 5) ->
     """
     Obtiene las próximas citas del profesional
     """
-    ahora = datetime.now()
+    ahora = datetime.now(timezone.utc)
     
     return db.query(Cita).filter(
         Cita.profesional_id == profesional_id,
@@ -118,16 +108,67 @@ def obtener_proximas_citas(db: Session, profesional_id: int, limit: int = 5) ->
 
 def obtener_citas_del_dia(db: Session, profesional_id: int, fecha: datetime) -> List[Cita]:
     """
-    Obtiene todas las citas de un día específico
+    Obtiene todas las citas de un día específico en la zona horaria del
+    profesional (ver CitaRepository.obtener_del_dia)
+    """
+    return CitaRepository.obtener_del_dia(db, profesional_id, fecha)
+
+
+def obtener_zonas_profesionales(db: Session, profesional_ids: List[int]) -> Dict[int, ZoneInfo]:
+    """
+    Zona horaria de cada profesional, guardada junto con su plantilla
+    compilada. Los que no tienen perfil o no la han configurado usan
+    settings.ZONA_HORARIA.
+    """
+    plantillas = plantilla_service.obtener_plantillas(db, profesional_ids)
+    return {profesional_id: plantillas[profesional_id].zona for profesional_id in profesional_ids}
+
+
+def obtener_zona_profesional(db: Session, profesional_id: int) -> ZoneInfo:
+    """Zona horaria de un profesional (por defecto settings.ZONA_HORARIA)"""
+    return obtener_zonas_profesionales(db, [profesional_id])[profesional_id]
+
+
+def actualizar_zona_horaria(db: Session, profesional_id: int, zona_horaria: str) -> Dict[str, Any]:
+    """
+    Cambia la zona horaria del profesional. Sus citas se vuelven a asignar
+    al día local que les corresponde con un solo UPDATE (el trigger de
+    fecha_local recalcula cada fila) y se reconstruye su calendario.
     """
-    inicio_dia = fecha.replace(hour=0, minute=0, second=0, microsecond=0)
-    fin_dia = inicio_dia + timedelta(days=1)
+    if not zona_valida(zona_horaria):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Zona horaria inválida. Use un nombre IANA, por ejemplo America/Bogota"
+        )
     
-    return db.query(Cita).filter(
-        Cita.profesional_id == profesional_id,
-        Cita.fecha_hora >= inicio_dia,
-        Cita.fecha_hora < fin_dia
-    ).order_by(Cita.fecha_hora.asc()).all()
+    perfil = db.query(PerfilProfesional).filter(
+        PerfilProfesional.usuario_id == profesional_id
+    ).first()
+    if not perfil:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil profesional no encontrado"
+        )
+    
+    perfil.zona_horaria = zona_horaria
+    db.flush()
+    
+    # Reasignar fecha_hora a sí misma dispara el trigger en cada cita
+    citas_actualizadas = db.query(Cita).filter(
+        Cita.profesional_id == profesional_id
+    ).update({Cita.fecha_hora: Cita.fecha_hora}, synchronize_session=False)
+    db.commit()
+    
+    plantilla_service.invalidar_plantilla(profesional_id)
+    calendario_service.reconstruir_profesional(db, profesional_id)
+    # Las citas ya cambiaron de día con el trigger; los pagos se reubican aquí
+    ResumenRepository.reconstruir(db, [profesional_id])
+    
+    return {
+        "message": "Zona horaria actualizada",
+        "zona_horaria": zona_horaria,
+        "citas_actualizadas": citas_actualizadas
+    }
 
 
 def actualizar_estado_cita(
@@ -154,76 +195,363 @@ def actualizar_estado_cita(
     return cita
 
 
+def actualizar_estado_citas_masivo(
+    db: Session,
+    profesional: User,
+    cita_ids: List[int],
+    nuevo_estado: EstadoCita
+) -> Dict[str, Any]:
+    """
+    Cambia el estado de varias citas del profesional a la vez.
+    
+    Una consulta valida pertenencia y transiciones, un UPDATE ... RETURNING
+    aplica los cambios y las notificaciones a los clientes se guardan en un
+    solo lote. Las citas ajenas, inexistentes o con una transición no
+    permitida se reportan en `rechazadas` con el motivo.
+    """
+    cita_ids = list(dict.fromkeys(cita_ids))
+    estados = CitaRepository.obtener_estados(db, profesional.id, cita_ids)
+    
+    rechazadas = []
+    validas = []
+    for cita_id in cita_ids:
+        estado = estados.get(cita_id)
+        if estado is None:
+            rechazadas.append({"id": cita_id, "motivo": "Cita no encontrada o no pertenece a este profesional"})
+        elif nuevo_estado not in TRANSICIONES_PERMITIDAS[estado]:
+            rechazadas.append({"id": cita_id, "motivo": f"No se puede pasar de {estado.value} a {nuevo_estado.value}"})
+        else:
+            validas.append(cita_id)
+    
+    actualizadas = CitaRepository.actualizar_estado_masivo(db, profesional.id, validas, nuevo_estado)
+    
+    # Las que cambiaron de estado entre la validación y el UPDATE
+    ids_actualizadas = {cita.id for cita in actualizadas}
+    rechazadas.extend(
+        {"id": cita_id, "motivo": "La cita cambió de estado durante la operación"}
+        for cita_id in validas if cita_id not in ids_actualizadas
+    )
+    
+    if actualizadas:
+        calendario_service.registrar_cambio_cita(
+            db, profesional.id, *[cita.fecha_hora for cita in actualizadas]
+        )
+        notificar_cambios_estado(db, actualizadas, profesional, nuevo_estado)
+        
+        if nuevo_estado == EstadoCita.CANCELADA:
+            for cita in actualizadas:
+                lista_espera_service.ofrecer_horario_liberado(
+                    db, profesional.id, cita.fecha_hora, cita.duracion_minutos,
+                    excluir_cliente_id=cita.cliente_id
+                )
+    
+    return {
+        "nuevo_estado": nuevo_estado.value,
+        "actualizadas": sorted(ids_actualizadas),
+        "rechazadas": rechazadas,
+        "total_actualizadas": len(actualizadas)
+    }
+
+
+def obtener_plantillas_semanales(db: Session, profesional_ids: List[int]) -> Dict[int, List[int]]:
+    """
+    Plantilla semanal de cada profesional como 7 mapas de bits (índice 0 =
+    lunes). Sale de las plantillas compiladas en memoria; las que faltan se
+    cargan con una sola consulta (ver services/plantilla_service.py).
+    
+    Si un profesional no ha configurado ningún bloque se usa el horario por
+    defecto (HORA_INICIO_POR_DEFECTO - HORA_FIN_POR_DEFECTO) todos los días.
+    """
+    plantillas = plantilla_service.obtener_plantillas(db, profesional_ids)
+    return {
+        profesional_id: list(plantillas[profesional_id].mascaras)
+        for profesional_id in profesional_ids
+    }
+
+
+def minuto_minimo_reservable(dia, zona) -> int:
+    """
+    Primer minuto del día en el que aún se puede empezar una cita:
+    0 para días futuros, el minuto siguiente a la hora actual para hoy
+    y MINUTOS_DIA (ninguno) para días pasados
+    """
+    ahora = datetime.now(zona)
+    if dia > ahora.date():
+        return 0
+    if dia < ahora.date():
+        return MINUTOS_DIA
+    return ahora.hour * 60 + ahora.minute + 1
+
+
 def obtener_horarios_disponibles(
     db: Session,
     profesional_id: int,
     fecha: datetime,
-    duracion_minutos: int = 60
+    duracion_minutos: int = 60,
+    granularidad_minutos: int = 30
 ) -> List[str]:
     """
     Calcula los horarios disponibles para un día específico
     Retorna lista de horas disponibles en formato "HH:MM"
-    """
-    # Obtener citas del día
-    citas = obtener_citas_del_dia(db, profesional_id, fecha)
     
-    # Horario de trabajo típico: 8:00 - 18:00
-    hora_inicio = 8
-    hora_fin = 18
+    La plantilla del día y las citas activas se convierten en mapas de bits
+    de un minuto de resolución; los inicios libres salen de una sola pasada
+    sobre esos mapas (ver utils/horarios.py)
+    """
+    zona = obtener_zona_profesional(db, profesional_id)
+    dia = fecha.date()
+    
+    # Con el calendario materializado activo es una lectura por clave primaria
+    libres = calendario_service.obtener_minutos_libres(db, profesional_id, dia, zona)
+    if libres is None:
+        inicio = inicio_del_dia(dia, zona)
+        fin = inicio_del_dia(dia + timedelta(days=1), zona)
+        plantilla = plantilla_service.obtener_plantilla(db, profesional_id)
+        excepciones = plantilla_service.excepciones_por_dia(db, [profesional_id], dia, dia)[profesional_id]
+        citas = CitaRepository.obtener_intervalos_activos(db, [profesional_id], inicio, fin)
+        libres = plantilla.mascara(dia, excepciones.get(dia, ())) & ~mascara_ocupada(
+            dia, zona, [(fecha_hora, duracion) for _, fecha_hora, duracion in citas]
+        )
     
-    # Generar todos los slots posibles
-    slots_disponibles = []
-    hora_actual = hora_inicio
-    minuto_actual = 0
+    inicios = calcular_inicios_libres(
+        libres,
+        0,
+        duracion_minutos,
+        granularidad_minutos,
+        minuto_minimo_reservable(dia, zona)
+    )
+    return [minutos_a_hora(minuto) for minuto in inicios]
+
+
+def obtener_agenda_rango(
+    db: Session,
+    profesional_id: int,
+    fecha_desde: datetime,
+    fecha_hasta: datetime,
+    duracion_minutos: int = 60,
+    granularidad_minutos: int = 30,
+    compacto: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Horarios libres e intervalos ocupados de cada día entre fecha_desde y
+    fecha_hasta (inclusive), para las vistas de calendario mensual.
+    
+    Usa una sola consulta de plantillas, una de excepciones y una de citas
+    para todo el rango. Con el calendario materializado activo, los minutos
+    libres de los días de su horizonte salen de una sola lectura de ese
+    calendario, y la plantilla y las excepciones solo se consultan si queda
+    algún día fuera de él. Con `compacto` cada día se devuelve como máscara hexadecimal de
+    slots libres (bit k = minuto k * granularidad) y los ocupados como pares
+    [inicio, fin] en minutos, en lugar de listas de "HH:MM".
+    """
+    zona = obtener_zona_profesional(db, profesional_id)
+    dia_inicio = fecha_desde.date()
+    dia_fin = fecha_hasta.date()
     
-    while hora_actual < hora_fin:
-        slot_datetime = fecha.replace(hour=hora_actual, minute=minuto_actual, second=0, microsecond=0)
-        slot_fin = slot_datetime + timedelta(minutes=duracion_minutos)
+    materializados = calendario_service.obtener_rango_minutos_libres(
+        db, profesional_id, dia_inicio, dia_fin, zona
+    )
+    if len(materializados) < (dia_fin - dia_inicio).days + 1:
+        plantilla = plantilla_service.obtener_plantilla(db, profesional_id)
+        excepciones = plantilla_service.excepciones_por_dia(
+            db, [profesional_id], dia_inicio, dia_fin
+        )[profesional_id]
+    
+    # Los intervalos ocupados siempre salen de las citas
+    citas = CitaRepository.obtener_intervalos_activos(
+        db,
+        [profesional_id],
+        inicio_del_dia(dia_inicio, zona),
+        inicio_del_dia(dia_fin + timedelta(days=1), zona)
+    )
+    citas_por_dia = agrupar_citas_por_dia(citas, zona)
+    
+    dias = {}
+    dia = dia_inicio
+    while dia <= dia_fin:
+        ocupada = mascara_ocupada(dia, zona, citas_por_dia.get((profesional_id, dia), []))
+        disponibles = materializados.get(dia)
+        if disponibles is None:
+            disponibles = plantilla.mascara(dia, excepciones.get(dia, ()))
+        inicios = calcular_inicios_libres(
+            disponibles,
+            ocupada,
+            duracion_minutos,
+            granularidad_minutos,
+            minuto_minimo_reservable(dia, zona)
+        )
+        ocupados = rangos_encendidos(ocupada)
         
-        # Verificar si hay conflicto con alguna cita existente
-        conflicto = False
-        for cita in citas:
-            cita_fin = cita.fecha_hora + timedelta(minutes=cita.duracion_minutos)
-            
-            # Hay conflicto si los rangos se solapan
-            if (slot_datetime < cita_fin and slot_fin > cita.fecha_hora):
-                conflicto = True
+        if compacto:
+            dias[dia.isoformat()] = {
+                "libres": codificar_inicios(inicios, granularidad_minutos),
+                "ocupados": [[inicio, fin] for inicio, fin in ocupados]
+            }
+        else:
+            dias[dia.isoformat()] = {
+                "horarios_disponibles": [minutos_a_hora(minuto) for minuto in inicios],
+                "ocupados": [
+                    {"inicio": minutos_a_hora(inicio), "fin": minutos_a_hora(fin)}
+                    for inicio, fin in ocupados
+                ]
+            }
+        dia += timedelta(days=1)
+    
+    return dias
+
+
+def buscar_primeros_horarios(
+    db: Session,
+    fecha_desde: datetime,
+    fecha_hasta: datetime,
+    duracion_minutos: int = 60,
+    especialidad: Optional[str] = None,
+    ciudad: Optional[str] = None,
+    limite: int = 10,
+    granularidad_minutos: int = 30
+) -> List[Dict[str, Any]]:
+    """
+    Busca el primer horario libre de cada profesional que coincida con la
+    especialidad y la ciudad, entre fecha_desde y fecha_hasta (inclusive),
+    y retorna los `limite` más próximos ordenados por fecha.
+    
+    Todo se resuelve en cuatro consultas sin importar cuántos profesionales o
+    días haya: profesionales, plantillas de disponibilidad, excepciones por
+    fecha y citas de la ventana.
+    """
+    query = db.query(User, PerfilProfesional).join(
+        PerfilProfesional,
+        User.id == PerfilProfesional.usuario_id
+    ).filter(
+        User.tipo_usuario == TipoUsuario.PROFESIONAL,
+        User.is_active == True
+    )
+    
+    if especialidad:
+        query = query.filter(PerfilProfesional.especialidad.ilike(f"%{especialidad}%"))
+    
+    if ciudad:
+        query = query.filter(PerfilProfesional.ciudad.ilike(f"%{ciudad}%"))
+    
+    profesionales = {user.id: (user, perfil) for user, perfil in query.all()}
+    if not profesionales:
+        return []
+    
+    ids = list(profesionales.keys())
+    # Los días se recorren en la zona horaria de cada profesional
+    zonas = {user_id: obtener_zona(perfil.zona_horaria) for user_id, (_, perfil) in profesionales.items()}
+    zonas_distintas = set(zonas.values())
+    dia_inicio = fecha_desde.date()
+    dia_fin = fecha_hasta.date()
+    
+    plantillas = plantilla_service.obtener_plantillas(db, ids)
+    excepciones = plantilla_service.excepciones_por_dia(db, ids, dia_inicio, dia_fin)
+    citas = CitaRepository.obtener_intervalos_activos(
+        db,
+        ids,
+        min(inicio_del_dia(dia_inicio, zona) for zona in zonas_distintas),
+        max(inicio_del_dia(dia_fin + timedelta(days=1), zona) for zona in zonas_distintas)
+    )
+    citas_por_dia = agrupar_citas_por_dia(citas, obtener_zona(), zonas)
+    
+    # Recorrer los días en orden: el primer día en que un profesional tiene
+    # hueco es su primer horario. Cuando ya hay `limite` resultados y el día
+    # siguiente empieza (en cualquier zona) después del último de ellos, los
+    # días restantes solo pueden dar horarios posteriores y se dejan de revisar.
+    encontrados = []
+    pendientes = set(ids)
+    dia = dia_inicio
+    while dia <= dia_fin and pendientes:
+        if len(encontrados) >= limite:
+            corte = sorted(encontrados)[limite - 1][0]
+            if min(inicio_del_dia(dia, zona) for zona in zonas_distintas) >= corte:
                 break
         
-        if not conflicto:
-            slots_disponibles.append(f"{hora_actual:02d}:{minuto_actual:02d}")
-        
-        # Avanzar al siguiente slot (cada 30 minutos)
-        minuto_actual += 30
-        if minuto_actual >= 60:
-            minuto_actual = 0
-            hora_actual += 1
-    
-    return slots_disponibles
+        desde_minuto = {zona: minuto_minimo_reservable(dia, zona) for zona in zonas_distintas}
+        for profesional_id in list(pendientes):
+            zona = zonas[profesional_id]
+            inicios = calcular_inicios_libres(
+                plantillas[profesional_id].mascara(dia, excepciones[profesional_id].get(dia, ())),
+                mascara_ocupada(dia, zona, citas_por_dia.get((profesional_id, dia), [])),
+                duracion_minutos,
+                granularidad_minutos,
+                desde_minuto[zona]
+            )
+            if inicios:
+                fecha_hora = inicio_del_dia(dia, zona) + timedelta(minutes=inicios[0])
+                encontrados.append((fecha_hora, profesional_id))
+                pendientes.discard(profesional_id)
+        dia += timedelta(days=1)
+    
+    encontrados.sort()
+    
+    resultados = []
+    for fecha_hora, profesional_id in encontrados[:limite]:
+        user, perfil = profesionales[profesional_id]
+        resultados.append({
+            "fecha_hora": fecha_hora.isoformat(),
+            "fecha": fecha_hora.date().isoformat(),
+            "hora": fecha_hora.strftime("%H:%M"),
+            "duracion_minutos": duracion_minutos,
+            "profesional": {
+                "id": user.id,
+                "nombre_completo": f"{user.nombre} {user.apellido}",
+                "especialidad": perfil.especialidad,
+                "ciudad": perfil.ciudad,
+                "precio_consulta": perfil.precio_consulta,
+                "foto_url": perfil.foto_url,
+                "calificacion_promedio": perfil.calificacion_promedio
+            }
+        })
+    
+    return resultados
 
 
 def obtener_disponibilidad_profesional(db: Session, profesional_id: int) -> List[Dict]:
     """
     Obtiene todos los bloques de disponibilidad del profesional
     """
-    # Primero obtener el perfil profesional
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == profesional_id
-    ).first()
-    
-    if not perfil:
-        return []
-    
-    disponibilidad = db.query(Disponibilidad).filter(
-        Disponibilidad.profesional_id == perfil.id
-    ).all()
-    
     return [{
         "id": d.id,
         "dia_semana": d.dia_semana.value,
         "hora_inicio": d.hora_inicio,
         "hora_fin": d.hora_fin
-    } for d in disponibilidad]
+    } for d in DisponibilidadRepository.obtener_por_usuario(db, profesional_id)]
+
+
+def _hora_en_minutos(hora: str) -> int:
+    """Convierte "HH:MM" a minutos desde la medianoche (400 si no es una hora válida)"""
+    try:
+        minutos = hora_a_minutos(hora)
+    except (ValueError, IndexError):
+        minutos = -1
+    
+    if not 0 <= minutos <= MINUTOS_DIA:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato de hora inválido. Use HH:MM"
+        )
+    return minutos
+
+
+def _bloque_en_minutos(hora_inicio: str, hora_fin: str) -> tuple:
+    """Convierte "HH:MM" a minutos y valida que el bloque quepa en el día"""
+    inicio = _hora_en_minutos(hora_inicio)
+    fin = _hora_en_minutos(hora_fin)
+    
+    if inicio >= fin:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La hora de inicio debe ser anterior a la hora de fin"
+        )
+    
+    return inicio, fin
+
+
+def _disponibilidad_cambiada(db: Session, profesional_id: int) -> None:
+    """Invalida la plantilla compilada y reconstruye el calendario del profesional"""
+    plantilla_service.invalidar_plantilla(profesional_id)
+    calendario_service.reconstruir_profesional(db, profesional_id)
 
 
 def crear_disponibilidad(
@@ -236,24 +564,15 @@ def crear_disponibilidad(
     """
     Crea un nuevo bloque de disponibilidad
     """
-    # Obtener perfil profesional
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == profesional_id
-    ).first()
-    
-    if not perfil:
-        raise ValueError("Perfil profesional no encontrado")
+    inicio, fin = _bloque_en_minutos(hora_inicio, hora_fin)
     
-    disponibilidad = Disponibilidad(
-        profesional_id=perfil.id,
-        dia_semana=dia_semana,
-        hora_inicio=hora_inicio,
-        hora_fin=hora_fin
+    disponibilidad = DisponibilidadRepository.crear_para_usuario(
+        db, profesional_id, dia_semana, inicio, fin
     )
+    if not disponibilidad:
+        raise ValueError("Perfil profesional no encontrado")
     
-    db.add(disponibilidad)
-    db.commit()
-    db.refresh(disponibilidad)
+    _disponibilidad_cambiada(db, profesional_id)
     
     return disponibilidad
 
@@ -268,29 +587,31 @@ def actualizar_disponibilidad(
     """
     Actualiza un bloque de disponibilidad existente
     """
-    # Obtener perfil profesional
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == profesional_id
-    ).first()
+    campos = {}
+    if hora_inicio:
+        campos["minuto_inicio"] = _hora_en_minutos(hora_inicio)
+    if hora_fin:
+        campos["minuto_fin"] = _hora_en_minutos(hora_fin)
     
-    if not perfil:
-        return None
+    if not campos:
+        return DisponibilidadRepository.obtener_de_usuario(db, profesional_id, disponibilidad_id)
     
-    disponibilidad = db.query(Disponibilidad).filter(
-        Disponibilidad.id == disponibilidad_id,
-        Disponibilidad.profesional_id == perfil.id
-    ).first()
+    # La restricción ck_disponibilidad_minutos rechaza un inicio posterior al fin
+    try:
+        disponibilidad = DisponibilidadRepository.actualizar_de_usuario(
+            db, profesional_id, disponibilidad_id, **campos
+        )
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La hora de inicio debe ser anterior a la hora de fin"
+        )
     
     if not disponibilidad:
         return None
     
-    if hora_inicio:
-        disponibilidad.hora_inicio = hora_inicio
-    if hora_fin:
-        disponibilidad.hora_fin = hora_fin
-    
-    db.commit()
-    db.refresh(disponibilidad)
+    _disponibilidad_cambiada(db, profesional_id)
     
     return disponibilidad
 
@@ -303,24 +624,82 @@ def eliminar_disponibilidad(
     """
     Elimina un bloque de disponibilidad
     """
-    # Obtener perfil profesional
-    perfil = db.query(PerfilProfesional).filter(
-        PerfilProfesional.usuario_id == profesional_id
-    ).first()
-    
-    if not perfil:
+    if not DisponibilidadRepository.eliminar_de_usuario(db, profesional_id, disponibilidad_id):
         return False
     
-    disponibilidad = db.query(Disponibilidad).filter(
-        Disponibilidad.id == disponibilidad_id,
-        Disponibilidad.profesional_id == perfil.id
-    ).first()
+    _disponibilidad_cambiada(db, profesional_id)
     
-    if not disponibilidad:
+    return True
+
+
+def _excepcion_a_dict(excepcion: ExcepcionDisponibilidad) -> Dict[str, Any]:
+    return {
+        "id": excepcion.id,
+        "tipo": excepcion.tipo.value,
+        "fecha_desde": excepcion.fecha_desde.isoformat(),
+        "fecha_hasta": excepcion.fecha_hasta.isoformat(),
+        "hora_inicio": minutos_a_hora(excepcion.minuto_inicio) if excepcion.minuto_inicio is not None else None,
+        "hora_fin": minutos_a_hora(excepcion.minuto_fin) if excepcion.minuto_fin is not None else None,
+        "motivo": excepcion.motivo
+    }
+
+
+def obtener_excepciones_profesional(db: Session, profesional_id: int) -> List[Dict[str, Any]]:
+    """
+    Excepciones vigentes del profesional (las que terminan hoy o después).
+    Con APLICAR_FESTIVOS también se listan los festivos de ese periodo
+    """
+    hoy = datetime.now(obtener_zona_profesional(db, profesional_id)).date()
+    excepciones = ExcepcionRepository.obtener_por_profesional(
+        db, profesional_id, hoy, incluir_festivos=settings.APLICAR_FESTIVOS
+    )
+    return [_excepcion_a_dict(excepcion) for excepcion in excepciones]
+
+
+def registrar_excepcion(
+    db: Session,
+    profesional_id: int,
+    tipo: str,
+    fecha_desde: date,
+    fecha_hasta: date,
+    hora_inicio: Optional[str] = None,
+    hora_fin: Optional[str] = None,
+    motivo: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Registra un bloqueo o un turno extra por fechas. Solo se recalculan los
+    días del calendario materializado que cubre la excepción
+    """
+    minuto_inicio = minuto_fin = None
+    if hora_inicio is not None:
+        minuto_inicio, minuto_fin = _bloque_en_minutos(hora_inicio, hora_fin)
+    
+    excepcion = ExcepcionRepository.crear(db, {
+        "profesional_id": profesional_id,
+        "tipo": TipoExcepcion(tipo),
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "minuto_inicio": minuto_inicio,
+        "minuto_fin": minuto_fin,
+        "motivo": motivo
+    })
+    
+    calendario_service.registrar_cambio_fechas(db, profesional_id, fecha_desde, fecha_hasta)
+    
+    return _excepcion_a_dict(excepcion)
+
+
+def eliminar_excepcion(db: Session, profesional_id: int, excepcion_id: int) -> bool:
+    """
+    Elimina una excepción del profesional
+    """
+    excepcion = ExcepcionRepository.obtener_de_profesional(db, profesional_id, excepcion_id)
+    if not excepcion:
         return False
     
-    db.delete(disponibilidad)
-    db.commit()
+    fecha_desde, fecha_hasta = excepcion.fecha_desde, excepcion.fecha_hasta
+    ExcepcionRepository.eliminar(db, excepcion)
+    calendario_service.registrar_cambio_fechas(db, profesional_id, fecha_desde, fecha_hasta)
     
     return True
 
@@ -557,45 +936,68 @@ def actualizar_horarios_disponibilidad(
     db: Session,
     profesional_id: int,
     horarios: Dict[str, Dict[str, Any]]
-) -> Dict[str, str]:
-    """
-    Actualiza los horarios de disponibilidad de forma completa
+) -> Dict[str, Any]:
     """
-    dias_validos = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+    Reemplaza la semana completa de disponibilidad del profesional.
     
-    # Eliminar disponibilidades antiguas
-    db.query(Disponibilidad).filter(
-        Disponibilidad.profesional_id == profesional_id
-    ).delete()
-    
-    # Crear nuevas disponibilidades
+    `horarios` tiene la forma {dia: {"activo", "hora_inicio", "hora_fin"}} o,
+    para varios bloques en un día, {dia: {"activo", "bloques": [{"hora_inicio",
+    "hora_fin"}, ...]}}. Los días ausentes o inactivos quedan sin bloques.
+    Solo se escriben las diferencias con la semana guardada (ver
+    DisponibilidadRepository.reemplazar_semana).
+    """
+    semana = {}
     for dia, config in horarios.items():
-        dia_normalizado = dia.lower()
-        
-        if dia_normalizado not in dias_validos:
-            continue
+        try:
+            dia_semana = DiaSemana(dia.lower())
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Día de semana inválido: {dia}"
+            )
         
         if not config.get('activo', False):
             continue
         
+        bloques = config.get('bloques') or [config]
         try:
-            hora_inicio = datetime.strptime(config['hora_inicio'], '%H:%M').time()
-            hora_fin = datetime.strptime(config['hora_fin'], '%H:%M').time()
-        except (ValueError, KeyError):
-            continue
-        
-        nueva_disponibilidad = Disponibilidad(
-            profesional_id=profesional_id,
-            dia_semana=dia_normalizado,
-            hora_inicio=hora_inicio,
-            hora_fin=hora_fin,
-            disponible=True
+            semana[dia_semana] = [
+                _bloque_en_minutos(bloque['hora_inicio'], bloque['hora_fin'])
+                for bloque in bloques
+            ]
+        except KeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Faltan hora_inicio u hora_fin para {dia}"
+            )
+    
+    resultado = DisponibilidadRepository.reemplazar_semana(db, profesional_id, semana)
+    if resultado is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil profesional no encontrado"
         )
-        db.add(nueva_disponibilidad)
     
-    db.commit()
+    if resultado["insertados"] or resultado["actualizados"] or resultado["eliminados"]:
+        _disponibilidad_cambiada(db, profesional_id)
     
-    return {"message": "Horarios actualizados correctamente"}
+    return {
+        "message": "Horarios actualizados correctamente",
+        "disponibilidad": [
+            {
+                "id": bloque["id"],
+                "dia_semana": bloque["dia_semana"].value,
+                "hora_inicio": minutos_a_hora(bloque["minuto_inicio"]),
+                "hora_fin": minutos_a_hora(bloque["minuto_fin"])
+            }
+            for bloque in resultado["bloques"]
+        ],
+        "cambios": {
+            "insertados": resultado["insertados"],
+            "actualizados": resultado["actualizados"],
+            "eliminados": resultado["eliminados"]
+        }
+    }
 
 
 # ==================== FUNCIONES DE FAVORITOS ====================
@@ -0,0 +1,115 @@
+"""
+Apoyo común de las pruebas que corren contra PostgreSQL local
+
+Cada prueba abre una sesión con sesion_prueba(), crea sus datos a nombre de
+un cliente temporal (cliente_temporal) en fechas lejanas (fecha_lejana) para
+no tocar la agenda real, y al salir se borra todo lo que quedó a nombre de
+ese cliente. Solo las aserciones quedan en cada prueba.
+
+Uso:
+    with sesion_prueba() as db, cliente_temporal(db, "dashboard") as cliente:
+        profesional = profesional_de_prueba(db)
+        base = fecha_lejana()
+        with contar_consultas(db) as consultas:
+            ...
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from config import settings
+from models import User, Cita, Pago, Notificacion, Favorito, TipoUsuario
+
+# Días hacia adelante de las citas de prueba: lejos de cualquier cita real
+DIAS_FECHA_LEJANA = 1500
+
+
+@contextmanager
+def sesion_prueba() -> Iterator[Session]:
+    """Sesión sobre DATABASE_URL con su propio engine, que se libera al salir"""
+    engine = create_engine(settings.DATABASE_URL)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        engine.dispose()
+
+
+def borrar_datos_cliente(db: Session, cliente_id: int):
+    """Borra el cliente con sus pagos, citas, notificaciones y favoritos"""
+    ids_citas = db.query(Cita.id).filter(Cita.cliente_id == cliente_id)
+    db.query(Pago).filter(Pago.cita_id.in_(ids_citas)).delete(synchronize_session=False)
+    db.query(Notificacion).filter(Notificacion.usuario_id == cliente_id).delete(synchronize_session=False)
+    db.query(Favorito).filter(Favorito.cliente_id == cliente_id).delete(synchronize_session=False)
+    db.query(Cita).filter(Cita.cliente_id == cliente_id).delete(synchronize_session=False)
+    db.query(User).filter(User.id == cliente_id).delete(synchronize_session=False)
+    db.commit()
+
+
+@contextmanager
+def cliente_temporal(db: Session, prefijo: str) -> Iterator[User]:
+    """
+    Cliente `{prefijo}-{uuid}@prueba.local` ya guardado. Al salir (aunque la
+    prueba falle) se borra junto con todo lo creado a su nombre.
+    """
+    cliente = User(
+        email=f"{prefijo}-{uuid.uuid4().hex[:8]}@prueba.local",
+        hashed_password="-",
+        nombre="Prueba",
+        apellido=prefijo.capitalize(),
+        tipo_usuario=TipoUsuario.CLIENTE
+    )
+    db.add(cliente)
+    db.commit()
+    cliente_id = cliente.id
+    try:
+        yield cliente
+    finally:
+        db.rollback()
+        borrar_datos_cliente(db, cliente_id)
+
+
+def profesional_de_prueba(db: Session) -> User:
+    """Primer profesional de la base (lo crean los scripts de usuarios de prueba)"""
+    profesional = db.query(User).filter(User.tipo_usuario == TipoUsuario.PROFESIONAL).first()
+    assert profesional, "Se necesitan usuarios de prueba (python -m tests.create_test_users)"
+    return profesional
+
+
+def fecha_lejana(dias: int = DIAS_FECHA_LEJANA) -> datetime:
+    """Hora en punto a `dias` de hoy (negativo para el pasado), en UTC"""
+    ahora = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return ahora + timedelta(days=dias)
+
+
+@contextmanager
+def contar_consultas(
+    db: Session,
+    filtro: Optional[Callable[[str], bool]] = None
+) -> Iterator[List[tuple]]:
+    """
+    Lista de (sentencia, parámetros) que ejecuta el engine de `db` mientras
+    dura el bloque; `filtro` decide qué sentencias se guardan
+    """
+    engine = db.get_bind()
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if filtro is None or filtro(statement):
+            consultas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
@@ -0,0 +1,99 @@
+"""
+Prueba de estrés: muchas reservas simultáneas del mismo horario
+
+Lanza cientos de reservas en paralelo contra un único slot de un profesional
+en una base PostgreSQL local y verifica que solo una se confirme. Las demás
+deben ser rechazadas por la restricción de exclusión de la tabla citas.
+
+Uso:
+    cd backend
+    python -m tests.test_concurrencia_agendar
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from models import User, Cita, TipoUsuario, EstadoCita
+from repositories import CitaRepository
+
+TOTAL_RESERVAS = 300
+HILOS = 50
+
+
+def test_concurrencia_agendar():
+    # Engine propio con un pool del tamaño de los hilos para que todas las
+    # reservas lleguen realmente a la vez a la base de datos
+    engine = create_engine(settings.DATABASE_URL, pool_size=HILOS, max_overflow=0)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    try:
+        cliente = db.query(User).filter(User.tipo_usuario == TipoUsuario.CLIENTE).first()
+        profesional = db.query(User).filter(User.tipo_usuario == TipoUsuario.PROFESIONAL).first()
+        assert cliente and profesional, "Se necesitan usuarios de prueba (python -m tests.create_test_users)"
+        cliente_id, profesional_id = cliente.id, profesional.id
+    finally:
+        db.close()
+
+    # Un slot lejano en el futuro para no chocar con datos reales
+    slot = datetime.now(timezone.utc).replace(second=0, microsecond=0) + timedelta(
+        days=random.randint(400, 800)
+    )
+
+    def reservar(i: int) -> bool:
+        sesion = Session()
+        try:
+            cita = CitaRepository.crear_si_disponible(sesion, {
+                "cliente_id": cliente_id,
+                "profesional_id": profesional_id,
+                # Inicios desplazados: todas se solapan con el mismo slot
+                "fecha_hora": slot + timedelta(minutes=i % 30),
+                "duracion_minutos": 60,
+                "estado": EstadoCita.PENDIENTE,
+                "motivo": f"Prueba de concurrencia #{i}",
+                "precio": 0
+            })
+            return cita is not None
+        finally:
+            sesion.close()
+
+    print(f"🚀 Lanzando {TOTAL_RESERVAS} reservas con {HILOS} hilos para el slot {slot.isoformat()}")
+    inicio = datetime.now()
+    with ThreadPoolExecutor(max_workers=HILOS) as executor:
+        resultados = list(executor.map(reservar, range(TOTAL_RESERVAS)))
+    duracion = (datetime.now() - inicio).total_seconds()
+
+    exitosas = sum(resultados)
+    print(f"   Exitosas: {exitosas}")
+    print(f"   Rechazadas (409): {TOTAL_RESERVAS - exitosas}")
+    print(f"   Tiempo total: {duracion:.2f}s")
+
+    # Limpiar las citas de prueba
+    db = Session()
+    try:
+        db.query(Cita).filter(
+            Cita.profesional_id == profesional_id,
+            Cita.motivo.like("Prueba de concurrencia #%")
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+        engine.dispose()
+
+    assert exitosas == 1, f"Se esperaba exactamente 1 reserva exitosa, hubo {exitosas}"
+    print("✅ Solo una reserva ocupó el horario")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Reservas concurrentes del mismo horario")
+    print("=" * 60)
+    test_concurrencia_agendar()
@@ -0,0 +1,95 @@
+"""
+Prueba: número de consultas fijo en las citas del cliente
+
+GET /api/citas/mis-citas y GET /api/citas/cita/{id} deben resolver cada
+petición con el mismo número de consultas sin importar cuántas citas tenga
+el cliente (antes había dos consultas extra por cita). Crea un cliente
+temporal con citas canceladas en una base PostgreSQL local y cuenta las
+sentencias que ejecuta cada endpoint.
+
+Uso:
+    cd backend
+    python -m tests.test_consultas_mis_citas
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import timedelta
+
+from fastapi import Response
+
+from models import Cita, EstadoCita
+from routes.citas import obtener_mis_citas, obtener_cita
+from schemas import TokenData
+from tests.entorno_prueba import (
+    sesion_prueba, cliente_temporal, profesional_de_prueba, fecha_lejana, contar_consultas
+)
+
+CITAS_POR_RONDA = [1, 5, 40]
+
+
+def test_consultas_mis_citas():
+    with sesion_prueba() as db, cliente_temporal(db, "consultas") as cliente, \
+            contar_consultas(db) as consultas:
+        profesional = profesional_de_prueba(db)
+        usuario = TokenData(email=cliente.email)
+
+        # Canceladas y lejanas: no ocupan la agenda real del profesional
+        base = fecha_lejana(900)
+        creadas = 0
+        conteos = {}
+        for total in CITAS_POR_RONDA:
+            db.add_all([
+                Cita(
+                    cliente_id=cliente.id,
+                    profesional_id=profesional.id,
+                    fecha_hora=base + timedelta(hours=i),
+                    duracion_minutos=60,
+                    estado=EstadoCita.CANCELADA,
+                    motivo="Prueba de consultas",
+                    precio=0
+                )
+                for i in range(creadas, total)
+            ])
+            db.commit()
+            creadas = total
+
+            consultas.clear()
+            citas = obtener_mis_citas(
+                Response(), estado=None, fecha_desde=None, fecha_hasta=None, limite=None,
+                cursor=None, db=db, current_user=usuario
+            )
+            assert len(citas) == total
+            lista = len(consultas)
+
+            consultas.clear()
+            detalle = obtener_cita(citas[-1]["id"], db=db, current_user=usuario)
+            assert detalle["profesional"]["id"] == profesional.id
+            conteos[total] = (lista, len(consultas))
+            print(f"   {total} citas: mis-citas={lista} consultas, cita/{{id}}={len(consultas)} consultas")
+
+        # La paginación por cursor tampoco agrega consultas y no repite citas
+        respuesta = Response()
+        consultas.clear()
+        pagina = obtener_mis_citas(
+            respuesta, estado=None, fecha_desde=None, fecha_hasta=None, limite=10,
+            cursor=None, db=db, current_user=usuario
+        )
+        assert len(pagina) == 10 and "X-Siguiente-Cursor" in respuesta.headers
+        assert len(consultas) == conteos[CITAS_POR_RONDA[0]][0]
+        siguiente = obtener_mis_citas(
+            Response(), estado=None, fecha_desde=None, fecha_hasta=None, limite=10,
+            cursor=respuesta.headers["X-Siguiente-Cursor"], db=db, current_user=usuario
+        )
+        assert not {c["id"] for c in pagina} & {c["id"] for c in siguiente}
+
+    assert len(set(conteos.values())) == 1, f"El número de consultas cambia con las citas: {conteos}"
+    print("✅ El número de consultas no depende de cuántas citas tenga el cliente")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Consultas fijas en las citas del cliente")
+    print("=" * 60)
+    test_consultas_mis_citas()
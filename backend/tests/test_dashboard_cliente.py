@@ -0,0 +1,96 @@
+"""
+Prueba: dashboard del cliente en una sola consulta
+
+GET /api/clientes/dashboard debe devolver estadísticas, próximas citas,
+historial, notificaciones no leídas y favoritos con una sola sentencia, y
+sus totales deben coincidir con los que se calculan en Python sobre las
+mismas filas (pagos completados, pendiente y fallido).
+Requiere PostgreSQL local.
+
+Uso:
+    cd backend
+    python -m tests.test_dashboard_cliente
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import timedelta
+
+from models import (
+    PerfilProfesional, Cita, Pago, Notificacion, Favorito,
+    EstadoCita, EstadoPago, TipoNotificacion
+)
+from routes.clientes import obtener_dashboard_cliente
+from schemas import TokenData
+from tests.entorno_prueba import (
+    sesion_prueba, cliente_temporal, profesional_de_prueba, fecha_lejana, contar_consultas
+)
+
+
+def test_dashboard_cliente():
+    with sesion_prueba() as db, cliente_temporal(db, "dashboard") as cliente:
+        profesional = profesional_de_prueba(db)
+        perfil = db.query(PerfilProfesional).filter(PerfilProfesional.usuario_id == profesional.id).first()
+
+        # Pasadas y lejanas en el futuro, para no ocupar la agenda real
+        ahora = fecha_lejana(0)
+        citas = [
+            Cita(cliente_id=cliente.id, profesional_id=profesional.id, fecha_hora=fecha,
+                 duracion_minutos=60, estado=estado, motivo="Prueba de dashboard", precio=50000)
+            for fecha, estado in [
+                (ahora - timedelta(days=2000), EstadoCita.COMPLETADA),
+                (ahora - timedelta(days=1999), EstadoCita.COMPLETADA),
+                (ahora - timedelta(days=1998), EstadoCita.CANCELADA),
+                (ahora + timedelta(days=1700), EstadoCita.PENDIENTE),
+                (ahora + timedelta(days=1700, hours=2), EstadoCita.CANCELADA),
+            ]
+        ]
+        db.add_all(citas)
+        db.flush()
+        db.add_all([
+            Pago(cita_id=citas[0].id, monto=50000, estado=EstadoPago.COMPLETADO, metodo_pago="prueba"),
+            Pago(cita_id=citas[1].id, monto=45000, estado=EstadoPago.COMPLETADO, metodo_pago="prueba"),
+            Pago(cita_id=citas[2].id, monto=50000, estado=EstadoPago.FALLIDO, metodo_pago="prueba"),
+            Pago(cita_id=citas[3].id, monto=50000, estado=EstadoPago.PENDIENTE, metodo_pago="prueba"),
+            Notificacion(usuario_id=cliente.id, tipo=TipoNotificacion.SISTEMA, titulo="Prueba",
+                         mensaje="No leída", leida=False),
+            Notificacion(usuario_id=cliente.id, tipo=TipoNotificacion.SISTEMA, titulo="Prueba",
+                         mensaje="Leída", leida=True),
+        ])
+        if perfil:
+            db.add(Favorito(cliente_id=cliente.id, profesional_id=perfil.id))
+        db.commit()
+
+        # Fuera del conteo: tras el commit leer cliente.email recarga la fila
+        usuario = TokenData(email=cliente.email)
+        with contar_consultas(db) as consultas:
+            dashboard = obtener_dashboard_cliente(limite_citas=5, db=db, current_user=usuario)
+        print(f"   Consultas: {len(consultas)}")
+        assert len(consultas) == 1, f"Se esperaba una sola consulta: {consultas}"
+
+        assert dashboard["estadisticas"] == {
+            "total_citas": 5,
+            "citas_completadas": 2,
+            "citas_pendientes": 1,
+            "total_gastado": 95000.0,
+            "profesionales_visitados": 1,
+            "total_pagos": 4,
+            "pagos_pendientes": 1,
+            "pagos_completados": 2
+        }, dashboard["estadisticas"]
+        assert dashboard["notificaciones_no_leidas"] == 1
+        assert [c["id"] for c in dashboard["proximas_citas"]] == [citas[3].id]
+        assert [c["id"] for c in dashboard["historial_citas"]] == [citas[2].id, citas[1].id, citas[0].id]
+        assert dashboard["proximas_citas"][0]["profesional"]["id"] == profesional.id
+        assert dashboard["proximas_citas"][0]["fecha_hora"] == citas[3].fecha_hora
+        assert len(dashboard["favoritos"]) == (1 if perfil else 0)
+
+    print("✅ El dashboard del cliente sale de una sola consulta con totales correctos")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Dashboard del cliente")
+    print("=" * 60)
+    test_dashboard_cliente()
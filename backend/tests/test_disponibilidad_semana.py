@@ -0,0 +1,74 @@
+"""
+Pruebas del cálculo de diferencias al reemplazar la semana de disponibilidad
+(DisponibilidadRepository.diferencias_semana)
+
+No necesitan base de datos: a partir de los bloques actuales y la semana
+deseada comprueban qué bloques se conservan, cuáles se actualizan, cuáles se
+crean y cuáles se borran.
+
+Uso:
+    cd backend
+    python -m tests.test_disponibilidad_semana
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import DiaSemana
+from repositories.disponibilidad_repository import DisponibilidadRepository
+
+# (inicio, fin, id) de los bloques guardados
+ACTUALES = {
+    DiaSemana.LUNES: [(480, 720, 1), (840, 1080, 2)],
+    DiaSemana.MARTES: [(480, 600, 3)],
+    DiaSemana.MIERCOLES: [(480, 600, 4), (600, 720, 5)],
+}
+
+
+def test_semana_sin_cambios():
+    semana = {dia: [(inicio, fin) for inicio, fin, _ in bloques] for dia, bloques in ACTUALES.items()}
+    conservados, actualizados, insertados, eliminados = DisponibilidadRepository.diferencias_semana(ACTUALES, semana)
+    
+    assert sorted(bloque_id for bloque_id, *_ in conservados) == [1, 2, 3, 4, 5]
+    assert actualizados == [] and insertados == [] and eliminados == []
+    print("✅ Una semana igual no genera cambios")
+
+
+def test_semana_con_cambios():
+    semana = {
+        # Un bloque igual (repetido en la petición) y otro que cambia de horario
+        DiaSemana.LUNES: [(480, 720), (480, 720), (840, 1020)],
+        # Martes queda sin bloques; miércoles pierde uno
+        DiaSemana.MIERCOLES: [(480, 600)],
+        # Jueves no tenía bloques
+        DiaSemana.JUEVES: [(480, 540), (600, 660)],
+    }
+    conservados, actualizados, insertados, eliminados = DisponibilidadRepository.diferencias_semana(ACTUALES, semana)
+    
+    assert sorted(conservados) == [(1, DiaSemana.LUNES, 480, 720), (4, DiaSemana.MIERCOLES, 480, 600)]
+    # El bloque modificado conserva su id: se actualiza en lugar de borrarse y crearse
+    assert actualizados == [(2, DiaSemana.LUNES, 840, 1020)]
+    assert insertados == [(DiaSemana.JUEVES, 480, 540), (DiaSemana.JUEVES, 600, 660)]
+    assert sorted(eliminados) == [3, 5]
+    print("✅ Solo se actualizan, crean y borran los bloques que cambiaron")
+
+
+def test_bloques_reutilizados_en_orden():
+    # Dos bloques cambian el mismo día: los ids sobrantes se reutilizan de menor a mayor
+    actuales = {DiaSemana.VIERNES: [(480, 540, 7), (600, 660, 8), (720, 780, 9)]}
+    semana = {DiaSemana.VIERNES: [(500, 560), (620, 680)]}
+    conservados, actualizados, insertados, eliminados = DisponibilidadRepository.diferencias_semana(actuales, semana)
+    
+    assert conservados == [] and insertados == []
+    assert actualizados == [(7, DiaSemana.VIERNES, 500, 560), (8, DiaSemana.VIERNES, 620, 680)]
+    assert eliminados == [9]
+    print("✅ Los bloques sobrantes se reutilizan antes de crear o borrar")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Diferencias al reemplazar la semana")
+    print("=" * 60)
+    test_semana_sin_cambios()
+    test_semana_con_cambios()
+    test_bloques_reutilizados_en_orden()
@@ -0,0 +1,67 @@
+"""
+Pruebas del cálculo de festivos de Colombia (utils/festivos.py)
+
+No necesitan base de datos: comparan los festivos de 2025 con el calendario
+oficial, incluidos los trasladados al lunes por la Ley Emiliani y los que
+dependen del Domingo de Pascua.
+
+Uso:
+    cd backend
+    python -m tests.test_festivos
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+
+from utils.festivos import TRASLADABLES, domingo_de_pascua, festivos_colombia, siguiente_lunes
+
+
+def test_domingo_de_pascua():
+    assert domingo_de_pascua(2024) == date(2024, 3, 31)
+    assert domingo_de_pascua(2025) == date(2025, 4, 20)
+    assert domingo_de_pascua(2026) == date(2026, 4, 5)
+    print("✅ El Domingo de Pascua coincide con el calendario")
+
+
+def test_festivos_trasladados_al_lunes():
+    festivos = festivos_colombia(2025)
+    
+    # Un trasladable que ya cae en lunes se queda en su fecha
+    assert siguiente_lunes(date(2025, 1, 6)) == date(2025, 1, 6)
+    assert festivos[date(2025, 1, 6)] == "Reyes Magos"
+    # Miércoles 19 de marzo, domingo 12 de octubre y sábado 1 de noviembre
+    assert festivos[date(2025, 3, 24)] == "San José"
+    assert festivos[date(2025, 10, 13)] == "Día de la Raza"
+    assert festivos[date(2025, 11, 3)] == "Todos los Santos"
+    assert date(2025, 3, 19) not in festivos and date(2025, 11, 1) not in festivos
+    
+    # Todos los trasladables del año terminan en lunes
+    for mes, dia in TRASLADABLES:
+        assert siguiente_lunes(date(2025, mes, dia)).weekday() == 0
+    print("✅ Los festivos trasladables pasan al lunes siguiente")
+
+
+def test_festivos_de_pascua():
+    festivos = festivos_colombia(2025)
+    
+    # Jueves y Viernes Santo no se trasladan; los demás van al lunes siguiente
+    assert festivos[date(2025, 4, 17)] == "Jueves Santo"
+    assert festivos[date(2025, 4, 18)] == "Viernes Santo"
+    assert festivos[date(2025, 6, 2)] == "Ascensión del Señor"
+    assert festivos[date(2025, 6, 23)] == "Corpus Christi"
+    
+    # Sagrado Corazón y San Pedro caen el mismo lunes: una sola fecha con ambos nombres
+    assert festivos[date(2025, 6, 30)] == "Sagrado Corazón / San Pedro y San Pablo"
+    assert len(festivos) == 17
+    print("✅ Los festivos de Pascua coinciden con el calendario de 2025")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Festivos de Colombia")
+    print("=" * 60)
+    test_domingo_de_pascua()
+    test_festivos_trasladados_al_lunes()
+    test_festivos_de_pascua()
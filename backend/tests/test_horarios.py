@@ -0,0 +1,46 @@
+"""
+Pruebas de los mapas de bits de horarios (utils/horarios.py)
+
+No necesitan base de datos: prueban la conversión entre bloques de minutos
+y mapas de bits de un día.
+
+Uso:
+    cd backend
+    python -m tests.test_horarios
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.horarios import MINUTOS_DIA, mascara_bloques, rangos_encendidos, calcular_inicios_libres
+
+
+def test_rangos_encendidos():
+    # Varias rachas separadas: cada una termina donde termina, no donde empieza la siguiente
+    bloques = [(540, 600), (720, 780), (900, 960)]
+    assert rangos_encendidos(mascara_bloques(bloques)) == bloques
+    
+    # Rachas contiguas se unen y una racha puede llegar al último minuto del día
+    assert rangos_encendidos(mascara_bloques([(0, 30), (30, 60), (1380, MINUTOS_DIA)])) == [
+        (0, 60), (1380, MINUTOS_DIA)
+    ]
+    assert rangos_encendidos(mascara_bloques([(0, MINUTOS_DIA)])) == [(0, MINUTOS_DIA)]
+    assert rangos_encendidos(1 << (MINUTOS_DIA - 1)) == [(MINUTOS_DIA - 1, MINUTOS_DIA)]
+    
+    assert rangos_encendidos(0) == []
+    print("✅ Las rachas de bits se convierten en los bloques originales")
+
+
+def test_inicios_libres_entre_citas():
+    disponible = mascara_bloques([(480, 720)])
+    ocupada = mascara_bloques([(540, 600)])
+    assert calcular_inicios_libres(disponible, ocupada, 60, 30) == [480, 600, 630, 660]
+    print("✅ Los inicios libres respetan las citas del día")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Mapas de bits de horarios")
+    print("=" * 60)
+    test_rangos_encendidos()
+    test_inicios_libres_entre_citas()
@@ -0,0 +1,71 @@
+"""
+Pruebas de los cursores de paginación (utils/paginacion.py)
+
+No necesitan base de datos: prueban el ida y vuelta de los cursores, el
+rechazo de cursores inválidos y el recorte de la fila de más.
+
+Uso:
+    cd backend
+    python -m tests.test_paginacion
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi import HTTPException, Response
+
+from utils.paginacion import codificar_cursor, decodificar_cursor, recortar_pagina, publicar_cursor
+
+FECHA = datetime(2030, 1, 7, 14, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def test_cursor_ida_y_vuelta():
+    cursor = codificar_cursor(FECHA, 42)
+    
+    # Opaco y seguro para una URL
+    assert "2030" not in cursor and not set(cursor) - set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert decodificar_cursor(cursor, datetime, int) == (FECHA, 42)
+    assert decodificar_cursor(codificar_cursor(4, 17), int, int) == (4, 17)
+    assert decodificar_cursor(None, datetime, int) is None
+    print("✅ El cursor devuelve la misma clave de orden")
+
+
+def test_cursor_invalido():
+    for cursor in ["no-es-base64!", codificar_cursor(42), codificar_cursor("ayer", 42), codificar_cursor(FECHA, "42")]:
+        try:
+            decodificar_cursor(cursor, datetime, int)
+        except HTTPException as error:
+            assert error.status_code == 400
+        else:
+            raise AssertionError(f"Se aceptó un cursor inválido: {cursor}")
+    print("✅ Los cursores inválidos responden 400")
+
+
+def test_recortar_pagina():
+    filas = [SimpleNamespace(fecha=FECHA, id=i) for i in range(11)]
+    clave = lambda fila: (fila.fecha, fila.id)
+    
+    pagina, siguiente = recortar_pagina(filas, 10, clave)
+    assert len(pagina) == 10
+    assert decodificar_cursor(siguiente, datetime, int) == (FECHA, 9)
+    
+    # Sin fila de más (o sin límite) no hay siguiente página
+    assert recortar_pagina(filas[:10], 10, clave) == (filas[:10], None)
+    assert recortar_pagina(filas, None, clave) == (filas, None)
+    
+    response = Response()
+    publicar_cursor(response, siguiente)
+    assert response.headers["X-Siguiente-Cursor"] == siguiente
+    print("✅ La fila de más se recorta y da el cursor de la siguiente página")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Cursores de paginación")
+    print("=" * 60)
+    test_cursor_ida_y_vuelta()
+    test_cursor_invalido()
+    test_recortar_pagina()
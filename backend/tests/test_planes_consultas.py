@@ -0,0 +1,244 @@
+"""
+Prueba: las consultas frecuentes usan índices (regresión de planes)
+
+Ejecuta cada consulta caliente de los repositorios y rutas contra una base
+PostgreSQL local con datos de prueba, captura las sentencias SELECT que
+emite y corre EXPLAIN sobre cada una. Falla si alguna recorre completa una
+de las tablas de TABLAS_CALIENTES: con un Seq Scan, o con un Index Scan /
+Index Only Scan sin condición de índice (lee el índice entero) que no esté
+cortado por un LIMIT.
+
+Los planes se piden con enable_seqscan = off: así el resultado no depende de
+cuántas filas tenga la base local. Con el recorrido secuencial desactivado
+PostgreSQL solo lo elige cuando ningún índice sirve a la consulta, que es
+justo la regresión que se quiere detectar (p. ej. un índice que falta tras
+una migración o un filtro reescrito que ya no lo aprovecha). Sin Seq Scan
+disponible, PostgreSQL recorre el índice completo en su lugar; por eso
+también se revisa que cada recorrido de índice tenga su condición.
+
+Uso:
+    cd backend
+    python -m tests.test_planes_consultas
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+from datetime import timedelta
+
+from fastapi import Response
+
+from models import (
+    PerfilProfesional, Cita, Pago, Notificacion, Favorito,
+    EstadoCita, EstadoPago, TipoNotificacion
+)
+from repositories import (
+    CitaRepository, PagoRepository, FavoritoRepository,
+    ListaEsperaRepository, ExcepcionRepository, CalendarioRepository
+)
+from services import estadisticas_service
+from services.cliente_service import ClienteService
+from routes.notificaciones import obtener_mis_notificaciones, contar_no_leidas
+from routes.profesionales import listar_profesionales, obtener_pagos_profesional
+from schemas import TokenData
+from utils.cargadores import cargadores
+from utils.paginacion import codificar_cursor
+from tests.entorno_prueba import (
+    sesion_prueba, cliente_temporal, profesional_de_prueba, fecha_lejana, contar_consultas
+)
+
+TABLAS_CALIENTES = {
+    "citas", "pagos", "notificaciones", "perfiles_profesionales", "favoritos", "users",
+    "resumen_citas_diario", "resumen_pagos_diario",
+    "lista_espera", "excepciones_disponibilidad", "calendario_disponible"
+}
+
+# Nodos que leen toda su entrada antes de devolver la primera fila: un LIMIT
+# por encima de ellos no acorta el recorrido de los que están debajo
+NODOS_BLOQUEANTES = {"Sort", "Incremental Sort", "Aggregate", "Hash", "Materialize", "WindowAgg", "SetOp"}
+
+CITAS_DE_PRUEBA = 200
+ESTADOS = [EstadoCita.PENDIENTE, EstadoCita.CONFIRMADA, EstadoCita.COMPLETADA, EstadoCita.CANCELADA]
+
+# (nombre, función que ejecuta las consultas); `c` trae db y los ids de prueba
+CASOS = [
+    ("verificar_conflicto", lambda c: CitaRepository.verificar_conflicto(
+        c.db, c.profesional_id, c.base, 60)),
+    ("obtener_intervalos_activos", lambda c: CitaRepository.obtener_intervalos_activos(
+        c.db, [c.profesional_id], c.base, c.base + timedelta(days=7))),
+    ("obtener_del_dia", lambda c: CitaRepository.obtener_del_dia(
+        c.db, c.profesional_id, c.base.date())),
+    ("obtener_proximas (profesional)", lambda c: CitaRepository.obtener_proximas(
+        c.db, c.profesional_id, es_profesional=True)),
+    ("mis-citas", lambda c: CitaRepository.obtener_de_cliente_con_profesional(
+        c.db, c.cliente_id, limite=20)),
+    ("admin/todas", lambda c: CitaRepository.listar_admin(c.db, 50)),
+    ("admin/todas por profesional", lambda c: CitaRepository.listar_admin(
+        c.db, 50, profesional_id=c.profesional_id)),
+    # Sin filtros los contadores cuentan a propósito toda la tabla: se prueban
+    # los filtros del panel, que sí deben resolverse con índices
+    ("admin/todas contadores por profesional", lambda c: CitaRepository.contar_admin_por_estado(
+        c.db, profesional_id=c.profesional_id)),
+    ("admin/todas contadores por fechas", lambda c: CitaRepository.contar_admin_por_estado(
+        c.db, fecha_desde=c.base, fecha_hasta=c.base + timedelta(days=7))),
+    ("dashboard/pacientes", lambda c: CitaRepository.obtener_pacientes_profesional(
+        c.db, c.profesional_id)),
+    ("mis-pagos", lambda c: PagoRepository.obtener_historial_cliente(
+        c.db, c.cliente_id, limite=20)),
+    ("pago de una cita", lambda c: PagoRepository.obtener_por_cita(c.db, c.cita_id)),
+    ("ingresos del profesional", lambda c: PagoRepository.calcular_ingresos_profesional(
+        c.db, c.profesional_id)),
+    ("perfil por usuario", lambda c: cargadores(c.db).perfiles.obtener(c.profesional_id)),
+    ("mis-notificaciones", lambda c: obtener_mis_notificaciones(
+        Response(), leidas=None, limite=50, cursor=None, db=c.db, current_user=c.usuario)),
+    ("mis-notificaciones no leídas", lambda c: obtener_mis_notificaciones(
+        Response(), leidas=False, limite=50, cursor=None, db=c.db, current_user=c.usuario)),
+    ("no-leidas/count", lambda c: contar_no_leidas(db=c.db, current_user=c.usuario)),
+    ("es_favorito", lambda c: FavoritoRepository.es_favorito(
+        c.db, c.cliente_id, c.perfil_id)),
+    ("contar_clientes_favorito", lambda c: FavoritoRepository.contar_clientes_favorito(
+        c.db, c.perfil_id)),
+    ("dashboard/estadisticas", lambda c: estadisticas_service.calcular_estadisticas(
+        c.db, c.profesional_id, {"total": estadisticas_service.TODO_EL_TIEMPO})),
+    ("clientes/dashboard", lambda c: ClienteService.obtener_dashboard(c.db, c.usuario.email)),
+    ("profesionales (cursor)", lambda c: asyncio.run(listar_profesionales(
+        skip=0, limit=10, cursor=codificar_cursor(5, c.perfil_id), especialidad=None,
+        ciudad=None, busqueda=None, db=c.db))),
+    ("dashboard/pagos", lambda c: asyncio.run(obtener_pagos_profesional(
+        Response(), fecha_inicio=None, fecha_fin=None, estado=None, limite=20, cursor=None,
+        current_user=c.usuario_profesional, db=c.db))),
+    ("lista de espera: coincidencias", lambda c: ListaEsperaRepository.buscar_coincidencias(
+        c.db, c.profesional_id, c.base, c.base + timedelta(hours=2))),
+    ("excepciones en rango", lambda c: ExcepcionRepository.obtener_en_rango(
+        c.db, [c.profesional_id], c.base.date(), c.base.date() + timedelta(days=30), incluir_festivos=True)),
+    ("calendario: día", lambda c: CalendarioRepository.obtener_dia(
+        c.db, c.profesional_id, c.base.date())),
+    ("calendario: rango", lambda c: CalendarioRepository.obtener_rango(
+        c.db, c.profesional_id, c.base.date(), c.base.date() + timedelta(days=30))),
+]
+
+
+def recorrido_completo(plan: dict, con_limite: bool) -> bool:
+    """Si el nodo lee su tabla (o el índice entero) sin condición que lo acote"""
+    tipo = plan.get("Node Type")
+    if tipo == "Seq Scan":
+        return True
+    if tipo in ("Index Scan", "Index Only Scan"):
+        # Sin Index Cond el índice se lee de punta a punta; con un LIMIT
+        # encima solo se leen las filas de la página, en el orden del índice
+        return "Index Cond" not in plan and not con_limite
+    if tipo == "Bitmap Heap Scan":
+        return "Recheck Cond" not in plan
+    return False
+
+
+def recorridos_completos(plan: dict, con_limite: bool = False) -> list:
+    """Tablas calientes que el plan recorre completas"""
+    tablas = []
+    if plan.get("Relation Name") in TABLAS_CALIENTES and recorrido_completo(plan, con_limite):
+        tablas.append(plan["Relation Name"])
+
+    if plan.get("Node Type") == "Limit":
+        con_limite = True
+    elif plan.get("Node Type") in NODOS_BLOQUEANTES:
+        con_limite = False
+    for hijo in plan.get("Plans", []):
+        tablas += recorridos_completos(hijo, con_limite)
+    return tablas
+
+
+def indices_usados(plan: dict) -> set:
+    """Índices que aparecen en el plan (para el reporte)"""
+    indices = {plan["Index Name"]} if "Index Name" in plan else set()
+    for hijo in plan.get("Plans", []):
+        indices |= indices_usados(hijo)
+    return indices
+
+
+def test_planes_consultas():
+    fallas = {}
+    with sesion_prueba() as db, cliente_temporal(db, "planes") as cliente, \
+            contar_consultas(db, lambda sql: sql.lstrip().upper().startswith(("SELECT", "WITH"))) as capturadas:
+        profesional = profesional_de_prueba(db)
+        perfil = db.query(PerfilProfesional).filter(PerfilProfesional.usuario_id == profesional.id).first()
+        assert perfil, "El profesional de prueba necesita perfil (python -m tests.create_test_profesionales)"
+
+        # Lejanas y de una hora cada una: no chocan con la agenda real del profesional
+        base = fecha_lejana(1200)
+        citas = [
+            Cita(
+                cliente_id=cliente.id,
+                profesional_id=profesional.id,
+                fecha_hora=base + timedelta(hours=i),
+                duracion_minutos=60,
+                estado=ESTADOS[i % len(ESTADOS)],
+                motivo="Prueba de planes",
+                precio=50000
+            )
+            for i in range(CITAS_DE_PRUEBA)
+        ]
+        db.add_all(citas)
+        db.flush()
+        db.add_all([
+            Pago(cita_id=cita.id, monto=50000, estado=EstadoPago.COMPLETADO, metodo_pago="prueba")
+            for cita in citas[::2]
+        ])
+        db.add_all([
+            Notificacion(
+                usuario_id=cliente.id,
+                tipo=TipoNotificacion.SISTEMA,
+                titulo="Prueba",
+                mensaje="Prueba de planes",
+                leida=i % 3 == 0
+            )
+            for i in range(CITAS_DE_PRUEBA)
+        ])
+        db.add(Favorito(cliente_id=cliente.id, profesional_id=perfil.id))
+        db.commit()
+        for tabla in sorted(TABLAS_CALIENTES):
+            db.connection().exec_driver_sql(f"ANALYZE {tabla}")
+        db.commit()
+
+        contexto = SimpleNamespace(
+            db=db,
+            profesional_id=profesional.id,
+            perfil_id=perfil.id,
+            cliente_id=cliente.id,
+            cita_id=citas[0].id,
+            base=base,
+            usuario=TokenData(email=cliente.email),
+            usuario_profesional=TokenData(email=profesional.email)
+        )
+
+        for nombre, caso in CASOS:
+            capturadas.clear()
+            caso(contexto)
+            sentencias = list(capturadas)
+
+            conexion = db.connection()
+            conexion.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            tablas, indices = [], set()
+            for sentencia, parametros in sentencias:
+                plan = conexion.exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + sentencia, parametros
+                ).scalar()[0]["Plan"]
+                tablas += recorridos_completos(plan)
+                indices |= indices_usados(plan)
+            db.rollback()
+
+            if tablas:
+                fallas[nombre] = sorted(set(tablas))
+            marca = "❌" if tablas else "✅"
+            print(f"   {marca} {nombre}: {', '.join(sorted(indices)) or 'sin índices'}")
+
+    assert not fallas, f"Consultas que recorren tablas completas: {fallas}"
+    print("✅ Ninguna consulta frecuente recorre una tabla completa")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Planes de las consultas frecuentes")
+    print("=" * 60)
+    test_planes_consultas()
@@ -0,0 +1,101 @@
+"""
+Pruebas de las plantillas semanales compiladas (services/plantilla_service.py)
+
+No necesitan base de datos: compilan una plantilla a partir de bloques en
+minutos y prueban cómo las excepciones (festivos, bloqueos y turnos extra)
+modifican el mapa de bits de un día y si una cita, incluso una que cruza la
+medianoche, cae dentro del horario.
+
+Uso:
+    cd backend
+    python -m tests.test_plantillas
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from models import TipoExcepcion
+from services.plantilla_service import compilar_plantilla
+from utils.horarios import mascara_bloques, rangos_encendidos
+
+ZONA = ZoneInfo("America/Bogota")
+LUNES = date(2030, 1, 7)
+VIERNES = date(2030, 1, 11)
+SABADO = VIERNES + timedelta(days=1)
+
+# Lunes 8:00-12:00 y 14:00-18:00; viernes 22:00-24:00 y sábado 0:00-2:00
+PLANTILLA = compilar_plantilla(ZONA, {
+    0: [(480, 720), (840, 1080)],
+    4: [(1320, 1440)],
+    5: [(0, 120)],
+})
+
+
+def local(dia: date, hora: int, minuto: int = 0) -> datetime:
+    return datetime(dia.year, dia.month, dia.day, hora, minuto, tzinfo=ZONA)
+
+
+def test_excepciones_sobre_la_plantilla():
+    assert rangos_encendidos(PLANTILLA.mascara(LUNES)) == [(480, 720), (840, 1080)]
+    
+    # Un bloqueo apaga sus minutos
+    bloqueo = (TipoExcepcion.BLOQUEO, 600, 660)
+    assert rangos_encendidos(PLANTILLA.mascara(LUNES, [bloqueo])) == [(480, 600), (660, 720), (840, 1080)]
+    
+    # Un turno extra vuelve a encender minutos bloqueados, sin importar el orden
+    extra = (TipoExcepcion.TURNO_EXTRA, 630, 660)
+    for excepciones in ([bloqueo, extra], [extra, bloqueo]):
+        assert rangos_encendidos(PLANTILLA.mascara(LUNES, excepciones)) == [(480, 600), (630, 720), (840, 1080)]
+    
+    # Un festivo apaga todo el día salvo el turno extra explícito
+    festivo = (TipoExcepcion.FESTIVO, 0, 1440)
+    extra_festivo = (TipoExcepcion.TURNO_EXTRA, 480, 540)
+    assert rangos_encendidos(PLANTILLA.mascara(LUNES, [extra_festivo, festivo])) == [(480, 540)]
+    print("✅ Las excepciones del día se aplican sobre la plantilla")
+
+
+def test_dentro_de_horario():
+    assert PLANTILLA.dentro_de_horario(local(LUNES, 8), 60)
+    assert PLANTILLA.dentro_de_horario(local(LUNES, 11), 60)
+    assert not PLANTILLA.dentro_de_horario(local(LUNES, 11, 30), 60)  # Termina en el almuerzo
+    assert not PLANTILLA.dentro_de_horario(local(LUNES, 7), 60)
+    
+    # Las excepciones se buscan por la fecha local de la cita
+    bloqueo = {LUNES: [(TipoExcepcion.BLOQUEO, 480, 540)]}
+    assert not PLANTILLA.dentro_de_horario(local(LUNES, 8), 60, bloqueo)
+    assert PLANTILLA.dentro_de_horario(local(LUNES, 9), 60, bloqueo)
+    print("✅ Las citas del día se validan contra el horario y sus excepciones")
+
+
+def test_cita_que_cruza_la_medianoche():
+    # Viernes 23:00 a sábado 1:00: cubierta por los dos días
+    assert PLANTILLA.dentro_de_horario(local(VIERNES, 23), 120)
+    assert not PLANTILLA.dentro_de_horario(local(VIERNES, 23), 240)  # El sábado termina a las 2:00
+    
+    # Un bloqueo al inicio del sábado rechaza la cita que empieza el viernes
+    bloqueo = {SABADO: [(TipoExcepcion.BLOQUEO, 0, 60)]}
+    assert not PLANTILLA.dentro_de_horario(local(VIERNES, 23), 120, bloqueo)
+    assert PLANTILLA.dentro_de_horario(local(VIERNES, 22), 120, bloqueo)
+    print("✅ Una cita que cruza la medianoche debe caber en ambos días")
+
+
+def test_plantilla_por_defecto():
+    # Sin bloques configurados se usa el horario por defecto todos los días
+    plantilla = compilar_plantilla(ZONA, {})
+    assert not plantilla.configurada
+    assert len(set(plantilla.mascaras)) == 1
+    assert plantilla.mascaras[0] == mascara_bloques(plantilla.intervalos[0])
+    print("✅ Sin disponibilidad configurada se usa el horario por defecto")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Plantillas semanales")
+    print("=" * 60)
+    test_excepciones_sobre_la_plantilla()
+    test_dentro_de_horario()
+    test_cita_que_cruza_la_medianoche()
+    test_plantilla_por_defecto()
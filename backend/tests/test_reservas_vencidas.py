@@ -0,0 +1,75 @@
+"""
+Prueba de las citas agendadas sin pagar (retenida_hasta)
+
+Contra PostgreSQL local: una cita cuya retención venció sin pago se cancela
+en el lote del barrido y deja libre su horario; una cita con la retención
+vigente se puede pagar (consolidar_reserva le quita la fecha límite) y el
+barrido ya no la toca.
+
+Uso:
+    cd backend
+    python -m tests.test_reservas_vencidas
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+
+from models import Cita, EstadoCita
+from repositories import CitaRepository
+from tests.entorno_prueba import sesion_prueba, cliente_temporal, profesional_de_prueba, fecha_lejana
+
+
+def _reserva(db, cliente, profesional, fecha_hora, retenida_hasta):
+    cita = CitaRepository.crear_si_disponible(db, {
+        "cliente_id": cliente.id,
+        "profesional_id": profesional.id,
+        "fecha_hora": fecha_hora,
+        "duracion_minutos": 60,
+        "estado": EstadoCita.PENDIENTE,
+        "motivo": "Prueba de reserva sin pagar",
+        "precio": 0,
+        "retenida_hasta": retenida_hasta
+    })
+    assert cita is not None
+    return cita
+
+
+def test_reservas_vencidas():
+    with sesion_prueba() as db, cliente_temporal(db, "reservas") as cliente:
+        profesional = profesional_de_prueba(db)
+        base = fecha_lejana()
+        ahora = datetime.now(timezone.utc)
+
+        vencida = _reserva(db, cliente, profesional, base, ahora - timedelta(minutes=1))
+        vigente = _reserva(db, cliente, profesional, base + timedelta(hours=2), ahora + timedelta(minutes=10))
+
+        # La reserva vencida no se puede pagar
+        assert not CitaRepository.consolidar_reserva(db, vencida.id)
+        db.rollback()
+
+        # La vigente se paga: pierde la fecha límite
+        assert CitaRepository.consolidar_reserva(db, vigente.id)
+        db.commit()
+
+        canceladas = CitaRepository.cancelar_reservas_vencidas_lote(db, ahora, 500)
+        db.commit()
+        ids = {cita.id for cita in canceladas}
+        assert vencida.id in ids and vigente.id not in ids
+
+        db.expire_all()
+        assert db.get(Cita, vencida.id).estado == EstadoCita.CANCELADA
+        assert db.get(Cita, vigente.id).estado == EstadoCita.PENDIENTE
+        assert db.get(Cita, vigente.id).retenida_hasta is None
+
+        # El horario de la reserva cancelada quedó libre
+        assert _reserva(db, cliente, profesional, base, None)
+        print("✅ Las reservas sin pagar se cancelan al vencer su retención y las pagadas se conservan")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Reservas sin pagar")
+    print("=" * 60)
+    test_reservas_vencidas()
@@ -0,0 +1,124 @@
+"""
+Prueba: los resúmenes diarios siguen a las citas y pagos
+
+Crea citas y pagos de un cliente temporal, cambia estados (uno a uno y con
+un UPDATE masivo), mueve una cita de día y borra un pago. Después de cada
+paso compara lo que dejaron los triggers en resumen_citas_diario y
+resumen_pagos_diario con una reconstrucción desde cero del mismo
+profesional. Requiere PostgreSQL local con migration_resumenes_diarios.sql.
+
+Uso:
+    cd backend
+    python -m tests.test_resumenes_diarios
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import timedelta
+
+from models import Cita, Pago, ResumenCitaDiario, ResumenPagoDiario, EstadoCita, EstadoPago
+from repositories import ResumenRepository
+from services import estadisticas_service
+from tests.entorno_prueba import (
+    sesion_prueba, cliente_temporal, profesional_de_prueba, fecha_lejana, borrar_datos_cliente
+)
+
+
+def leer_resumenes(db, profesional_id: int) -> dict:
+    """Filas con cantidad o monto distinto de cero, por (tabla, día, estado)"""
+    filas = {}
+    for tabla, modelo in (("citas", ResumenCitaDiario), ("pagos", ResumenPagoDiario)):
+        for fila in db.query(modelo).filter(modelo.profesional_id == profesional_id):
+            if fila.cantidad or fila.monto:
+                filas[(tabla, fila.dia, fila.estado)] = (fila.cantidad, fila.monto)
+    return filas
+
+
+def comparar_con_reconstruccion(db, profesional_id: int, paso: str):
+    incremental = leer_resumenes(db, profesional_id)
+    ResumenRepository.reconstruir(db, [profesional_id])
+    reconstruido = leer_resumenes(db, profesional_id)
+    assert incremental == reconstruido, f"{paso}: triggers {incremental} != reconstrucción {reconstruido}"
+    print(f"   ✅ {paso}: {len(reconstruido)} filas de resumen coinciden")
+
+
+def test_resumenes_diarios():
+    with sesion_prueba() as db, cliente_temporal(db, "resumenes") as cliente:
+        profesional = profesional_de_prueba(db)
+
+        # Parte del historial real del profesional podría no estar resumido aún
+        ResumenRepository.reconstruir(db, [profesional.id])
+        antes = estadisticas_service.calcular_estadisticas(
+            db, profesional.id, {"total": estadisticas_service.TODO_EL_TIEMPO}
+        )["total"]
+
+        # Lejanas y canceladas: no ocupan la agenda real del profesional
+        base = fecha_lejana()
+        citas = [
+            Cita(
+                cliente_id=cliente.id,
+                profesional_id=profesional.id,
+                fecha_hora=base + timedelta(days=i // 3, hours=i % 3),
+                duracion_minutos=60,
+                estado=EstadoCita.CANCELADA,
+                motivo="Prueba de resúmenes",
+                precio=40000 + 1000 * i
+            )
+            for i in range(9)
+        ]
+        db.add_all(citas)
+        db.flush()
+        pagos = [
+            Pago(cita_id=cita.id, monto=cita.precio, estado=EstadoPago.PENDIENTE, metodo_pago="prueba")
+            for cita in citas[:6]
+        ]
+        db.add_all(pagos)
+        db.commit()
+        comparar_con_reconstruccion(db, profesional.id, "Inserción")
+
+        despues = estadisticas_service.calcular_estadisticas(
+            db, profesional.id, {"total": estadisticas_service.TODO_EL_TIEMPO}
+        )["total"]
+        assert despues["citas_canceladas"] == antes["citas_canceladas"] + 9
+        assert despues["monto_pendiente"] == antes["monto_pendiente"] + sum(p.monto for p in pagos)
+
+        for pago in pagos[:3]:
+            pago.estado = EstadoPago.COMPLETADO
+        pagos[3].estado = EstadoPago.FALLIDO
+        db.commit()
+        comparar_con_reconstruccion(db, profesional.id, "Cambio de estado de pagos")
+
+        db.query(Cita).filter(
+            Cita.cliente_id == cliente.id,
+            Cita.id.in_([cita.id for cita in citas[:5]])
+        ).update({Cita.estado: EstadoCita.COMPLETADA}, synchronize_session=False)
+        db.commit()
+        comparar_con_reconstruccion(db, profesional.id, "UPDATE masivo de citas")
+
+        citas[8].fecha_hora = citas[8].fecha_hora + timedelta(days=3)
+        citas[7].precio = 1
+        db.delete(pagos[5])
+        db.commit()
+        comparar_con_reconstruccion(db, profesional.id, "Reagendar, cambiar precio y borrar un pago")
+
+        tendencia = estadisticas_service.obtener_tendencia(
+            db, profesional.id, base.date() - timedelta(days=1), base.date() + timedelta(days=10)
+        )
+        assert sum(punto["citas_completadas"] for punto in tendencia) >= 5
+
+        # Borrar los datos de prueba deja los resúmenes como estaban
+        borrar_datos_cliente(db, cliente.id)
+        final = estadisticas_service.calcular_estadisticas(
+            db, profesional.id, {"total": estadisticas_service.TODO_EL_TIEMPO}
+        )["total"]
+        assert final == antes, f"Los resúmenes no volvieron a su estado: {antes} != {final}"
+
+    print("✅ Los triggers mantienen los resúmenes igual que una reconstrucción completa")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Resúmenes diarios de citas y pagos")
+    print("=" * 60)
+    test_resumenes_diarios()
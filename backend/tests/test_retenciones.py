@@ -0,0 +1,84 @@
+"""
+Pruebas de las retenciones temporales de horarios (utils/retenciones.py)
+
+Usan el almacén en memoria, así que no necesitan base de datos ni Redis.
+
+Uso:
+    cd backend
+    python -m tests.test_retenciones
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils import retenciones
+from utils.retenciones import AlmacenMemoria
+
+INICIO = datetime(2030, 1, 7, 14, 0, tzinfo=timezone.utc)
+
+
+def test_retencion_bloquea_solapados():
+    retenciones.configurar_almacen(AlmacenMemoria())
+    
+    retencion = retenciones.retener_horario(1, INICIO, 60, titular_id=10)
+    assert retencion is not None
+    
+    # Otro cliente no puede retener ni tomar un horario que se solapa
+    assert retenciones.retener_horario(1, INICIO + timedelta(minutes=30), 60, titular_id=11) is None
+    assert retenciones.horario_retenido(1, INICIO + timedelta(minutes=45), 30)
+    
+    # Horarios contiguos, otro profesional o el propio titular no cuentan
+    assert not retenciones.horario_retenido(1, INICIO + timedelta(minutes=60), 30)
+    assert not retenciones.horario_retenido(2, INICIO, 60)
+    assert not retenciones.horario_retenido(1, INICIO, 60, excepto_retencion_id=retencion.id)
+    print("✅ La retención bloquea solo los horarios que se solapan")
+
+
+def test_retencion_vence_sola():
+    retenciones.configurar_almacen(AlmacenMemoria())
+    
+    assert retenciones.retener_horario(1, INICIO, 60, titular_id=10, ttl_segundos=1)
+    time.sleep(1.1)
+    
+    assert not retenciones.horario_retenido(1, INICIO, 60)
+    assert retenciones.retener_horario(1, INICIO, 60, titular_id=11) is not None
+    print("✅ La retención vence sin intervención")
+
+
+def test_horarios_retenidos_en_una_lectura():
+    retenciones.configurar_almacen(AlmacenMemoria())
+    
+    propia = retenciones.retener_horario(1, INICIO, 60, titular_id=10)
+    assert retenciones.retener_horario(1, INICIO + timedelta(days=14), 60, titular_id=11)
+    
+    # Una serie semanal: la primera fecha es la retención propia, la tercera es de otro cliente
+    serie = [(INICIO + timedelta(days=7 * semana), 60) for semana in range(4)]
+    assert retenciones.horarios_retenidos(1, serie, excepto_retencion_id=propia.id) == [False, False, True, False]
+    assert retenciones.horarios_retenidos(1, serie) == [True, False, True, False]
+    assert retenciones.horarios_retenidos(1, []) == []
+    print("✅ Las retenciones de una serie se consultan juntas")
+
+
+def test_liberar_retencion():
+    retenciones.configurar_almacen(AlmacenMemoria())
+    
+    retencion = retenciones.retener_horario(1, INICIO, 60, titular_id=10)
+    assert retenciones.obtener_retencion(retencion.id).titular_id == 10
+    
+    retenciones.liberar_retencion(retencion.id)
+    assert retenciones.obtener_retencion(retencion.id) is None
+    assert not retenciones.horario_retenido(1, INICIO, 60)
+    print("✅ Liberar una retención deja el horario disponible")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TEST: Retenciones temporales de horarios")
+    print("=" * 60)
+    test_retencion_bloquea_solapados()
+    test_retencion_vence_sola()
+    test_horarios_retenidos_en_una_lectura()
+    test_liberar_retencion()
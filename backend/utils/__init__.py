@@ -6,6 +6,9 @@ from .notificaciones import (
     notificar_cita_creada,
     notificar_cita_cancelada,
     notificar_cita_reagendada,
+    notificar_serie_creada,
+    notificar_cambios_estado,
+    notificar_horario_liberado,
     notificar_pago_exitoso,
     notificar_pago_fallido
 )
@@ -20,6 +23,9 @@ __all__ = [
     'notificar_cita_creada',
     'notificar_cita_cancelada',
     'notificar_cita_reagendada',
+    'notificar_serie_creada',
+    'notificar_cambios_estado',
+    'notificar_horario_liberado',
     'notificar_pago_exitoso',
     'notificar_pago_fallido',
     'crear_pago_paypal',
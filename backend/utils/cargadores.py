@@ -0,0 +1,90 @@
+"""
+Cargadores por lotes de usuarios y perfiles profesionales
+
+Los handlers que serializan listas solían buscar el User (o el
+PerfilProfesional) de cada fila con su propia consulta. Un Cargador junta los
+ids pedidos y los resuelve con una sola consulta IN (...) por tipo de entidad;
+lo que ya se cargó queda en memoria hasta el final de la petición.
+
+Los cargadores se guardan en `db.info`: como get_db abre una sesión por
+petición, viven exactamente lo que dura la petición.
+
+Uso:
+    carga = cargadores(db)
+    carga.usuarios.pedir(cita.cliente_id for cita in citas)
+    for cita in citas:
+        cliente = carga.usuarios.obtener(cita.cliente_id)  # Una consulta en total
+"""
+from typing import Any, Dict, Generic, Iterable, Optional, Set, Type, TypeVar
+
+from sqlalchemy.orm import Session
+
+from models import User, PerfilProfesional
+
+Modelo = TypeVar("Modelo")
+
+
+class Cargador(Generic[Modelo]):
+    """Resuelve entidades de un modelo por una columna clave, por lotes y con memoria"""
+
+    def __init__(self, db: Session, modelo: Type[Modelo], clave):
+        self.db = db
+        self.modelo = modelo
+        self.clave = clave
+        self._pendientes: Set[Any] = set()
+        self._cargados: Dict[Any, Optional[Modelo]] = {}
+
+    def pedir(self, claves: Iterable[Any]) -> None:
+        """Anota claves para resolverlas todas juntas en la próxima carga"""
+        self._pendientes.update(
+            clave for clave in claves
+            if clave is not None and clave not in self._cargados
+        )
+
+    def cargar(self) -> None:
+        """Resuelve las claves pendientes con una sola consulta IN (...)"""
+        if not self._pendientes:
+            return
+
+        pendientes, self._pendientes = self._pendientes, set()
+        encontrados = self.db.query(self.modelo).filter(self.clave.in_(pendientes)).all()
+        for entidad in encontrados:
+            self._cargados[getattr(entidad, self.clave.key)] = entidad
+        # Las claves sin fila también se recuerdan, para no volver a buscarlas
+        for clave in pendientes:
+            self._cargados.setdefault(clave, None)
+
+    def obtener(self, clave: Any) -> Optional[Modelo]:
+        """La entidad de una clave; junto con ella se cargan todas las pendientes"""
+        if clave is None:
+            return None
+        if clave not in self._cargados:
+            self._pendientes.add(clave)
+            self.cargar()
+        return self._cargados[clave]
+
+    def obtener_varios(self, claves: Iterable[Any]) -> Dict[Any, Optional[Modelo]]:
+        """Las entidades de varias claves, con a lo sumo una consulta"""
+        claves = list(claves)
+        self.pedir(claves)
+        self.cargar()
+        return {clave: self._cargados.get(clave) for clave in claves if clave is not None}
+
+
+class Cargadores:
+    """Cargadores de una petición"""
+
+    def __init__(self, db: Session):
+        self.usuarios: Cargador[User] = Cargador(db, User, User.id)
+        # Por usuario_id, que es como se buscan los perfiles desde una cita
+        self.perfiles: Cargador[PerfilProfesional] = Cargador(
+            db, PerfilProfesional, PerfilProfesional.usuario_id
+        )
+
+
+def cargadores(db: Session) -> Cargadores:
+    """Los cargadores de la petición actual (uno por sesión de base de datos)"""
+    carga = db.info.get("cargadores")
+    if carga is None:
+        carga = db.info["cargadores"] = Cargadores(db)
+    return carga
@@ -0,0 +1,80 @@
+"""
+Festivos nacionales de Colombia
+
+Calcula los festivos de un año según la Ley 51 de 1983 (Ley Emiliani): algunos
+son de fecha fija, otros se trasladan al lunes siguiente y otros dependen del
+Domingo de Pascua. cargar_festivos.py los guarda como excepciones de
+disponibilidad para que no haya que calcularlos en cada consulta.
+"""
+from datetime import date, timedelta
+from typing import Dict
+
+# Se celebran en su fecha
+FIJOS = {
+    (1, 1): "Año Nuevo",
+    (5, 1): "Día del Trabajo",
+    (7, 20): "Día de la Independencia",
+    (8, 7): "Batalla de Boyacá",
+    (12, 8): "Inmaculada Concepción",
+    (12, 25): "Navidad",
+}
+
+# Se trasladan al lunes siguiente si no caen en lunes
+TRASLADABLES = {
+    (1, 6): "Reyes Magos",
+    (3, 19): "San José",
+    (6, 29): "San Pedro y San Pablo",
+    (8, 15): "Asunción de la Virgen",
+    (10, 12): "Día de la Raza",
+    (11, 1): "Todos los Santos",
+    (11, 11): "Independencia de Cartagena",
+}
+
+# Días desde el Domingo de Pascua; True si se trasladan al lunes siguiente
+RELATIVOS_PASCUA = {
+    -3: ("Jueves Santo", False),
+    -2: ("Viernes Santo", False),
+    39: ("Ascensión del Señor", True),
+    60: ("Corpus Christi", True),
+    68: ("Sagrado Corazón", True),
+}
+
+
+def domingo_de_pascua(anio: int) -> date:
+    """Domingo de Pascua del calendario gregoriano (algoritmo de Meeus/Jones/Butcher)"""
+    a = anio % 19
+    b, c = divmod(anio, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(anio, mes, dia + 1)
+
+
+def siguiente_lunes(fecha: date) -> date:
+    """La misma fecha si es lunes; si no, el lunes siguiente"""
+    return fecha + timedelta(days=(7 - fecha.weekday()) % 7)
+
+
+def festivos_colombia(anio: int) -> Dict[date, str]:
+    """Festivos nacionales de un año: {fecha: nombre}"""
+    fechas = [(date(anio, mes, dia), nombre) for (mes, dia), nombre in FIJOS.items()]
+    fechas += [
+        (siguiente_lunes(date(anio, mes, dia)), nombre)
+        for (mes, dia), nombre in TRASLADABLES.items()
+    ]
+
+    pascua = domingo_de_pascua(anio)
+    for dias, (nombre, trasladable) in RELATIVOS_PASCUA.items():
+        fecha = pascua + timedelta(days=dias)
+        fechas.append((siguiente_lunes(fecha) if trasladable else fecha, nombre))
+
+    # Dos festivos pueden caer el mismo lunes (p. ej. 30 de junio de 2025)
+    festivos: Dict[date, str] = {}
+    for fecha, nombre in sorted(fechas):
+        festivos[fecha] = f"{festivos[fecha]} / {nombre}" if fecha in festivos else nombre
+    return festivos
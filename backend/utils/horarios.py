@@ -0,0 +1,266 @@
+"""
+Motor de horarios basado en mapas de bits
+
+Un día se representa como un entero de 1440 bits: el bit i indica si el
+minuto i (desde la medianoche local) está libre. Las plantillas semanales de
+Disponibilidad encienden bits y las citas los apagan; los horarios libres
+para cualquier duración y granularidad salen de unas pocas operaciones
+AND/shift sobre el entero completo, sin recorrer slot por slot.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, available_timezones
+
+from config import settings
+
+MINUTOS_DIA = 24 * 60
+DIA_COMPLETO = (1 << MINUTOS_DIA) - 1
+
+
+def obtener_zona(nombre: Optional[str] = None) -> ZoneInfo:
+    """Zona horaria de las plantillas (por defecto settings.ZONA_HORARIA)"""
+    return ZoneInfo(nombre or settings.ZONA_HORARIA)
+
+
+def zona_valida(nombre: str) -> bool:
+    """Indica si `nombre` es una zona IANA conocida (p. ej. "America/Bogota")"""
+    return nombre in _zonas_disponibles()
+
+
+@lru_cache(maxsize=1)
+def _zonas_disponibles() -> frozenset:
+    return frozenset(available_timezones())
+
+
+def hora_a_minutos(hora) -> int:
+    """
+    Convierte "HH:MM" a minutos desde la medianoche ("24:00" es válido).
+    También acepta "HH:MM:SS" y objetos time, que algunos registros antiguos guardan.
+    """
+    partes = str(hora).split(":")
+    return int(partes[0]) * 60 + int(partes[1])
+
+
+def minutos_a_hora(minutos: int) -> str:
+    """Convierte minutos desde la medianoche a "HH:MM" """
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def mascara_rango(inicio: int, fin: int) -> int:
+    """Bits encendidos en [inicio, fin), recortado al día"""
+    inicio = max(inicio, 0)
+    fin = min(fin, MINUTOS_DIA)
+    if fin <= inicio:
+        return 0
+    return ((1 << (fin - inicio)) - 1) << inicio
+
+
+def mascara_bloques(bloques: Iterable[Tuple[int, int]]) -> int:
+    """Une varios bloques (inicio, fin) en minutos en un solo mapa de bits"""
+    mascara = 0
+    for inicio, fin in bloques:
+        mascara |= mascara_rango(inicio, fin)
+    return mascara
+
+
+def inicio_del_dia(dia: date, zona: ZoneInfo) -> datetime:
+    """Medianoche local del día, como datetime con zona"""
+    return datetime.combine(dia, time(0), tzinfo=zona)
+
+
+def mascara_ocupada(
+    dia: date,
+    zona: ZoneInfo,
+    citas: Iterable[Tuple[datetime, int]]
+) -> int:
+    """
+    Mapa de bits de los minutos ocupados del día por las citas dadas como
+    (fecha_hora, duracion_minutos). Las citas que cruzan la medianoche se recortan.
+    """
+    inicio = inicio_del_dia(dia, zona)
+    ocupada = 0
+    for fecha_hora, duracion in citas:
+        if fecha_hora.tzinfo is None:
+            fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+        desde = int((fecha_hora - inicio).total_seconds() // 60)
+        ocupada |= mascara_rango(desde, desde + (duracion or 60))
+    return ocupada
+
+
+def agrupar_citas_por_dia(
+    citas: Iterable[Tuple[int, datetime, int]],
+    zona: ZoneInfo,
+    zonas: Optional[Dict[int, ZoneInfo]] = None
+) -> Dict[Tuple[int, date], List[Tuple[datetime, int]]]:
+    """
+    Agrupa (profesional_id, fecha_hora, duracion_minutos) por profesional y
+    día local. Una cita que cruza la medianoche aparece en ambos días.
+    `zonas` da la zona de cada profesional; los que no aparecen usan `zona`.
+    """
+    zonas = zonas or {}
+    por_dia = defaultdict(list)
+    for profesional_id, fecha_hora, duracion in citas:
+        if fecha_hora.tzinfo is None:
+            fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+        inicio_local = fecha_hora.astimezone(zonas.get(profesional_id, zona))
+        fin_local = inicio_local + timedelta(minutes=(duracion or 60) - 1)
+        dia = inicio_local.date()
+        while dia <= fin_local.date():
+            por_dia[(profesional_id, dia)].append((fecha_hora, duracion))
+            dia += timedelta(days=1)
+    return por_dia
+
+
+def inicios_validos(libre: int, duracion: int) -> int:
+    """
+    Bit i encendido si los minutos [i, i + duracion) están todos libres.
+
+    Se calcula por duplicación: tras cada paso, el bit i cubre una racha el
+    doble de larga, así que bastan O(log duracion) operaciones sobre el día.
+    """
+    if duracion <= 0:
+        return libre
+    resultado = libre
+    cubierto = 1
+    while cubierto < duracion:
+        paso = min(cubierto, duracion - cubierto)
+        resultado &= resultado >> paso
+        cubierto += paso
+    return resultado
+
+
+@lru_cache(maxsize=32)
+def mascara_granularidad(granularidad: int) -> int:
+    """Bits encendidos en los múltiplos de la granularidad (00, 30, ... minutos)"""
+    mascara = 0
+    for minuto in range(0, MINUTOS_DIA, granularidad):
+        mascara |= 1 << minuto
+    return mascara
+
+
+def bits_encendidos(mascara: int) -> List[int]:
+    """Posiciones de los bits encendidos, en orden ascendente"""
+    posiciones = []
+    while mascara:
+        bit_bajo = mascara & -mascara
+        posiciones.append(bit_bajo.bit_length() - 1)
+        mascara ^= bit_bajo
+    return posiciones
+
+
+def rangos_encendidos(mascara: int) -> List[Tuple[int, int]]:
+    """Rachas de bits encendidos como bloques (inicio, fin) en minutos"""
+    rangos = []
+    while mascara:
+        inicio = (mascara & -mascara).bit_length() - 1
+        # Sumar el bit más bajo de la racha la "apaga" entera por acarreo: el
+        # acarreo queda en el primer bit apagado después de la racha (su fin)
+        suma = mascara + (1 << inicio)
+        fin = (suma & -suma).bit_length() - 1
+        rangos.append((inicio, fin))
+        mascara &= suma
+    return rangos
+
+
+def codificar_inicios(inicios: List[int], granularidad: int) -> str:
+    """
+    Codifica los inicios libres de un día como máscara hexadecimal compacta:
+    el bit k indica que el slot k (minuto k * granularidad) está libre.
+    Con granularidad de 30 minutos un día ocupa como máximo 12 caracteres.
+    """
+    mascara = 0
+    for minuto in inicios:
+        mascara |= 1 << (minuto // granularidad)
+    return format(mascara, "x")
+
+
+def calcular_inicios_libres(
+    disponible: int,
+    ocupada: int,
+    duracion: int,
+    granularidad: int = 30,
+    desde_minuto: int = 0
+) -> List[int]:
+    """
+    Minutos de inicio en los que cabe una cita de `duracion` minutos.
+
+    Args:
+        disponible: Mapa de bits de la plantilla del día
+        ocupada: Mapa de bits de las citas del día
+        duracion: Duración de la cita en minutos
+        granularidad: Separación entre inicios posibles en minutos
+        desde_minuto: Ignorar inicios anteriores (p. ej. la hora actual)
+    """
+    libre = disponible & ~ocupada & DIA_COMPLETO
+    inicios = inicios_validos(libre, duracion) & mascara_granularidad(granularidad)
+    if desde_minuto > 0:
+        inicios &= ~((1 << desde_minuto) - 1)
+    return bits_encendidos(inicios)
+
+
+def fechas_recurrentes(
+    inicio: datetime,
+    intervalo_dias: int,
+    zona: ZoneInfo,
+    ocurrencias: Optional[int] = None,
+    hasta: Optional[date] = None,
+    maximo: Optional[int] = None
+) -> List[datetime]:
+    """
+    Fechas de una serie que se repite cada `intervalo_dias` a la misma hora
+    local que `inicio`, hasta completar `ocurrencias` o hasta el día `hasta`
+    (inclusive), sin pasar de `maximo` fechas.
+    """
+    if inicio.tzinfo is None:
+        inicio = inicio.replace(tzinfo=timezone.utc)
+    local = inicio.astimezone(zona)
+    limites = [n for n in (ocurrencias, maximo) if n is not None]
+    if not limites and hasta is None:
+        raise ValueError("Indique ocurrencias, hasta o maximo")
+    limite = min(limites) if limites else None
+    
+    fechas = []
+    while limite is None or len(fechas) < limite:
+        if hasta is not None and local.date() > hasta:
+            break
+        fechas.append(local.astimezone(timezone.utc))
+        # Sumar días sobre la hora de pared conserva la hora local aunque cambie el offset
+        local = datetime.combine(local.date() + timedelta(days=intervalo_dias), local.timetz())
+    return fechas
+
+
+def detectar_solapamientos(
+    candidatas: List[Tuple[datetime, int]],
+    ocupadas: Iterable[Tuple[datetime, int]]
+) -> List[int]:
+    """
+    Índices de las candidatas (fecha_hora, duracion_minutos) que se solapan
+    con alguna ocupada. Las ocupadas se ordenan una vez y cada candidata se
+    resuelve con una búsqueda binaria, en lugar de una consulta por fecha.
+    """
+    intervalos = []
+    for fecha_hora, duracion in ocupadas:
+        if fecha_hora.tzinfo is None:
+            fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+        intervalos.append((fecha_hora, fecha_hora + timedelta(minutes=duracion or 60)))
+    intervalos.sort()
+    inicios = [inicio for inicio, _ in intervalos]
+    
+    # Fin máximo acumulado: basta mirar la última ocupada que empieza antes
+    # del fin de la candidata para saber si alguna anterior la alcanza
+    fines_maximos = []
+    fin_maximo = None
+    for _, fin in intervalos:
+        fin_maximo = fin if fin_maximo is None or fin > fin_maximo else fin_maximo
+        fines_maximos.append(fin_maximo)
+    
+    solapadas = []
+    for indice, (fecha_hora, duracion) in enumerate(candidatas):
+        fin = fecha_hora + timedelta(minutes=duracion)
+        anteriores = bisect_left(inicios, fin)
+        if anteriores and fines_maximos[anteriores - 1] > fecha_hora:
+            solapadas.append(indice)
+    return solapadas
@@ -2,7 +2,7 @@
 Utilidades para crear notificaciones en diferentes eventos del sistema
 """
 from sqlalchemy.orm import Session
-from models import Notificacion, TipoNotificacion, User, Cita
+from models import Notificacion, TipoNotificacion, User, Cita, EstadoCita
 from datetime import datetime
 
 
@@ -140,6 +140,102 @@ def notificar_cita_reagendada(db: Session, cita: Cita, cliente: User, profesiona
     )
 
 
+def notificar_serie_creada(db: Session, citas: list, cliente: User, profesional: User, frecuencia: str):
+    """
+    Crea una sola notificación resumen por participante cuando se agenda una
+    serie de citas recurrentes, en lugar de dos por cada cita de la serie
+    """
+    primera = citas[0].fecha_hora.strftime("%d/%m/%Y a las %H:%M")
+    ultima = citas[-1].fecha_hora.strftime("%d/%m/%Y")
+    resumen = f"{len(citas)} citas ({frecuencia}) desde el {primera} hasta el {ultima}"
+    
+    db.add_all([
+        Notificacion(
+            usuario_id=cliente.id,
+            tipo=TipoNotificacion.CITA_CONFIRMADA,
+            titulo="Serie de citas agendada",
+            mensaje=f"Se agendaron {resumen} con {profesional.nombre} {profesional.apellido}.",
+            leida=False,
+            cita_id=citas[0].id
+        ),
+        Notificacion(
+            usuario_id=profesional.id,
+            tipo=TipoNotificacion.CITA_CONFIRMADA,
+            titulo="Nueva serie de citas",
+            mensaje=f"{cliente.nombre} {cliente.apellido} tiene {resumen}.",
+            leida=False,
+            cita_id=citas[0].id
+        )
+    ])
+    db.commit()
+
+
+def notificar_cambios_estado(db: Session, citas: list, profesional: User, nuevo_estado: EstadoCita):
+    """
+    Notifica a los clientes un cambio de estado aplicado a varias citas a la
+    vez. Las notificaciones se guardan juntas con un solo commit.
+    Solo confirmaciones y cancelaciones generan aviso.
+    """
+    if nuevo_estado == EstadoCita.CONFIRMADA:
+        tipo, titulo, texto = TipoNotificacion.CITA_CONFIRMADA, "Cita confirmada", "ha confirmado"
+    elif nuevo_estado == EstadoCita.CANCELADA:
+        tipo, titulo, texto = TipoNotificacion.CITA_CANCELADA, "Cita cancelada", "ha cancelado"
+    else:
+        return
+    
+    db.add_all([
+        Notificacion(
+            usuario_id=cita.cliente_id,
+            tipo=tipo,
+            titulo=titulo,
+            mensaje=f"{profesional.nombre} {profesional.apellido} {texto} tu cita del {cita.fecha_hora.strftime('%d/%m/%Y a las %H:%M')}.",
+            leida=False,
+            cita_id=cita.id
+        )
+        for cita in citas
+    ])
+    db.commit()
+
+
+def notificar_reservas_vencidas(db: Session, citas: list):
+    """
+    Avisa a los clientes que sus citas sin pagar se cancelaron porque venció
+    la retención del horario. Todas se guardan con un solo commit
+    """
+    db.add_all([
+        Notificacion(
+            usuario_id=cita.cliente_id,
+            tipo=TipoNotificacion.CITA_CANCELADA,
+            titulo="Reserva vencida",
+            mensaje=f"Tu cita del {cita.fecha_hora.strftime('%d/%m/%Y a las %H:%M')} se canceló porque no se completó el pago a tiempo. Puedes agendarla de nuevo si el horario sigue disponible.",
+            leida=False,
+            cita_id=cita.id
+        )
+        for cita in citas
+    ])
+    db.commit()
+
+
+def notificar_horario_liberado(db: Session, solicitudes: list, profesional: User, fecha_hora: datetime):
+    """
+    Ofrece un horario liberado a las solicitudes de la lista de espera,
+    en el orden de prioridad en que se reciben. Todas se guardan con un solo commit
+    """
+    fecha_str = fecha_hora.strftime("%d/%m/%Y a las %H:%M")
+    
+    db.add_all([
+        Notificacion(
+            usuario_id=solicitud.cliente_id,
+            tipo=TipoNotificacion.SISTEMA,
+            titulo="Se liberó un horario",
+            mensaje=f"{profesional.nombre} {profesional.apellido} tiene disponible el {fecha_str}. Agenda pronto: el horario se asigna a quien reserve primero.",
+            leida=False
+        )
+        for solicitud in solicitudes
+    ])
+    db.commit()
+
+
 def notificar_pago_exitoso(db: Session, cita: Cita, cliente: User, monto: float, referencia: str):
     """
     Crea notificación cuando se realiza un pago exitoso
@@ -0,0 +1,96 @@
+"""
+Paginación por clave (keyset) con cursores opacos
+
+Los listados se ordenan por una clave única, normalmente (fecha, id), y cada
+página pide las filas que van después de la última fila entregada:
+WHERE (fecha, id) < (:fecha, :id) ORDER BY fecha DESC, id DESC LIMIT n. Con
+un índice sobre la clave, cada página cuesta lo mismo sin importar lo
+profunda que sea, a diferencia de OFFSET, que lee y descarta todas las filas
+anteriores.
+
+El cliente no arma la clave: recibe un cursor opaco (la clave en JSON,
+codificada en base64 url-safe) en el encabezado X-Siguiente-Cursor (o en
+`siguiente_cursor` si la respuesta es un objeto) y lo devuelve tal cual en
+el parámetro `cursor`. Sin cursor siguiente no hay más páginas.
+
+Uso:
+    antes_de = decodificar_cursor(cursor, datetime, int)
+    filas = Repositorio.listar(db, antes_de=antes_de, limite=limite + 1)
+    filas, siguiente = recortar_pagina(filas, limite, lambda f: (f.fecha, f.id))
+    publicar_cursor(response, siguiente)
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, Response, status
+
+ENCABEZADO_CURSOR = "X-Siguiente-Cursor"
+
+Fila = TypeVar("Fila")
+
+
+def codificar_cursor(*clave: Any) -> str:
+    """Cursor opaco para una clave de orden, p. ej. codificar_cursor(cita.fecha_hora, cita.id)"""
+    valores = [valor.isoformat() if isinstance(valor, (date, datetime)) else valor for valor in clave]
+    texto = json.dumps(valores, separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def _convertir(valor: Any, tipo: type) -> Any:
+    if valor is None:
+        return None
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    if tipo is int and not isinstance(valor, int):
+        raise ValueError(valor)
+    return tipo(valor)
+
+
+def decodificar_cursor(cursor: Optional[str], *tipos: type) -> Optional[Tuple]:
+    """
+    Clave de orden de un cursor, convertida a `tipos` (uno por columna).
+    None si no hay cursor; 400 si el cursor no es válido para este listado
+    """
+    if not cursor:
+        return None
+
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(texto)
+        if not isinstance(valores, list) or len(valores) != len(tipos):
+            raise ValueError(valores)
+        return tuple(_convertir(valor, tipo) for valor, tipo in zip(valores, tipos))
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+
+def recortar_pagina(
+    filas: Sequence[Fila],
+    limite: Optional[int],
+    clave: Callable[[Fila], Tuple]
+) -> Tuple[List[Fila], Optional[str]]:
+    """
+    Recibe las filas pedidas con `limite + 1`: la fila de más solo indica que
+    hay otra página. Retorna (filas de la página, cursor de la siguiente o
+    None). Sin `limite` la página es el listado completo.
+    """
+    filas = list(filas)
+    if not limite or len(filas) <= limite:
+        return filas, None
+
+    filas = filas[:limite]
+    return filas, codificar_cursor(*clave(filas[-1]))
+
+
+def publicar_cursor(response: Response, siguiente: Optional[str]) -> None:
+    """Pone el cursor de la siguiente página en el encabezado X-Siguiente-Cursor"""
+    if siguiente:
+        response.headers[ENCABEZADO_CURSOR] = siguiente
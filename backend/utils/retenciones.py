@@ -0,0 +1,298 @@
+"""
+Retenciones temporales de horarios
+
+Mientras un cliente completa la reserva (elegir horario, agendar, pagar) el
+horario queda retenido a su nombre durante RETENCION_TTL_SEGUNDOS. Las
+retenciones viven fuera de la base de datos, en un almacén clave-valor con
+expiración: en memoria del proceso o en Redis (o cualquier servidor que
+hable su protocolo). Al vencer desaparecen solas, sin barridos sobre la BD.
+
+La retención sigue viva después de agendar: la cita guarda su id y su
+vencimiento (retenida_hasta) y el pago la libera. Si vence antes del pago, el
+barrido cancela la cita sin pagar (services/barrido_service.py).
+
+Cada retención ocupa una clave por bloque de RETENCION_GRANULARIDAD_MINUTOS
+del horario. Verificar si un horario está retenido es leer sus bloques: como
+mucho DURACION_MAXIMA_CITA_MINUTOS / granularidad claves, en una sola ida al
+almacén, sin importar cuántas retenciones existan.
+"""
+import heapq
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+
+PREFIJO = "retencion"
+
+
+@dataclass
+class Retencion:
+    id: str
+    profesional_id: int
+    titular_id: int
+    fecha_hora: datetime
+    duracion_minutos: int
+    expira_en: Optional[datetime]
+
+
+class AlmacenMemoria:
+    """
+    Almacén en memoria del proceso. Sirve para una sola instancia del backend;
+    con varias instancias se debe usar Redis para que compartan las retenciones.
+    """
+
+    def __init__(self):
+        self._datos: Dict[str, Tuple[str, float]] = {}
+        self._vencimientos: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def _purgar(self, ahora: float) -> None:
+        # Cada escritura retira las claves ya vencidas: O(log n) amortizado
+        while self._vencimientos and self._vencimientos[0][0] <= ahora:
+            expira, clave = heapq.heappop(self._vencimientos)
+            actual = self._datos.get(clave)
+            if actual and actual[1] == expira:
+                del self._datos[clave]
+
+    def _leer(self, clave: str, ahora: float) -> Optional[str]:
+        actual = self._datos.get(clave)
+        if actual and actual[1] > ahora:
+            return actual[0]
+        return None
+
+    def reservar(self, claves: List[str], valor: str, ttl_ms: int) -> bool:
+        """Escribe todas las claves solo si ninguna está tomada por otro valor"""
+        ahora = time.monotonic()
+        expira = ahora + ttl_ms / 1000
+        with self._lock:
+            self._purgar(ahora)
+            if any(self._leer(clave, ahora) not in (None, valor) for clave in claves):
+                return False
+            for clave in claves:
+                self._datos[clave] = (valor, expira)
+                heapq.heappush(self._vencimientos, (expira, clave))
+            return True
+
+    def leer(self, claves: List[str]) -> List[Optional[str]]:
+        ahora = time.monotonic()
+        with self._lock:
+            return [self._leer(clave, ahora) for clave in claves]
+
+    def liberar(self, claves: List[str], valor: str) -> None:
+        """Borra las claves que aún pertenecen a `valor`"""
+        ahora = time.monotonic()
+        with self._lock:
+            for clave in claves:
+                if self._leer(clave, ahora) == valor:
+                    del self._datos[clave]
+
+
+class AlmacenRedis:
+    """
+    Almacén en Redis (o un servidor compatible). Requiere el paquete `redis`
+    (pip install redis); la expiración la aplica el propio servidor.
+    """
+
+    # Toma todas las claves o ninguna, en una sola operación atómica
+    _RESERVAR = """
+        for i, clave in ipairs(KEYS) do
+            local actual = redis.call('GET', clave)
+            if actual and actual ~= ARGV[1] then
+                return 0
+            end
+        end
+        for i, clave in ipairs(KEYS) do
+            redis.call('SET', clave, ARGV[1], 'PX', ARGV[2])
+        end
+        return 1
+    """
+
+    _LIBERAR = """
+        for i, clave in ipairs(KEYS) do
+            if redis.call('GET', clave) == ARGV[1] then
+                redis.call('DEL', clave)
+            end
+        end
+        return 1
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "RETENCIONES_BACKEND=redis requiere el paquete redis (pip install redis)"
+            ) from e
+        self._cliente = redis.Redis.from_url(url, decode_responses=True)
+
+    def reservar(self, claves: List[str], valor: str, ttl_ms: int) -> bool:
+        return bool(self._cliente.eval(self._RESERVAR, len(claves), *claves, valor, ttl_ms))
+
+    def leer(self, claves: List[str]) -> List[Optional[str]]:
+        return self._cliente.mget(claves) if claves else []
+
+    def liberar(self, claves: List[str], valor: str) -> None:
+        self._cliente.eval(self._LIBERAR, len(claves), *claves, valor)
+
+
+_almacen = None
+_almacen_lock = threading.Lock()
+
+
+def obtener_almacen():
+    """Almacén configurado en RETENCIONES_BACKEND ("memoria" o "redis")"""
+    global _almacen
+    if _almacen is None:
+        with _almacen_lock:
+            if _almacen is None:
+                if settings.RETENCIONES_BACKEND == "redis":
+                    _almacen = AlmacenRedis(settings.REDIS_URL)
+                else:
+                    _almacen = AlmacenMemoria()
+    return _almacen
+
+
+def configurar_almacen(almacen) -> None:
+    """Reemplaza el almacén (p. ej. por un sustituto local de Redis en pruebas)"""
+    global _almacen
+    _almacen = almacen
+
+
+def _claves_bloques(profesional_id: int, fecha_hora: datetime, duracion_minutos: int) -> List[str]:
+    """Claves de los bloques de RETENCION_GRANULARIDAD_MINUTOS que toca el horario"""
+    if fecha_hora.tzinfo is None:
+        fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+    segundos_bloque = settings.RETENCION_GRANULARIDAD_MINUTOS * 60
+    inicio = int(fecha_hora.timestamp())
+    fin = inicio + (duracion_minutos or 60) * 60
+    primero = inicio // segundos_bloque
+    ultimo = -(-fin // segundos_bloque)  # División hacia arriba
+    return [f"{PREFIJO}:{profesional_id}:{bloque}" for bloque in range(primero, ultimo)]
+
+
+def _clave_retencion(retencion_id: str) -> str:
+    return f"{PREFIJO}:id:{retencion_id}"
+
+
+def retener_horario(
+    profesional_id: int,
+    fecha_hora: datetime,
+    duracion_minutos: int,
+    titular_id: int,
+    ttl_segundos: Optional[int] = None
+) -> Optional[Retencion]:
+    """
+    Retiene un horario a nombre de `titular_id`. Retorna None si otra
+    retención vigente ya ocupa alguno de sus bloques.
+    """
+    ttl = ttl_segundos or settings.RETENCION_TTL_SEGUNDOS
+    retencion_id = uuid.uuid4().hex
+    almacen = obtener_almacen()
+
+    claves = _claves_bloques(profesional_id, fecha_hora, duracion_minutos)
+    if not almacen.reservar(claves, retencion_id, ttl * 1000):
+        return None
+
+    if fecha_hora.tzinfo is None:
+        fecha_hora = fecha_hora.replace(tzinfo=timezone.utc)
+    expira_en = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+    # Los datos de la retención expiran junto con sus bloques
+    descripcion = (
+        f"{profesional_id}|{titular_id}|{fecha_hora.isoformat()}|{duracion_minutos}|{expira_en.isoformat()}"
+    )
+    almacen.reservar([_clave_retencion(retencion_id)], descripcion, ttl * 1000)
+
+    return Retencion(
+        id=retencion_id,
+        profesional_id=profesional_id,
+        titular_id=titular_id,
+        fecha_hora=fecha_hora,
+        duracion_minutos=duracion_minutos,
+        expira_en=expira_en
+    )
+
+
+def _desde_descripcion(retencion_id: str, descripcion: str) -> Retencion:
+    profesional_id, titular_id, fecha_hora, duracion, *resto = descripcion.split("|")
+    return Retencion(
+        id=retencion_id,
+        profesional_id=int(profesional_id),
+        titular_id=int(titular_id),
+        fecha_hora=datetime.fromisoformat(fecha_hora),
+        duracion_minutos=int(duracion),
+        # Las retenciones guardadas antes de registrar el vencimiento no lo traen
+        expira_en=datetime.fromisoformat(resto[0]) if resto else None
+    )
+
+
+def obtener_retencion(retencion_id: str) -> Optional[Retencion]:
+    """Retención vigente con ese ID, o None si no existe o ya venció"""
+    descripcion = obtener_almacen().leer([_clave_retencion(retencion_id)])[0]
+    if not descripcion:
+        return None
+    return _desde_descripcion(retencion_id, descripcion)
+
+
+def retencion_propia(retencion_id: Optional[str], titular_id: int) -> Optional[Retencion]:
+    """La retención indicada, solo si está vigente y pertenece al titular"""
+    if not retencion_id:
+        return None
+    retencion = obtener_retencion(retencion_id)
+    if retencion and retencion.titular_id == titular_id:
+        return retencion
+    return None
+
+
+def horario_retenido(
+    profesional_id: int,
+    fecha_hora: datetime,
+    duracion_minutos: int,
+    excepto_retencion_id: Optional[str] = None
+) -> bool:
+    """
+    Indica si otra retención vigente ocupa algún bloque del horario.
+    La retención `excepto_retencion_id` (la del propio cliente) no cuenta.
+    """
+    return horarios_retenidos(profesional_id, [(fecha_hora, duracion_minutos)], excepto_retencion_id)[0]
+
+
+def horarios_retenidos(
+    profesional_id: int,
+    horarios: List[Tuple[datetime, int]],
+    excepto_retencion_id: Optional[str] = None
+) -> List[bool]:
+    """
+    horario_retenido para varios (fecha_hora, duracion_minutos) del mismo
+    profesional, con una sola lectura al almacén
+    """
+    claves_por_horario = [
+        _claves_bloques(profesional_id, fecha_hora, duracion_minutos)
+        for fecha_hora, duracion_minutos in horarios
+    ]
+    valores = obtener_almacen().leer([clave for claves in claves_por_horario for clave in claves])
+    retenidos = []
+    inicio = 0
+    for claves in claves_por_horario:
+        bloque = valores[inicio:inicio + len(claves)]
+        inicio += len(claves)
+        retenidos.append(any(valor is not None and valor != excepto_retencion_id for valor in bloque))
+    return retenidos
+
+
+def liberar_retencion(retencion_id: str) -> None:
+    """Libera una retención antes de que venza (al agendar o al desistir)"""
+    almacen = obtener_almacen()
+    clave = _clave_retencion(retencion_id)
+    descripcion = almacen.leer([clave])[0]
+    if not descripcion:
+        return
+    retencion = _desde_descripcion(retencion_id, descripcion)
+    almacen.liberar(
+        _claves_bloques(retencion.profesional_id, retencion.fecha_hora, retencion.duracion_minutos),
+        retencion_id
+    )
+    almacen.liberar([clave], descripcion)
@@ -275,6 +275,52 @@ export async function getCita(citaId) {
   return res.json();
 }
 
+/**
+ * Retiene un horario mientras el cliente completa la reserva y el pago.
+ * Devuelve { retencion_id, expira_en }; el retencion_id se envía al agendar
+ */
+export async function retenerHorario({ profesional_id, fecha_hora, duracion_minutos }) {
+  const token = getToken();
+  if (!token) throw new Error('No hay token de autenticación');
+  
+  const res = await fetch(`${API_BASE_URL}/api/citas/retener`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${token}`,
+    },
+    body: JSON.stringify({ profesional_id, fecha_hora, duracion_minutos }),
+  });
+  
+  if (!res.ok) {
+    const error = await res.json();
+    throw new Error(error.detail || 'El horario ya no está disponible');
+  }
+  
+  return res.json();
+}
+
+/**
+ * Libera un horario retenido (al cambiar de servicio o desistir)
+ */
+export async function liberarRetencion(retencionId) {
+  const token = getToken();
+  if (!token) throw new Error('No hay token de autenticación');
+  
+  const res = await fetch(`${API_BASE_URL}/api/citas/retener/${retencionId}`, {
+    method: 'DELETE',
+    headers: {
+      'Authorization': `Bearer ${token}`,
+    },
+  });
+  
+  // Si ya venció no hay nada que liberar
+  if (!res.ok && res.status !== 404) {
+    const error = await res.json();
+    throw new Error(error.detail || 'Error al liberar el horario');
+  }
+}
+
 /**
  * Agenda una nueva cita
  */
@@ -725,16 +771,21 @@ export async function getRoot() {
   return res.json();
 }
 
-export async function getPatients() {
+export async function getPatients({ busqueda = '', activo = null, skip = 0, limit = 50 } = {}) {
   const token = localStorage.getItem('token');
-  const res = await fetch(`${API_BASE_URL}/api/profesionales/dashboard/pacientes`, {
+  // La búsqueda, el filtro y la paginación se resuelven en el servidor
+  const params = new URLSearchParams({ skip, limit });
+  if (busqueda) params.append('busqueda', busqueda);
+  if (activo !== null) params.append('activo', activo);
+  
+  const res = await fetch(`${API_BASE_URL}/api/profesionales/dashboard/pacientes?${params}`, {
     headers: {
       'Authorization': `Bearer ${token}`
     }
   });
   if (!res.ok) throw new Error('Failed to fetch patients');
   const data = await res.json();
-  return data.patients || [];
+  return { patients: data.patients || [], total: data.total || 0 };
 }
 
 export async function addPatient(patient) {
@@ -772,6 +823,8 @@ export default {
   // Citas
   getMisCitas,
   getCita,
+  retenerHorario,
+  liberarRetencion,
   agendarCita,
   cancelarCita,
   reagendarCita,
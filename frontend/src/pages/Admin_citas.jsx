@@ -6,20 +6,32 @@ const AdminCitas = () => {
   const [busqueda, setBusqueda] = useState('');
   const [citas, setCitas] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [siguienteCursor, setSiguienteCursor] = useState(null);
+  const [cargandoMas, setCargandoMas] = useState(false);
+  const [contadores, setContadores] = useState({ total: 0, confirmada: 0, pendiente: 0, completada: 0 });
 
+  // La búsqueda se hace en el servidor: se espera a que el usuario deje de escribir
   useEffect(() => {
-    cargarCitas();
+    const espera = setTimeout(() => cargarCitas(), busqueda ? 300 : 0);
+    return () => clearTimeout(espera);
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [filtroEstado]);
+  }, [filtroEstado, busqueda]);
 
-  const cargarCitas = async () => {
-    setLoading(true);
+  // El backend entrega las citas por páginas; `cursor` pide la siguiente
+  const cargarCitas = async (cursor = null) => {
+    if (cursor) {
+      setCargandoMas(true);
+    } else {
+      setLoading(true);
+    }
     try {
       const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
       const token = localStorage.getItem('token');
-      const url = filtroEstado === 'todas' 
-        ? `${API_URL}/api/citas/admin/todas`
-        : `${API_URL}/api/citas/admin/todas?estado=${filtroEstado}`;
+      const params = new URLSearchParams({ limite: '100' });
+      if (filtroEstado !== 'todas') params.set('estado', filtroEstado);
+      if (busqueda.trim()) params.set('busqueda', busqueda.trim());
+      if (cursor) params.set('cursor', cursor);
+      const url = `${API_URL}/api/citas/admin/todas?${params.toString()}`;
       
       const response = await fetch(url, {
         headers: {
@@ -29,35 +41,20 @@ const AdminCitas = () => {
 
       if (response.ok) {
         const data = await response.json();
-        setCitas(data.citas || []);
+        const nuevas = data.citas || [];
+        setCitas(prev => (cursor ? [...prev, ...nuevas] : nuevas));
+        setSiguienteCursor(data.siguiente_cursor || null);
+        // Los contadores vienen con la primera página y cubren todas las citas del filtro
+        if (data.contadores) setContadores(data.contadores);
       }
     } catch (error) {
       console.error('Error cargando citas:', error);
     } finally {
       setLoading(false);
+      setCargandoMas(false);
     }
   };
 
-  const citasFiltradas = citas.filter(cita => {
-    if (busqueda === '') return true;
-    
-    const busquedaLower = busqueda.toLowerCase();
-    const nombrePaciente = cita.cliente?.nombre_completo?.toLowerCase() || '';
-    const nombreProfesional = cita.profesional?.nombre_completo?.toLowerCase() || '';
-    const especialidad = cita.profesional?.especialidad?.toLowerCase() || '';
-    
-    return nombrePaciente.includes(busquedaLower) || 
-           nombreProfesional.includes(busquedaLower) || 
-           especialidad.includes(busquedaLower);
-  });
-
-  const contadores = {
-    total: citas.length,
-    confirmadas: citas.filter(c => c.estado === 'confirmada').length,
-    pendientes: citas.filter(c => c.estado === 'pendiente').length,
-    completadas: citas.filter(c => c.estado === 'completada').length
-  };
-
   const formatearFecha = (fecha) => {
     if (!fecha) return 'Sin fecha';
     return new Date(fecha).toLocaleString('es-ES', {
@@ -104,15 +101,15 @@ const AdminCitas = () => {
             </div>
             <div className="bg-white rounded-lg shadow-sm p-6 border-l-4 border-green-500">
               <h3 className="text-sm font-medium text-gray-500 mb-2">Confirmadas</h3>
-              <p className="text-3xl font-bold text-green-600">{contadores.confirmadas}</p>
+              <p className="text-3xl font-bold text-green-600">{contadores.confirmada}</p>
             </div>
             <div className="bg-white rounded-lg shadow-sm p-6 border-l-4 border-yellow-500">
               <h3 className="text-sm font-medium text-gray-500 mb-2">Pendientes</h3>
-              <p className="text-3xl font-bold text-yellow-600">{contadores.pendientes}</p>
+              <p className="text-3xl font-bold text-yellow-600">{contadores.pendiente}</p>
             </div>
             <div className="bg-white rounded-lg shadow-sm p-6 border-l-4 border-blue-500">
               <h3 className="text-sm font-medium text-gray-500 mb-2">Completadas</h3>
-              <p className="text-3xl font-bold text-blue-600">{contadores.completadas}</p>
+              <p className="text-3xl font-bold text-blue-600">{contadores.completada}</p>
             </div>
           </div>
 
@@ -151,7 +148,7 @@ const AdminCitas = () => {
               <div className="flex justify-center items-center py-12">
                 <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-purple-600"></div>
               </div>
-            ) : citasFiltradas.length === 0 ? (
+            ) : citas.length === 0 ? (
               <div className="text-center py-12">
                 <p className="text-gray-500">No hay citas registradas en el sistema</p>
               </div>
@@ -171,7 +168,7 @@ const AdminCitas = () => {
                     </tr>
                   </thead>
                   <tbody className="bg-white divide-y divide-gray-200">
-                    {citasFiltradas.map((cita) => (
+                    {citas.map((cita) => (
                       <tr key={cita.id} className="hover:bg-gray-50">
                         <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">#{cita.id}</td>
                         <td className="px-6 py-4 whitespace-nowrap">
@@ -201,6 +198,17 @@ const AdminCitas = () => {
                     ))}
                   </tbody>
                 </table>
+                {siguienteCursor && (
+                  <div className="flex justify-center py-4 border-t">
+                    <button
+                      onClick={() => cargarCitas(siguienteCursor)}
+                      disabled={cargandoMas}
+                      className="px-4 py-2 bg-purple-600 hover:bg-purple-700 text-white rounded-lg font-medium transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
+                    >
+                      {cargandoMas ? 'Cargando...' : 'Cargar más citas'}
+                    </button>
+                  </div>
+                )}
               </div>
             )}
           </div>
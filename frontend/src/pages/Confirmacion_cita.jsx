@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate, useSearchParams } from 'react-router-dom';
 import ClientNavbar from '../components/Navbar_cliente';
-import { getProfesional, agendarCita } from '../api';
+import { getProfesional, agendarCita, retenerHorario, liberarRetencion } from '../api';
 
 const BookAppointment = () => {
   const [searchParams] = useSearchParams();
@@ -28,6 +28,9 @@ const BookAppointment = () => {
   const [professional, setProfessional] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  // Retención del horario mientras se completa la reserva y el pago
+  const [retencion, setRetencion] = useState(null);
+  const [errorRetencion, setErrorRetencion] = useState(null);
 
   const services = [
     {
@@ -149,6 +152,46 @@ const BookAppointment = () => {
     }
   };
 
+  // Fecha y hora de la cita a partir de la fecha de los parámetros y la hora elegida
+  const calcularFechaHora = () => {
+    const [hora, minuto] = selectedTime.replace(' AM', '').replace(' PM', '').split(':');
+    let hora24 = parseInt(hora);
+    if (selectedTime.includes('PM') && hora24 !== 12) hora24 += 12;
+    if (selectedTime.includes('AM') && hora24 === 12) hora24 = 0;
+    
+    const fechaHora = new Date(fechaSeleccionada);
+    fechaHora.setHours(hora24, parseInt(minuto), 0, 0);
+    return fechaHora;
+  };
+
+  // Al elegir el servicio se retiene el horario con su duración, para que
+  // nadie más lo tome mientras se agenda y se paga
+  const handleSelectService = async (service) => {
+    setSelectedService(service);
+    setErrorRetencion(null);
+    
+    if (retencion) {
+      try {
+        await liberarRetencion(retencion.retencion_id);
+      } catch (err) {
+        console.error('Error al liberar el horario:', err);
+      }
+      setRetencion(null);
+    }
+    
+    try {
+      const nuevaRetencion = await retenerHorario({
+        profesional_id: parseInt(profesionalId),
+        fecha_hora: calcularFechaHora().toISOString(),
+        duracion_minutos: service.duration
+      });
+      setRetencion(nuevaRetencion);
+    } catch (err) {
+      console.error('Error al retener el horario:', err);
+      setErrorRetencion(err.message);
+    }
+  };
+
   const handleInputChange = (e) => {
     setFormData({
       ...formData,
@@ -171,18 +214,9 @@ const BookAppointment = () => {
       console.log('fechaSeleccionada original:', fechaSeleccionada);
       
       // Crear fecha y hora en formato ISO usando la fecha que viene de los parámetros
-      const [hora, minuto] = selectedTime.replace(' AM', '').replace(' PM', '').split(':');
-      let hora24 = parseInt(hora);
-      if (selectedTime.includes('PM') && hora24 !== 12) hora24 += 12;
-      if (selectedTime.includes('AM') && hora24 === 12) hora24 = 0;
-      
-      console.log('Hora parseada - hora24:', hora24, 'minuto:', minuto);
+      const fechaHora = calcularFechaHora();
       
-      // Usar la fecha seleccionada que ya viene parseada
-      const fechaHora = new Date(fechaSeleccionada);
-      fechaHora.setHours(hora24, parseInt(minuto), 0, 0);
-      
-      console.log('fechaHora con setHours:', fechaHora);
+      console.log('fechaHora:', fechaHora);
       console.log('fechaHora.toISOString():', fechaHora.toISOString());
 
       // Preparar datos para la API
@@ -192,7 +226,9 @@ const BookAppointment = () => {
         duracion_minutos: selectedService.duration,
         motivo: formData.motivo || selectedService.name,
         notas: formData.notas || '',
-        precio: selectedService.price
+        precio: selectedService.price,
+        // La retención sigue vigente hasta que se complete el pago
+        retencion_id: retencion ? retencion.retencion_id : null
       };
 
       console.log('citaData completo:', JSON.stringify(citaData, null, 2));
@@ -296,7 +332,7 @@ const BookAppointment = () => {
                       type="button"
                       onClick={(e) => {
                         e.preventDefault();
-                        setSelectedService(service);
+                        handleSelectService(service);
                       }}
                       className={`w-full text-left p-4 border-2 rounded-lg transition-all ${
                         selectedService?.id === service.id
@@ -322,6 +358,9 @@ const BookAppointment = () => {
                     </button>
                   ))}
                 </div>
+                {errorRetencion && (
+                  <p className="mt-4 text-sm text-red-600">{errorRetencion}</p>
+                )}
               </div>
             )}
 
@@ -517,6 +556,11 @@ const BookAppointment = () => {
                   <p className="font-semibold text-gray-900">
                     {selectedTime || '-'}
                   </p>
+                  {retencion && (
+                    <p className="text-xs text-gray-500 mt-1">
+                      Horario reservado para ti hasta las {new Date(retencion.expira_en).toLocaleTimeString('es-CO', { hour: '2-digit', minute: '2-digit' })}. Completa el pago antes de esa hora.
+                    </p>
+                  )}
                 </div>
 
                 <div className="border-t pt-3 mt-3">
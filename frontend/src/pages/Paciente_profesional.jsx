@@ -1,4 +1,4 @@
-import React, { useState, useMemo, useEffect } from 'react';
+import React, { useState, useEffect } from 'react';
 import ProfessionalNavbar from '../components/Navbar_profesional.jsx';
 import { getPatients, addPatient } from '../api';
 
@@ -135,41 +135,61 @@ const PatientModal = ({ open, patient, onClose, onSave }) => {
 };
 
 /* ---------- Componente principal ---------- */
+const PACIENTES_POR_PAGINA = 50;
+
 const ProfessionalPatients = () => {
   const [patients, setPatients] = useState([]);
+  const [totalPatients, setTotalPatients] = useState(0);
   const [loadingPatients, setLoadingPatients] = useState(true);
 
+  const [searchQuery, setSearchQuery] = useState('');
+  const [statusFilter, setStatusFilter] = useState('all'); // all, active, inactive
+  const [isModalOpen, setIsModalOpen] = useState(false);
+  const [selectedPatient, setSelectedPatient] = useState(null);
+
+  // La búsqueda y el filtro se aplican en el servidor, sobre todos los pacientes
+  const cargarPacientes = (skip) => getPatients({
+    busqueda: searchQuery.trim(),
+    activo: statusFilter === 'all' ? null : statusFilter === 'active',
+    skip,
+    limit: PACIENTES_POR_PAGINA,
+  });
+
+  // Primera página cada vez que cambia el filtro (la búsqueda espera a que se deje de escribir)
   useEffect(() => {
     let mounted = true;
-    (async () => {
+    setLoadingPatients(true);
+    const timer = setTimeout(async () => {
       try {
-        const data = await getPatients();
-        if (mounted) setPatients(data);
+        const data = await cargarPacientes(0);
+        if (mounted) {
+          setPatients(data.patients);
+          setTotalPatients(data.total);
+        }
       } catch (err) {
         console.error('Error fetching patients:', err);
       } finally {
         if (mounted) setLoadingPatients(false);
       }
-    })();
-    return () => (mounted = false);
-  }, []);
-
-  const [searchQuery, setSearchQuery] = useState('');
-  const [statusFilter, setStatusFilter] = useState('all'); // all, active, inactive
-  const [isModalOpen, setIsModalOpen] = useState(false);
-  const [selectedPatient, setSelectedPatient] = useState(null);
+    }, 300);
+    return () => {
+      mounted = false;
+      clearTimeout(timer);
+    };
+  }, [searchQuery, statusFilter]);
 
-  // Filtrado y búsqueda
-  const filteredPatients = useMemo(() => {
-    return patients.filter((p) => {
-      const matchesSearch =
-        p.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        p.email.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        p.phone.includes(searchQuery);
-      const matchesStatus = statusFilter === 'all' || p.status === statusFilter;
-      return matchesSearch && matchesStatus;
-    });
-  }, [patients, searchQuery, statusFilter]);
+  const loadMorePatients = async () => {
+    setLoadingPatients(true);
+    try {
+      const data = await cargarPacientes(patients.length);
+      setPatients((actuales) => [...actuales, ...data.patients]);
+      setTotalPatients(data.total);
+    } catch (err) {
+      console.error('Error fetching patients:', err);
+    } finally {
+      setLoadingPatients(false);
+    }
+  };
 
   const openAddPatient = () => {
     setSelectedPatient(null);
@@ -203,7 +223,7 @@ const ProfessionalPatients = () => {
           </div>
 
           <div className="text-sm text-gray-500">
-            Total: {filteredPatients.length} paciente{filteredPatients.length !== 1 ? 's' : ''}
+            Total: {totalPatients} paciente{totalPatients !== 1 ? 's' : ''}
           </div>
         </div>
 
@@ -230,17 +250,17 @@ const ProfessionalPatients = () => {
           </div>
 
           <div className="text-sm text-gray-600">
-            Mostrando {filteredPatients.length} de {patients.length} pacientes
+            Mostrando {patients.length} de {totalPatients} pacientes
           </div>
         </div>
 
         {/* Patient cards grid */}
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-          {filteredPatients.length === 0 && (
+          {!loadingPatients && patients.length === 0 && (
             <div className="col-span-full text-center py-12 text-gray-500">No se encontraron pacientes.</div>
           )}
 
-          {filteredPatients.map((patient) => (
+          {patients.map((patient) => (
             <div key={patient.id} className="bg-white rounded-lg shadow-sm p-5 hover:shadow-md transition">
               <div className="flex items-start gap-4">
                 <div className="w-16 h-16 rounded-full bg-gradient-to-br from-emerald-400 to-cyan-500 flex items-center justify-center text-white text-2xl font-bold">
@@ -286,6 +306,18 @@ const ProfessionalPatients = () => {
             </div>
           ))}
         </div>
+
+        {patients.length < totalPatients && (
+          <div className="mt-6 text-center">
+            <button
+              onClick={loadMorePatients}
+              disabled={loadingPatients}
+              className="px-4 py-2 bg-white border rounded text-sm text-gray-700 hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingPatients ? 'Cargando...' : 'Cargar más pacientes'}
+            </button>
+          </div>
+        )}
       </div>
 
       <PatientModal